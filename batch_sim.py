@@ -0,0 +1,238 @@
+"""Headless, vectorized simulator that steps many Flappy Bird games at once"""
+import numpy as np
+
+from flappy_core import (SCREEN_WIDTH, SCREEN_HEIGHT, BIRD_WIDTH, BIRD_HEIGHT, BIRD_X,
+                         GRAVITY, JUMP_STRENGTH, PIPE_WIDTH, PIPE_GAP, PIPE_SPEED,
+                         PIPE_SPAWN_FREQUENCY, SEED_LIMIT, STATE_FRAME, STATE_BIRD_Y,
+                         STATE_VELOCITY, STATE_SCORE, STATE_STARTED, STATE_GAME_OVER, STATE_PAUSED,
+                         STATE_PIPE_INDEX, STATE_PIPE_COUNT, STATE_HEADER, PIPE_FIELDS,
+                         check_seed, course_gaps, new_seed)
+
+
+class BatchSimulator:
+    """Step N birds and their pipe courses in lock-step with NumPy arrays.
+
+    The rules mirror Game.update for a started, unpaused game: the bird falls
+    with GRAVITY, flapping sets the velocity to JUMP_STRENGTH, a pipe spawns
+    every PIPE_SPAWN_FREQUENCY frames and collisions follow Pipe.collides_with
+    (pygame.Rect truncates the bird's y position to an integer). Only the
+    flat difficulty curve is simulated.
+
+    Bird i starts on the course of Simulation(seed=seed + i), or of its own
+    seed if seed is a sequence of n seeds, and each reset moves a bird n
+    seeds on, so no two games share a course. Without a seed a random one
+    is picked.
+
+    Bird and pipe sizes default to the sprite-less fallback sizes; pass the
+    sprite sizes (34x24 bird, 52 wide pipe, base_y 488 with the bundled
+    assets) to match a Game that loaded its images.
+    """
+
+    def __init__(self, n, seed=None, base_y=None, bird_width=BIRD_WIDTH,
+                 bird_height=BIRD_HEIGHT, pipe_width=PIPE_WIDTH, course_length=64,
+                 auto_reset=False):
+        self.n = n
+        self.base_y = int(base_y) if base_y else SCREEN_HEIGHT - 50
+        self.bird_width = bird_width
+        self.bird_height = bird_height
+        self.pipe_width = pipe_width
+        self.auto_reset = auto_reset
+        if seed is None or isinstance(seed, (int, np.integer)):
+            first = new_seed() if seed is None else check_seed(seed)
+            self.seeds = [(first + i) % SEED_LIMIT for i in range(n)]
+        else:
+            self.seeds = [check_seed(s) for s in seed]
+            if len(self.seeds) != n:
+                raise ValueError(f'{len(self.seeds)} seeds for {n} birds')
+
+        # A pipe lives (SCREEN_WIDTH + width) / PIPE_SPEED frames, so only a few
+        # are on screen at once; pipe k always lives in ring slot k % max_pipes
+        lifetime = (SCREEN_WIDTH + pipe_width) // PIPE_SPEED + 1
+        self.max_pipes = lifetime // PIPE_SPAWN_FREQUENCY + 2
+
+        self.y = np.empty(n, dtype=np.float64)
+        self.velocity = np.empty(n, dtype=np.float64)
+        self.frame = np.empty(n, dtype=np.int64)
+        self.score = np.empty(n, dtype=np.int64)
+        self.done = np.empty(n, dtype=bool)
+
+        self.pipe_x = np.zeros((n, self.max_pipes), dtype=np.int64)
+        self.pipe_gap = np.zeros((n, self.max_pipes), dtype=np.int64)
+        self.pipe_active = np.zeros((n, self.max_pipes), dtype=bool)
+        self.pipe_passed = np.zeros((n, self.max_pipes), dtype=bool)
+
+        # Pre-rolled gap_y values: pipe k of bird i uses courses[i, k]
+        self.courses = np.empty((n, course_length), dtype=np.int64)
+        self._rows = np.arange(n)
+        self._restart(self._rows)
+
+    def seeded_gaps(self, rows, start, stop):
+        """gap_y of pipes start to stop - 1 on the courses the birds in rows are seeded with"""
+        return [course_gaps(self.seeds[i], stop, self.base_y)[start:] for i in rows]
+
+    def set_courses(self, courses, mask=None):
+        """Use explicit gap_y sequences instead of random ones"""
+        courses = np.asarray(courses, dtype=np.int64)
+        if mask is None:
+            if courses.ndim == 1:
+                courses = np.broadcast_to(courses, (self.n, courses.shape[0]))
+            self.courses = courses.copy()
+        else:
+            if courses.shape[-1] > self.courses.shape[1]:
+                self._grow_courses(courses.shape[-1])
+            self.courses[mask, :courses.shape[-1]] = courses
+
+    def reset(self, mask=None):
+        """Reset all birds, or only those selected by a boolean mask, each on its next seed"""
+        rows = self._rows if mask is None else self._rows[mask]
+        seeds = self.seeds
+        for i in rows:
+            seeds[i] = (seeds[i] + self.n) % SEED_LIMIT
+        self._restart(rows)
+
+    def _restart(self, rows):
+        if len(rows) == 0:
+            return
+        self.y[rows] = SCREEN_HEIGHT // 2
+        self.velocity[rows] = 0
+        self.frame[rows] = 0
+        self.score[rows] = 0
+        self.done[rows] = False
+        self.pipe_active[rows] = False
+        self.pipe_passed[rows] = False
+        self.courses[rows] = self.seeded_gaps(rows, 0, self.courses.shape[1])
+
+    def load_state(self, state, gaps, mask=None):
+        """Put all birds, or those selected by mask, in one Simulation.snapshot().
+
+        gaps is that game's course, course.gaps(count), covering the pipes
+        the birds will reach. Birds loaded from one state then play out
+        different flap plans in lock-step, for lookahead search. The game
+        must be started, unpaused and on the flat difficulty.
+        """
+        if not state[STATE_STARTED] or state[STATE_PAUSED]:
+            raise ValueError('only a started, unpaused game can be loaded')
+        rows = self._rows if mask is None else self._rows[mask]
+        self.set_courses(gaps, mask)
+        self.y[rows] = state[STATE_BIRD_Y]
+        self.velocity[rows] = state[STATE_VELOCITY]
+        self.frame[rows] = state[STATE_FRAME]
+        self.score[rows] = state[STATE_SCORE]
+        self.done[rows] = bool(state[STATE_GAME_OVER])
+        self.pipe_active[rows] = False
+        self.pipe_passed[rows] = False
+        # The pipes on screen are the last count spawned, in spawn order
+        count = int(state[STATE_PIPE_COUNT])
+        first = int(state[STATE_PIPE_INDEX]) - count
+        for j in range(count):
+            i = STATE_HEADER + j * PIPE_FIELDS
+            slot = (first + j) % self.max_pipes
+            self.pipe_x[rows, slot] = state[i]
+            self.pipe_gap[rows, slot] = state[i + 1]
+            self.pipe_active[rows, slot] = True
+            self.pipe_passed[rows, slot] = bool(state[i + 3])
+
+    def keep(self, mask):
+        """Drop every bird not selected by mask; the rest keep their order.
+
+        Steps cost per bird, dead or alive, so batches that only read the
+        result at the end can drop their dead birds as they go.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        for name in ('y', 'velocity', 'frame', 'score', 'done', 'pipe_x', 'pipe_gap',
+                     'pipe_active', 'pipe_passed', 'courses'):
+            setattr(self, name, getattr(self, name)[mask])
+        self.seeds = [seed for seed, kept in zip(self.seeds, mask) if kept]
+        self.n = len(self.y)
+        self._rows = np.arange(self.n)
+
+    def _grow_courses(self, length):
+        # Explicit courses carry on with the birds' seeded gaps
+        old = self.courses.shape[1]
+        new = max(length, 2 * old)
+        self.courses = np.concatenate([self.courses, self.seeded_gaps(self._rows, old, new)], axis=1)
+
+    def step(self, flap=None):
+        """Advance every live bird one frame.
+
+        `flap` is a boolean array (or scalar) of birds that jump before the
+        frame, like a SPACE press handled ahead of Game.update. Returns a
+        boolean array of birds that died on this frame.
+        """
+        live = ~self.done
+        if flap is not None:
+            self.velocity[np.asarray(flap, dtype=bool) & live] = JUMP_STRENGTH
+
+        # Bird.update
+        self.velocity[live] += GRAVITY
+        self.y[live] += self.velocity[live]
+
+        # Ground and ceiling
+        died = live & ((self.y + self.bird_height >= self.base_y) | (self.y < 0))
+
+        # Spawn a pipe every PIPE_SPAWN_FREQUENCY frames
+        self.frame[live] += 1
+        spawn = live & (self.frame % PIPE_SPAWN_FREQUENCY == 0)
+        if spawn.any():
+            rows = self._rows[spawn]
+            index = self.frame[rows] // PIPE_SPAWN_FREQUENCY - 1
+            if index.max() >= self.courses.shape[1]:
+                self._grow_courses(int(index.max()) + 1)
+            slot = index % self.max_pipes
+            self.pipe_x[rows, slot] = SCREEN_WIDTH
+            self.pipe_gap[rows, slot] = self.courses[rows, index]
+            self.pipe_active[rows, slot] = True
+            self.pipe_passed[rows, slot] = False
+
+        # Pipe.update on live birds only
+        moving = self.pipe_active & live[:, None]
+        self.pipe_x -= PIPE_SPEED * moving
+
+        # Pipe.collides_with, using the integer rect pygame would build
+        bird_top = np.trunc(self.y).astype(np.int64)[:, None]
+        bird_bottom = bird_top + self.bird_height
+        overlap_x = (BIRD_X < self.pipe_x + self.pipe_width) & (BIRD_X + self.bird_width > self.pipe_x)
+        bottom_y = self.pipe_gap + PIPE_GAP
+        hit_top = (self.pipe_gap > 0) & (bird_top < self.pipe_gap) & (bird_bottom > 0)
+        hit_bottom = (self.base_y > bottom_y) & (bird_top < self.base_y) & (bird_bottom > bottom_y)
+        hits = moving & overlap_x & (hit_top | hit_bottom)
+        died |= hits.any(axis=1)
+
+        # Scoring still counts on the frame the bird dies, as in Game.update
+        passing = moving & ~self.pipe_passed & (self.pipe_x + self.pipe_width < BIRD_X)
+        self.pipe_passed |= passing
+        self.score += passing.sum(axis=1)
+
+        # Pipe.is_off_screen
+        self.pipe_active &= ~(moving & (self.pipe_x + self.pipe_width < 0))
+
+        self.done |= died
+        if self.auto_reset and died.any():
+            self.reset(died)
+        return died
+
+    def run(self, policy, max_frames):
+        """Step until every bird is dead or max_frames pass.
+
+        `policy(sim)` returns the flap array for the next frame.
+        """
+        for _ in range(max_frames):
+            if self.done.all():
+                break
+            self.step(policy(self))
+        return self.score
+
+    def next_pipe(self):
+        """Return (distance, gap_y) of the nearest pipe ahead of each bird.
+
+        Birds with no pipe ahead get a distance of SCREEN_WIDTH - BIRD_X and
+        the gap of the pipe that will spawn next.
+        """
+        ahead = self.pipe_active & (self.pipe_x + self.pipe_width >= BIRD_X)
+        distance = np.where(ahead, self.pipe_x - BIRD_X, np.iinfo(np.int64).max)
+        slot = distance.argmin(axis=1)
+        has_pipe = ahead[self._rows, slot]
+        upcoming = np.minimum(self.frame // PIPE_SPAWN_FREQUENCY, self.courses.shape[1] - 1)
+        gap = np.where(has_pipe, self.pipe_gap[self._rows, slot], self.courses[self._rows, upcoming])
+        distance = np.where(has_pipe, distance[self._rows, slot], SCREEN_WIDTH - BIRD_X)
+        return distance, gap
@@ -0,0 +1,86 @@
+"""Cold-start asset fetch: serial vs. parallel download from a local HTTP server.
+
+The server serves the repository's assets/ folder and adds a fixed delay to
+every request to stand in for network latency. Run from the repository root:
+    python benchmarks/asset_fetch.py [--latency MS] [--workers N]
+"""
+import argparse
+import functools
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import flappy_bird as fb
+
+
+class SlowHandler(http.server.SimpleHTTPRequestHandler):
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory, latency):
+    handler = functools.partial(SlowHandler, directory=directory)
+    SlowHandler.latency = latency
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def cold_start(mirror, workers, runs):
+    """Time download_assets into empty directories"""
+    timings = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as assets_dir:
+            start = time.perf_counter()
+            fb.download_assets(assets_dir, mirror=mirror, workers=workers)
+            timings.append(time.perf_counter() - start)
+            complete = all(fb.verify_asset(os.path.join(assets_dir, name), name) for name in fb.asset_files())
+            if not complete:
+                sys.exit('download incomplete')
+    return min(timings), sum(timings) / len(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=50, help='added delay per request in ms')
+    parser.add_argument('--workers', type=int, default=fb.ASSET_WORKERS, help='parallel fetch workers')
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    server = serve(os.path.join(ROOT, 'assets'), args.latency / 1000)
+    mirror = f'http://127.0.0.1:{server.server_address[1]}'
+    files = len(fb.asset_files())
+    print(f'{files} files from {mirror}, {args.latency:.0f} ms added latency per request')
+
+    # download_assets prints a line per file; keep the report readable
+    stdout = sys.stdout
+    results = {}
+    for label, workers in [('serial', 1), ('parallel', args.workers)]:
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            results[label] = cold_start(mirror, workers, args.runs)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        best, mean = results[label]
+        print(f'{label:<9} workers={workers:<3} best {best * 1000:8.1f} ms  mean {mean * 1000:8.1f} ms')
+    print(f"speedup {results['serial'][1] / results['parallel'][1]:.1f}x")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Latency from a key press to the sound's play() call, per mixer buffer size.
+
+Run from the repository root:
+    python benchmarks/audio_latency.py [--buffers 128 256 512] [--seconds 10]
+
+A thread posts SPACE key presses at random moments while Game.run plays in
+real time; each press is matched with the wing sound's play() call. The
+mixer buffer adds up to one buffer of output delay on top, listed per size.
+With SDL's dummy audio driver nothing is heard, but the same code runs.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import flappy_bird as fb
+
+
+def press_keys(presses, stop, rng):
+    """Post SPACE presses 100-300 ms apart, slower than the wing sound's rate limit"""
+    while not stop.wait(rng.uniform(0.1, 0.3)):
+        presses.append(time.perf_counter())
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+
+
+def measure(buffer, seconds, seed):
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        game = fb.Game(seed=seed, leaderboard_path=None, audio_buffer=buffer, audio_log=True)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    audio = game.audio
+    if not audio.enabled:
+        return None
+
+    presses = []
+    stop = threading.Event()
+    thread = threading.Thread(target=press_keys, args=(presses, stop, random.Random(seed)))
+    thread.start()
+    try:
+        game.run(max_steps=int(seconds * fb.SIM_RATE))
+    finally:
+        stop.set()
+        thread.join()
+
+    # Each press gets the first wing play after it and before the next press;
+    # presses that restart a finished game make no sound
+    plays = [t for name, t in audio.log if name == 'wing']
+    latencies = []
+    j = 0
+    for i, pressed in enumerate(presses):
+        following = presses[i + 1] if i + 1 < len(presses) else float('inf')
+        while j < len(plays) and plays[j] < pressed:
+            j += 1
+        if j < len(plays) and plays[j] < following:
+            latencies.append(plays[j] - pressed)
+    return np.asarray(latencies) * 1e3, len(presses), audio.output_latency * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--buffers', type=int, nargs='+', default=[128, 256, 512, 1024],
+                        help='mixer buffer sizes in samples')
+    parser.add_argument('--seconds', type=float, default=10.0, help='real-time play per buffer size')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'buffer':>7} {'presses':>8} {'sounded':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'+output':>8}")
+    for buffer in args.buffers:
+        result = measure(buffer, args.seconds, args.seed)
+        if result is None:
+            print(f'{buffer:>7} audio failed to initialise')
+            continue
+        latencies, presses, output = result
+        p50, p90, p99 = np.percentile(latencies, (50, 90, 99))
+        print(f'{buffer:>7} {presses:>8} {len(latencies):>8} {p50:>6.2f}ms {p90:>6.2f}ms '
+              f'{p99:>6.2f}ms {latencies.max():>6.2f}ms {output:>6.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Frame capture cost on the game thread: writing each frame inline against FrameCapture's slot ring.
+
+Run from the repository root:
+    python benchmarks/capture_cost.py [--frames 1200] [--slots 2,8,32] [--out DIR]
+
+A bot plays a headless game with every frame drawn and captured to a raw
+rgb24 stream in DIR (a temporary directory by default). 'inline' converts
+and writes each frame in the loop, as a capture without a writer thread
+would; the ring modes only copy the frame into a free slot, and wait only
+when the writer falls that many frames behind. The table shows the time
+each frame spends capturing, how often the game had to wait and the
+frames per second the whole loop managed.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pygame
+import flappy_bird as fb
+from capture import FrameCapture
+
+
+def play(game, frames, capture):
+    """Bot frames of update, draw and capture; returns capture times (ms) and the loop's wall time"""
+    timings = []
+    game.reset(0)
+    start = time.perf_counter()
+    for _ in range(frames):
+        if game.game_over:
+            game.reset(game.seed + 1)
+        target = fb.SCREEN_HEIGHT // 2
+        for pipe in game.pipes:
+            if pipe.x + pipe.width >= game.bird.x:
+                target = pipe.gap_y + 140
+                break
+        if not game.game_started or game.bird.y + game.bird.height > target:
+            game.flap()
+        game.update()
+        game.roll_ahead()
+        game.draw()
+        before = time.perf_counter()
+        capture()
+        timings.append(time.perf_counter() - before)
+    return np.asarray(timings) * 1000, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=1200, help='frames captured per mode')
+    parser.add_argument('--slots', default='2,8,32', help='comma-separated ring sizes')
+    parser.add_argument('--out', default=None, metavar='DIR', help='directory for the streams (default: temporary)')
+    args = parser.parse_args()
+
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        game = fb.Game(headless=True, seed=0, leaderboard_path=None)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    with tempfile.TemporaryDirectory() as temp:
+        directory = args.out or temp
+        path = os.path.join(directory, 'capture.rgb')
+        print(f"{'mode':<8} {'capture mean':>13} {'p99':>8} {'waits':>6} {'loop FPS':>9}")
+        with open(path, 'wb') as f:
+            timings, elapsed = play(game, args.frames,
+                                    lambda: f.write(pygame.image.tobytes(game.screen, 'RGB')))
+        print(f"{'inline':<8} {timings.mean():>11.3f}ms {np.percentile(timings, 99):>6.2f}ms "
+              f"{'-':>6} {args.frames / elapsed:>9.0f}")
+        for slots in [int(n) for n in args.slots.split(',')]:
+            capture = FrameCapture(path, game.screen, slots=slots)
+            timings, elapsed = play(game, args.frames, capture.capture)
+            # Writing out the frames still queued counts towards the loop
+            start = time.perf_counter()
+            capture.close()
+            elapsed += time.perf_counter() - start
+            print(f"{f'ring {slots}':<8} {timings.mean():>11.3f}ms {np.percentile(timings, 99):>6.2f}ms "
+                  f"{capture.waits:>6} {args.frames / elapsed:>9.0f}")
+        os.remove(path)
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
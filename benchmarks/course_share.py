@@ -0,0 +1,79 @@
+"""Time course generation and sharing one course across worker processes.
+
+Run from the repository root:
+    python benchmarks/course_share.py [--pipes N] [--workers W] [--difficulty ramp]
+
+Rolls a course in chunks, then has a process pool attach to it in shared
+memory and compares that with every worker rolling its own copy. Also checks
+that the workers see exactly the pipes the parent rolled.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flappy_core as core
+
+
+def read_shared(args):
+    """Attach to a shared course and return its checksum and the seconds taken"""
+    name, difficulty, pipes = args
+    start = time.perf_counter()
+    course = core.Course.attach(name, difficulty)
+    total = sum(course.data)
+    elapsed = time.perf_counter() - start
+    course.close()
+    return total, elapsed
+
+
+def read_private(args):
+    """Roll a private copy of the course and return its checksum and the seconds taken"""
+    seed, difficulty, pipes = args
+    start = time.perf_counter()
+    course = core.Course(seed, difficulty=difficulty, length=pipes)
+    total = sum(course.data)
+    return total, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pipes', type=int, default=100000, help='pipes in the course')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--tasks', type=int, default=32, help='course reads spread over the workers')
+    parser.add_argument('--difficulty', choices=core.DIFFICULTIES, default='flat')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    course = core.Course(args.seed, difficulty=args.difficulty, length=0)
+    for _ in range(-(-args.pipes // core.COURSE_CHUNK)):
+        course.extend()
+    elapsed = time.perf_counter() - start
+    chunks = course.length // core.COURSE_CHUNK
+    print(f'rolled {course.length} pipes in {elapsed * 1e3:.1f}ms '
+          f'({elapsed / chunks * 1e6:.0f}us per {core.COURSE_CHUNK}-pipe chunk, '
+          f'{len(course.data) * course.data.itemsize / 1024:.0f} KiB)')
+    expected = sum(course.data)
+
+    shm = course.share()
+    try:
+        with multiprocessing.Pool(args.workers) as pool:
+            for name, work, task in (('shared', read_shared, (shm.name, args.difficulty, course.length)),
+                                     ('private', read_private, (args.seed, args.difficulty, course.length))):
+                start = time.perf_counter()
+                results = pool.map(work, [task] * args.tasks)
+                elapsed = time.perf_counter() - start
+                matching = sum(total == expected for total, _ in results)
+                per_read = sum(seconds for _, seconds in results) / len(results)
+                print(f'{name:<8} {args.tasks} reads in {elapsed * 1e3:.1f}ms '
+                      f'({per_read * 1e3:.2f}ms each), {matching}/{args.tasks} match the parent')
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+if __name__ == '__main__':
+    main()
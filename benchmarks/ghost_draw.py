@@ -0,0 +1,132 @@
+"""Draw hundreds of ghost birds: one Bird.draw per ghost against the batched GhostLayer.
+
+Run from the repository root:
+    python benchmarks/ghost_draw.py [--ghosts 100,250,500] [--frames N]
+
+Ghosts are recorded runs of a noisy bot on different seeds. Each mode draws
+them for the same frames over the background, and only the ghost drawing
+is timed. 'birds' gives every ghost its own Bird with a translucent copy of
+each atlas sprite, the way single birds draw today; 'rotozoom' also rotates
+per ghost per frame, as Bird.draw did before the rotation atlas.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pygame
+import flappy_bird as fb
+import flappy_core as core
+from replay import Replay
+
+MAX_FRAMES = 3600  # longest recorded bot run
+
+
+def record(seed, base_y):
+    """A replay of a bot that aims for the gap with some jitter"""
+    sim = core.Simulation(base_y, seed)
+    rng = random.Random(seed)
+    sim.flap()
+    while not sim.game_over and sim.frame_count < MAX_FRAMES:
+        ahead = [p for p in sim.pipes if p.x + p.width >= sim.bird.x]
+        target = (ahead[0].gap_y + 130 if ahead else fb.SCREEN_HEIGHT // 2) + rng.randint(-40, 40)
+        if sim.bird.y > target and sim.bird.velocity >= 0:
+            sim.flap()
+        sim.update()
+    return Replay.from_simulation(sim)
+
+
+def draw_birds(birds, trajectories, alpha_tables, screen, frame, rotozoom):
+    for bird, (ys, velocities, _) in zip(birds, trajectories):
+        if frame >= len(ys):
+            continue
+        bird.y = bird.prev_y = ys[frame]
+        bird.velocity = velocities[frame]
+        if frame % fb.BIRD_ANIM_STEPS == 0:
+            bird.animate()
+        image = bird.frames[bird.frame_index]
+        if rotozoom:
+            rotated = pygame.transform.rotozoom(image, bird.angle(), 1)
+            rotated.set_alpha(fb.GHOST_ALPHA)
+            screen.blit(rotated, rotated.get_rect(center=bird.center(bird.y)))
+        else:
+            rotated, offset_x, offset_y = alpha_tables[image][fb.bird_rotation_atlas.index(bird.angle())]
+            center_x, center_y = bird.center(bird.y)
+            screen.blit(rotated, (center_x - offset_x, center_y - offset_y))
+
+
+def run(screen, background, draw, frames):
+    timings = []
+    for frame in range(frames):
+        screen.blit(background, (0, 0))
+        start = time.perf_counter()
+        draw(frame)
+        timings.append(time.perf_counter() - start)
+    timings = np.asarray(timings) * 1000
+    return timings.mean(), np.percentile(timings, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ghosts', default='100,250,500', help='comma-separated ghost counts')
+    parser.add_argument('--frames', type=int, default=600, help='frames drawn per mode and count')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    counts = [int(n) for n in args.ghosts.split(',')]
+
+    screen = pygame.display.set_mode((fb.SCREEN_WIDTH, fb.SCREEN_HEIGHT))
+    images = fb.load_assets(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets'))
+    if not images:
+        sys.exit('assets are missing, run the game once to download them')
+    background = pygame.transform.scale(images['background'], (fb.SCREEN_WIDTH, fb.SCREEN_HEIGHT))
+    base_y = fb.SCREEN_HEIGHT - images['base'].get_height()
+    fb.bird_rotation_atlas.prebuild(images['bird_frames'])
+
+    start = time.perf_counter()
+    replays = [record(args.seed + i, base_y) for i in range(max(counts))]
+    trajectories = [(*replay.trajectory(), random.Random(replay.seed).choice(fb.BIRD_COLORS))
+                    for replay in replays]
+    lengths = [replay.frames for replay in replays]
+    print(f'recorded {len(replays)} runs in {time.perf_counter() - start:.1f}s, '
+          f'median {int(np.median(lengths))} frames')
+
+    alpha_tables = {}
+    for frames in images['bird_frames'].values():
+        for image in frames:
+            table = []
+            for rotated, offset_x, offset_y in fb.bird_rotation_atlas.tables[image]:
+                ghost = rotated.copy()
+                ghost.set_alpha(fb.GHOST_ALPHA)
+                table.append((ghost, offset_x, offset_y))
+            alpha_tables[image] = table
+
+    budget = 1000 / fb.FPS
+    print(f"{'ghosts':>6} {'mode':<9} {'draw mean':>10} {'draw p99':>9} {'drawn':>6} {'60 FPS budget':>14}")
+    for count in counts:
+        subset = trajectories[:count]
+        birds = [fb.Bird(images['bird_frames'][color]) for _, _, color in subset]
+        layer = fb.GhostLayer(images['bird_frames'])
+        layer.load(subset)
+        drawn = []
+
+        def draw_layer(frame):
+            layer.draw(screen, frame)
+            drawn.append(layer.drawn)
+        modes = [('rotozoom', lambda frame: draw_birds(birds, subset, alpha_tables, screen, frame, True)),
+                 ('birds', lambda frame: draw_birds(birds, subset, alpha_tables, screen, frame, False)),
+                 ('layer', draw_layer)]
+        for name, draw in modes:
+            mean, p99 = run(screen, background, draw, args.frames)
+            blits = f'{np.mean(drawn):.0f}' if name == 'layer' else '-'
+            print(f'{count:>6} {name:<9} {mean:>8.2f}ms {p99:>7.2f}ms {blits:>6} {100 * mean / budget:>13.0f}%')
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
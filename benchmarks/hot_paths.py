@@ -0,0 +1,256 @@
+"""Per-phase frame timings for scripted, seeded game sessions.
+
+Each scenario drives a real Game under SDL's dummy drivers at an uncapped
+frame rate and times Game.update, Game.draw and the drawing phases inside
+it. Run from the repository root:
+    python benchmarks/hot_paths.py [--frames N] [--json out.json] [--baseline base.json]
+
+With --baseline the script exits non-zero when a phase's median is more than
+--tolerance slower than in the baseline file, so it can guard against
+regressions in CI. Write a baseline with --json first.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import flappy_bird as fb
+
+# Timed phase -> the methods whose time it collects
+PHASES = {
+    'update': [(fb.Game, 'update')],
+    'draw': [(fb.Game, 'draw')],
+    'pipes': [(fb.Pipe, 'draw')],
+    'bird': [(fb.Bird, 'draw')],
+    'particles': [(fb.ParticleSystem, 'draw')],
+    'hud': [(fb.Hud, name) for name in ('draw_score', 'draw_controls_hint', 'draw_pause',
+                                        'draw_start', 'draw_game_over')],
+    'present': [(fb.Renderer, 'present')],
+}
+PERCENTILES = (50, 90, 99)
+MIN_REGRESSION_US = 10  # smaller slowdowns are timer noise
+
+
+class PhaseTimer:
+    """Wrap the PHASES methods so each frame records the time spent in them"""
+
+    def __init__(self):
+        self.frame = dict.fromkeys(PHASES, 0.0)
+        self.samples = {name: [] for name in PHASES}
+        self.originals = []
+
+    def install(self):
+        for name, methods in PHASES.items():
+            for cls, attr in methods:
+                original = getattr(cls, attr)
+                self.originals.append((cls, attr, original))
+                setattr(cls, attr, self.timed(name, original))
+
+    def uninstall(self):
+        for cls, attr, original in reversed(self.originals):
+            setattr(cls, attr, original)
+        self.originals.clear()
+
+    def timed(self, name, method):
+        frame = self.frame
+        perf_counter = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                frame[name] += perf_counter() - start
+        return wrapper
+
+    def end_frame(self):
+        for name, elapsed in self.frame.items():
+            self.samples[name].append(elapsed)
+            self.frame[name] = 0.0
+
+    def clear(self):
+        for samples in self.samples.values():
+            samples.clear()
+
+
+def autopilot(game):
+    """Flap near the bottom of the next gap, as in the batch simulator example"""
+    ahead = [p for p in game.pipes if p.x + p.width >= game.bird.x]
+    target = ahead[0].gap_y + 150 if ahead else fb.SCREEN_HEIGHT // 2
+    if game.bird.y + game.bird.height > target:
+        game.flap()
+
+
+# Scenarios: setup(game, rng) once, then step(game, rng, frame) before every update
+def idle_setup(game, rng):
+    pass
+
+
+def idle_step(game, rng, frame):
+    pass
+
+
+def playing_setup(game, rng):
+    game.flap()
+
+
+def playing_step(game, rng, frame):
+    if game.game_over:
+        game.reset(rng.getrandbits(63))
+        game.flap()
+    autopilot(game)
+
+
+def dense_setup(game, rng):
+    game.flap()
+    game.dense_gap = rng.randint(fb.core.GAP_MIN, int(game.base_y) - fb.core.GAP_MARGIN)
+
+
+def dense_step(game, rng, frame):
+    # A pipe every 30 frames, all with the same gap so the autopilot survives
+    if frame % 30 == 0:
+        game.pipes.append(game.make_pipe(fb.SCREEN_WIDTH, game.dense_gap))
+    for pipe in game.pipes:
+        pipe.gap_y = game.dense_gap
+    playing_step(game, rng, frame)
+
+
+def storm_step(game, rng, frame):
+    game.particles.emit(rng.randint(0, fb.SCREEN_WIDTH), rng.randint(0, fb.SCREEN_HEIGHT // 2),
+                        rng.choice([(255, 215, 0), (100, 149, 237), (220, 20, 60)]), 40)
+    playing_step(game, rng, frame)
+
+
+def game_over_setup(game, rng):
+    # Fly through a few pipes, then let the bird fall so pipes stay on screen
+    game.flap()
+    while not game.game_over:
+        if game.frame_count < 400:
+            autopilot(game)
+        game.update()
+
+
+SCENARIOS = {
+    'idle': (idle_setup, idle_step),
+    'playing': (playing_setup, playing_step),
+    'dense_pipes': (dense_setup, dense_step),
+    'particle_storm': (playing_setup, storm_step),
+    'game_over': (game_over_setup, idle_step),
+}
+
+
+def run_scenario(game, timer, name, frames, warmup, seed):
+    setup, step = SCENARIOS[name]
+    rng = random.Random(f'{seed}:{name}')
+    game.reset(rng.getrandbits(63))
+    setup(game, rng)
+    timer.clear()
+    start = time.perf_counter()
+    for frame in range(warmup + frames):
+        step(game, rng, frame)
+        game.update()
+        game.draw()
+        timer.end_frame()
+        if frame + 1 == warmup:
+            timer.clear()
+            start = time.perf_counter()
+    elapsed = time.perf_counter() - start
+    stats = {phase: summarize(samples) for phase, samples in timer.samples.items()}
+    return stats, frames / elapsed
+
+
+def summarize(samples):
+    """Timing statistics in microseconds"""
+    us = np.asarray(samples) * 1e6
+    stats = {'mean': float(us.mean()), 'max': float(us.max())}
+    for q, value in zip(PERCENTILES, np.percentile(us, PERCENTILES)):
+        stats[f'p{q}'] = float(value)
+    return stats
+
+
+def compare(results, baseline, tolerance):
+    """List the phases whose median regressed against the baseline"""
+    regressions = []
+    for scenario, phases in results.items():
+        for phase, stats in phases.items():
+            base = baseline.get(scenario, {}).get(phase)
+            if base is None:
+                continue
+            now, before = stats['p50'], base['p50']
+            if now > before * (1 + tolerance) and now - before > MIN_REGRESSION_US:
+                regressions.append(f'{scenario}/{phase}: p50 {before:.1f}us -> {now:.1f}us')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=1200, help='timed frames per scenario')
+    parser.add_argument('--warmup', type=int, default=120, help='untimed frames before each scenario')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help='run only this scenario (repeatable)')
+    parser.add_argument('--dirty-rects', action='store_true', help='benchmark dirty-rect rendering')
+    parser.add_argument('--json', metavar='PATH', help='write the results as JSON')
+    parser.add_argument('--baseline', metavar='PATH', help='compare medians against a --json file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed median slowdown against the baseline (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        # Keep benchmark runs off the leaderboard
+        game = fb.Game(dirty_rects=args.dirty_rects, seed=args.seed, leaderboard_path=None)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    timer = PhaseTimer()
+    timer.install()
+    results = {}
+    fps = {}
+    try:
+        for name in args.scenario or SCENARIOS:
+            results[name], fps[name] = run_scenario(game, timer, name, args.frames, args.warmup, args.seed)
+    finally:
+        timer.uninstall()
+        pygame.quit()
+
+    for name, phases in results.items():
+        print(f'{name} ({fps[name]:.0f} fps uncapped)')
+        print(f"  {'phase':<10} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}")
+        for phase, s in phases.items():
+            print(f"  {phase:<10} {s['mean']:>7.1f}us {s['p50']:>7.1f}us {s['p90']:>7.1f}us "
+                  f"{s['p99']:>7.1f}us {s['max']:>7.1f}us")
+
+    if args.json:
+        report = {
+            'meta': {'frames': args.frames, 'warmup': args.warmup, 'seed': args.seed,
+                     'dirty_rects': args.dirty_rects, 'python': platform.python_version(),
+                     'pygame': pygame.version.ver, 'fps': fps},
+            'results': results,
+        }
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            sys.exit('regressions against baseline:\n  ' + '\n  '.join(regressions))
+        print(f'no regressions against {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Press-to-flip latency of flaps under each input mode.
+
+Run from the repository root:
+    python benchmarks/input_latency.py [--seconds 10] [--load-ms 6]
+
+A thread posts SPACE presses at random moments while Game.run plays in real
+time. Each press is matched with the flip that first showed its flap, using
+the game's own input latency log. --load-ms adds that much busy work to
+every draw, as a slower machine would, to show how first-step input and late
+polling behave when frames are expensive. Vsync needs a real display; SDL's
+dummy driver accepts it but never waits, so those modes run at VSYNC_MAX_FPS.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import flappy_bird as fb
+
+MODES = {
+    'default': {},
+    'late_input': {'late_input': True},
+    'vsync': {'vsync': True},
+    'vsync+late_input': {'vsync': True, 'late_input': True},
+}
+
+
+def press_keys(presses, stop, rng):
+    """Post SPACE presses 100-300 ms apart"""
+    while not stop.wait(rng.uniform(0.1, 0.3)):
+        presses.append(time.perf_counter())
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def measure(options, seconds, load, seed):
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        game = fb.Game(seed=seed, leaderboard_path=None, latency_path=os.devnull, **options)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    if load:
+        draw = game.draw
+        game.draw = lambda alpha=1.0: (busy(load), draw(alpha))
+
+    presses = []
+    stop = threading.Event()
+    thread = threading.Thread(target=press_keys, args=(presses, stop, random.Random(seed)))
+    thread.start()
+    try:
+        sys.stdout = open(os.devnull, 'w')
+        game.run(max_steps=int(seconds * fb.SIM_RATE))
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+        stop.set()
+        thread.join()
+
+    # A row's stamp is when its press was polled, at or after it was posted;
+    # presses that restart a finished game have no row
+    rows = game.latency_log.rows
+    to_step = []
+    to_flip = []
+    j = 0
+    for i, pressed in enumerate(presses):
+        following = presses[i + 1] if i + 1 < len(presses) else float('inf')
+        while j < len(rows) and rows[j][0] < pressed:
+            j += 1
+        if j < len(rows) and rows[j][0] < following:
+            stamp, step, flip = rows[j]
+            to_step.append(stamp - pressed + step)
+            to_flip.append(stamp - pressed + flip)
+    return np.asarray(to_step) * 1e3, np.asarray(to_flip) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10.0, help='real-time play per mode')
+    parser.add_argument('--load-ms', type=float, default=0.0, help='extra busy work per draw')
+    parser.add_argument('--mode', action='append', choices=MODES, help='run only this mode (repeatable)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'mode':<18} {'flaps':>6} {'to step p50':>12} {'to flip p50':>12} {'p90':>8} {'p99':>8} {'max':>8}")
+    for name in args.mode or MODES:
+        to_step, to_flip = measure(MODES[name], args.seconds, args.load_ms / 1e3, args.seed)
+        if not len(to_flip):
+            print(f'{name:<18} no flaps recorded')
+            continue
+        p50, p90, p99 = np.percentile(to_flip, (50, 90, 99))
+        print(f'{name:<18} {len(to_flip):>6} {np.median(to_step):>10.2f}ms {p50:>10.2f}ms '
+              f'{p90:>6.2f}ms {p99:>6.2f}ms {to_flip.max():>6.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Many processes recording scores at once, with the leaderboard and with highscore.txt.
+
+Run from the repository root:
+    python benchmarks/leaderboard_stress.py [--processes 8] [--scores 500]
+
+Each process submits its scores as fast as it can, as that many game
+instances finishing runs would. Afterwards every score must be in the
+database and each player's best must match. For comparison, the same
+processes then rewrite one shared highscore file the way Game used to, which
+loses updates when they race.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leaderboard import Leaderboard
+
+
+def scores_for(worker, count, seed):
+    rng = random.Random(f'{seed}:{worker}')
+    return [rng.randint(0, 10000) for _ in range(count)]
+
+
+def submit_scores(args):
+    """Submit one process's scores; returns the seconds submit() blocked in total and the run time"""
+    path, worker, count, seed = args
+    leaderboard = Leaderboard(path)
+    blocked = 0.0
+    start = time.perf_counter()
+    for i, score in enumerate(scores_for(worker, count, seed)):
+        before = time.perf_counter()
+        leaderboard.submit(f'player{worker % 4}', i % 16, score, frames=score * 90)
+        blocked += time.perf_counter() - before
+    leaderboard.close()
+    return blocked, time.perf_counter() - start
+
+
+def rewrite_file(args):
+    """The old highscore.txt update: read the best, write it back if beaten"""
+    path, worker, count, seed = args
+    for score in scores_for(worker, count, seed):
+        try:
+            with open(path) as f:
+                best = int(f.read())
+        except (OSError, ValueError):
+            best = 0
+        if score > best:
+            with open(path, 'w') as f:
+                f.write(str(score))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--scores', type=int, default=500, help='scores submitted per process')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'leaderboard.db')
+        tasks = [(path, worker, args.scores, args.seed) for worker in range(args.processes)]
+        # Create the schema once so the workers only ever insert
+        Leaderboard(path).close()
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(args.processes) as pool:
+            timings = pool.map(submit_scores, tasks)
+        elapsed = time.perf_counter() - start
+
+        expected = {}
+        for worker in range(args.processes):
+            player = f'player{worker % 4}'
+            expected[player] = max(expected.get(player, 0), *scores_for(worker, args.scores, args.seed))
+        leaderboard = Leaderboard(path)
+        rows = leaderboard.connection.execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+        bests_ok = all(leaderboard.best(player) == best for player, best in expected.items())
+        total = args.processes * args.scores
+        blocked = max(b for b, _ in timings) / args.scores * 1e6
+        print(f'leaderboard: {rows}/{total} scores stored, player bests '
+              f'{"match" if bests_ok else "DO NOT match"}, {total / elapsed:,.0f} scores/s, '
+              f'submit() takes {blocked:.1f}us per call in the slowest process')
+        top = leaderboard.top('player0', 0, 3)
+        print(f'  player0 seed 0 top 3: {[row[2] for row in top]}')
+        start = time.perf_counter()
+        removed = leaderboard.compact()
+        print(f'  compacted to the top scores per player and seed: removed {removed} rows '
+              f'in {(time.perf_counter() - start) * 1e3:.1f}ms')
+        leaderboard.close()
+
+        path = os.path.join(tmp, 'highscore.txt')
+        tasks = [(path, worker, args.scores, args.seed) for worker in range(args.processes)]
+        with multiprocessing.Pool(args.processes) as pool:
+            pool.map(rewrite_file, tasks)
+        best = max(expected.values())
+        try:
+            with open(path) as f:
+                saved = f.read()
+        except OSError:
+            saved = ''
+        print(f'highscore.txt: best score {best}, file holds {saved!r}')
+        if rows != total or not bests_ok:
+            sys.exit('lost updates in the leaderboard')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Branch the game cheaply: snapshot, step and restore cycles, and a search bot built on them.
+
+Run from the repository root:
+    python benchmarks/lookahead.py [--cycles N] [--games 5] [--depth 4]
+
+Part one times the ways to branch a game mid-run: deepcopy of a Simulation
+(Game can't be deepcopied at all, with its surfaces and sounds),
+Simulation.snapshot/restore, and copying a snapshot buffer to step with a
+Stepper, or loading it into a BatchSimulator to play thousands of plans in
+lock-step. Scalar branching stays in the hundreds of thousands of
+cycles per second, since every step is interpreted Python; only the
+batched row reaches millions. Part two plays games with a bot that, every few frames, searches
+every flap/no-flap plan a few decisions deep on buffer copies and takes the
+first move of the plan that survives best.
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flappy_core as core
+
+HOLD = 6  # frames between the search bot's decisions
+
+
+def per_second(label, call, count):
+    """Time count calls and print the cost of one; returns it in microseconds"""
+    start = time.perf_counter()
+    for _ in range(count):
+        call()
+    elapsed = time.perf_counter() - start
+    print(f'{label:<38} {elapsed / count * 1e6:>8.2f}us {count / elapsed:>12,.0f}/s')
+    return elapsed / count * 1e6
+
+
+def mid_game(seed, frames=600):
+    """A Simulation a gap-following bot has played for a while"""
+    sim = core.Simulation(seed=seed)
+    sim.flap()
+    while sim.frame_count < frames and not sim.game_over:
+        target = core.SCREEN_HEIGHT // 2
+        for pipe in sim.pipes:
+            if pipe.x + pipe.width >= sim.bird.x:
+                target = pipe.gap_y + pipe.gap - 50
+                break
+        if sim.bird.y + sim.bird.height > target:
+            sim.flap()
+        sim.update()
+    if sim.game_over:
+        raise RuntimeError(f'the bot died on seed {seed}; pick another')
+    return sim
+
+
+def value(stepper, state, depth, counter):
+    """Frames survived by the best plan of depth decisions, then closeness to the next gap"""
+    best = None
+    for flap in (False, True):
+        trial = array('d', state)
+        over = False
+        for frame in range(HOLD):
+            counter[0] += 1
+            if stepper.step(trial, flap and frame == 0):
+                over = True
+                break
+        if over:
+            score = (trial[core.STATE_FRAME] - state[core.STATE_FRAME], 0.0)
+        elif depth > 1:
+            survived, closeness = value(stepper, trial, depth - 1, counter)
+            score = (HOLD + survived, closeness)
+        else:
+            score = (HOLD, -abs(trial[core.STATE_BIRD_Y] - gap_target(trial)))
+        if best is None or score > best:
+            best = score
+    return best
+
+
+def gap_target(state):
+    for i in range(core.STATE_HEADER, core.STATE_HEADER + int(state[core.STATE_PIPE_COUNT]) * core.PIPE_FIELDS,
+                   core.PIPE_FIELDS):
+        if state[i] + core.PIPE_WIDTH >= core.BIRD_X:
+            return state[i + 1] + state[i + 2] / 2 - core.BIRD_HEIGHT / 2
+    return core.SCREEN_HEIGHT / 2
+
+
+def search_move(sim, stepper, depth, counter):
+    """True to flap now: compare the best plan that starts with a flap against one that doesn't"""
+    state = sim.snapshot()
+    choices = []
+    for flap in (False, True):
+        trial = array('d', state)
+        for frame in range(HOLD):
+            counter[0] += 1
+            if stepper.step(trial, flap and frame == 0):
+                break
+        survived, closeness = value(stepper, trial, depth - 1, counter) if not trial[core.STATE_GAME_OVER] \
+            else (0, 0.0)
+        choices.append((trial[core.STATE_FRAME] - state[core.STATE_FRAME] + survived, closeness, not flap))
+    return not max(choices)[2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cycles', type=int, default=200000, help='repetitions per timing')
+    parser.add_argument('--games', type=int, default=5, help='games played by the search bot')
+    parser.add_argument('--depth', type=int, default=4, help='decisions the search bot looks ahead')
+    parser.add_argument('--branches', type=int, default=4096, help='plans stepped together by BatchSimulator')
+    parser.add_argument('--horizon', type=int, default=60, help='frames each batched plan runs')
+    parser.add_argument('--max-frames', type=int, default=10000, help='frames each search game is capped at')
+    args = parser.parse_args()
+
+    sim = mid_game(1)
+    stepper = sim.stepper()
+    state = sim.snapshot()
+    buffer = array('d', state)
+    trial = array('d', state)
+    print(f'state buffer: {core.STATE_SIZE} doubles, {len(state) * state.itemsize} bytes')
+    per_second('deepcopy(Simulation)', lambda: copy.deepcopy(sim), args.cycles // 20)
+    snapshot_us = per_second('Simulation.snapshot() into a buffer', lambda: sim.snapshot(buffer), args.cycles)
+    restore_us = per_second('Simulation.restore()', lambda: sim.restore(state), args.cycles)
+    per_second('buffer copy', lambda: array('d', state), args.cycles)
+    per_second('buffer copy in place', lambda: trial.__setitem__(slice(None), state), args.cycles)
+
+    def step():
+        if stepper.step(trial):
+            trial[:] = state
+    trial[:] = state
+    step_us = per_second('Stepper.step()', step, args.cycles)
+
+    def cycle():
+        trial[:] = state
+        stepper.step(trial, True)
+    per_second('copy + step + discard (one branch)', cycle, args.cycles)
+
+    def simulation_cycle():
+        saved = sim.snapshot(buffer)
+        sim.flap()
+        sim.update()
+        sim.restore(saved)
+    per_second('snapshot + Simulation.update + restore', simulation_cycle, args.cycles // 4)
+
+    # Many branches from one root in lock-step: each bird plays its own random plan
+    import numpy as np
+    from batch_sim import BatchSimulator
+    batch = BatchSimulator(args.branches, base_y=sim.base_y)
+    gaps = sim.course.gaps(core.COURSE_CHUNK)
+    plans = np.random.default_rng(0).random((args.horizon, args.branches)) < 0.08
+    start = time.perf_counter()
+    batch.load_state(state, gaps)
+    for flaps in plans:
+        batch.step(flaps)
+    elapsed = time.perf_counter() - start
+    steps = args.branches * args.horizon
+    print(f'{f"{args.branches} branches x {args.horizon} frames (batched)":<38} '
+          f'{elapsed / steps * 1e6:>8.3f}us {steps / elapsed:>12,.0f}/s')
+    print(f'scalar branching tops out near {1e6 / (snapshot_us + step_us + restore_us):,.0f} '
+          f'snapshot+step+restore cycles/s; batched steps run {steps / elapsed / 1e6:.1f}M/s')
+
+    print(f'\nsearch bot, {args.depth} decisions of {HOLD} frames ahead:')
+    for seed in range(args.games):
+        game = core.Simulation(seed=seed)
+        stepper = game.stepper()
+        counter = [0]
+        game.flap()
+        start = time.perf_counter()
+        while not game.game_over and game.frame_count < args.max_frames:
+            if game.frame_count % HOLD == 0 and search_move(game, stepper, args.depth, counter):
+                game.flap()
+            game.update()
+            game.roll_ahead()
+        elapsed = time.perf_counter() - start
+        result = 'capped' if not game.game_over else 'died'
+        print(f'seed {seed}: score {game.score:>4} after {game.frame_count:>6} frames ({result}), '
+              f'{counter[0]:,} search steps, {counter[0] / elapsed:,.0f} steps/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Compare Pipe.draw with the column cache against the old per-frame flip and crop.
+
+Run from the repository root:
+    python benchmarks/pipe_draw.py [--frames N]
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import flappy_bird as fb
+
+
+def draw_uncached(pipe, screen):
+    """Pipe.draw as it was before the column cache: flip and crop every frame"""
+    image = pipe.image
+    top_pipe = pygame.transform.flip(image, False, True)
+    pipe_height = pipe.gap_y
+    for y in range(0, pipe_height, image.get_height()):
+        if y + image.get_height() > pipe_height:
+            crop_height = pipe_height - y
+            cropped = pygame.Surface((image.get_width(), crop_height), pygame.SRCALPHA)
+            cropped.blit(top_pipe, (0, 0), (0, image.get_height() - crop_height, image.get_width(), crop_height))
+            screen.blit(cropped, (pipe.x, y))
+        else:
+            screen.blit(top_pipe, (pipe.x, y))
+    bottom_pipe_y = pipe.gap_y + fb.PIPE_GAP
+    for y in range(bottom_pipe_y, int(pipe.base_y), image.get_height()):
+        if y + image.get_height() > pipe.base_y:
+            crop_height = int(pipe.base_y - y)
+            if crop_height > 0:
+                cropped = pygame.Surface((image.get_width(), crop_height), pygame.SRCALPHA)
+                cropped.blit(image, (0, 0), (0, 0, image.get_width(), crop_height))
+                screen.blit(cropped, (pipe.x, y))
+        else:
+            screen.blit(image, (pipe.x, y))
+
+
+def make_pipes(image, base_y, count):
+    pipes = []
+    for i in range(count):
+        pipe = fb.Pipe(fb.SCREEN_WIDTH + i * (fb.SCREEN_WIDTH // count), image, base_y)
+        pipes.append(pipe)
+    return pipes
+
+
+def run(screen, background, pipes, draw, frames, fps):
+    """Scroll the pipes for a number of frames and time only the pipe drawing"""
+    clock = pygame.time.Clock()
+    timings = []
+    start = time.perf_counter()
+    for _ in range(frames):
+        screen.blit(background, (0, 0))
+        t0 = time.perf_counter()
+        for pipe in pipes:
+            draw(pipe, screen)
+        timings.append(time.perf_counter() - t0)
+        for pipe in pipes:
+            pipe.update()
+            if pipe.is_off_screen():
+                pipe.x += fb.SCREEN_WIDTH + pipe.width
+        if fps:
+            clock.tick(fps)
+    elapsed = time.perf_counter() - start
+    timings.sort()
+    return {
+        'mean_ms': 1000 * sum(timings) / len(timings),
+        'p99_ms': 1000 * timings[int(len(timings) * 0.99) - 1],
+        'fps': frames / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=3000, help='frames per uncapped run')
+    parser.add_argument('--capped-frames', type=int, default=300, help='frames per 60 FPS run')
+    parser.add_argument('--pipes', type=int, default=3, help='pipes on screen')
+    args = parser.parse_args()
+
+    screen = pygame.display.set_mode((fb.SCREEN_WIDTH, fb.SCREEN_HEIGHT))
+    images = fb.load_assets(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets'))
+    if not images:
+        sys.exit('assets are missing, run the game once to download them')
+    background = pygame.transform.scale(images['background'], (fb.SCREEN_WIDTH, fb.SCREEN_HEIGHT))
+    base_y = fb.SCREEN_HEIGHT - images['base'].get_height()
+
+    modes = [('uncached', draw_uncached), ('cached', fb.Pipe.draw)]
+    print(f"{'mode':<10} {'fps cap':>8} {'draw mean':>10} {'draw p99':>10} {'loop fps':>9}")
+    for label, fps, frames in [('60', fb.FPS, args.capped_frames), ('uncapped', 0, args.frames)]:
+        results = {}
+        for name, draw in modes:
+            fb.pipe_column_cache.clear()
+            pipes = make_pipes(images['pipe'], base_y, args.pipes)
+            results[name] = run(screen, background, pipes, draw, frames, fps)
+            r = results[name]
+            print(f"{name:<10} {label:>8} {r['mean_ms']:>8.3f}ms {r['p99_ms']:>8.3f}ms {r['fps']:>9.0f}")
+        speedup = results['uncached']['mean_ms'] / results['cached']['mean_ms']
+        print(f"{'':<10} {label:>8} pipe draw time reduced {speedup:.1f}x")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""Load test: hundreds of local spectators watching one live game.
+
+Run from the repository root:
+    python benchmarks/spectator_load.py [--spectators 200] [--slow 10] [--seconds 10]
+
+A bot plays a real-time Game.run with --spectate on a Unix socket (or
+--address HOST:PORT). A second process opens the spectator connections with
+asyncio and rebuilds the game from the stream. Some spectators are slow: they
+stop reading for the first half of the run. Every 30th frame each fast
+spectator's copy is checked against the state the game published. The
+report shows the cost of publishing inside the frame loop, and how many
+frames the slow spectators were skipped past.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flappy_bird as fb
+import spectator
+
+CHECK_EVERY = 30  # frames between state checks
+FLOAT32 = struct.Struct('<f')
+
+
+def digest(frame, score, flags, bird_y, pipes):
+    # The stream carries the bird's y as a float32
+    return frame, score, flags, FLOAT32.unpack(FLOAT32.pack(bird_y))[0], tuple(tuple(p) for p in pipes)
+
+
+class BotGame(fb.Game):
+    """Flaps near the bottom of the next gap, restarts when it dies and records what it publishes"""
+
+    def __init__(self, *args, **kwargs):
+        self.published = {}
+        super().__init__(*args, **kwargs)
+
+    def update(self):
+        if self.game_over:
+            self.reset()
+        ahead = [p for p in self.pipes if p.x + p.width >= self.bird.x]
+        target = ahead[0].gap_y + 150 if ahead else fb.SCREEN_HEIGHT // 2
+        if not self.game_started or self.bird.y + self.bird.height > target:
+            self.flap()
+        super().update()
+
+    def spectator_state(self):
+        state = super().spectator_state()
+        frame, _, y, _, _, score, flags, _, _, pipes = state
+        if frame % CHECK_EVERY == 0:
+            self.published.setdefault(frame, set()).add(digest(frame, score, flags, y, pipes))
+        return state
+
+
+class Watcher(asyncio.Protocol):
+    def __init__(self, slow):
+        self.state = spectator.SpectatorState()
+        self.slow = slow
+        self.transport = None
+        self.bytes = 0
+        self.checks = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+        if self.slow:
+            transport.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            transport.pause_reading()
+
+    def data_received(self, data):
+        self.bytes += len(data)
+        state = self.state
+        frame = state.frame
+        state.feed(data)
+        if state.frame != frame and state.frame % CHECK_EVERY == 0:
+            self.checks[state.frame] = digest(state.frame, state.score, state.flags, state.bird_y, state.pipes)
+
+
+def watch(address, fast, slow, slow_for, connected, finish, results):
+    """Open the spectators, report when they are all connected, then watch until told to stop"""
+    async def run():
+        loop = asyncio.get_running_loop()
+        kind, *where = spectator.parse_address(address)
+        watchers = []
+        for i in range(fast + slow):
+            factory = lambda: Watcher(i >= fast)
+            if kind == 'unix':
+                _, watcher = await loop.create_unix_connection(factory, where[0])
+            else:
+                _, watcher = await loop.create_connection(factory, *where)
+            watchers.append(watcher)
+        connected.set()
+        for watcher in watchers[fast:]:
+            loop.call_later(slow_for, watcher.transport.resume_reading)
+        while not finish.is_set():
+            await asyncio.sleep(0.05)
+        results.put([(w.slow, w.bytes, w.state.snapshots, w.state.deltas, w.checks) for w in watchers])
+        for watcher in watchers:
+            watcher.transport.close()
+    asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--spectators', type=int, default=200, help='spectators that keep up')
+    parser.add_argument('--slow', type=int, default=10, help='spectators that stop reading')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--address', default=None, help='HOST:PORT or socket path (default: a temporary Unix socket)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        address = args.address or os.path.join(tmp, 'spectate.sock')
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            game = BotGame(seed=args.seed, leaderboard_path=None, spectate=address)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        server = game.spectators
+        if server.loop is None:
+            sys.exit(f'could not serve on {address}')
+
+        publish_times = []
+        publish = server.publish
+
+        def timed_publish(state):
+            start = time.perf_counter()
+            publish(state)
+            publish_times.append(time.perf_counter() - start)
+        server.publish = timed_publish
+
+        connected = multiprocessing.Event()
+        finish = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        watcher = multiprocessing.Process(target=watch, args=(address, args.spectators, args.slow, args.seconds / 2,
+                                                              connected, finish, results))
+        watcher.start()
+        if not connected.wait(30):
+            watcher.terminate()
+            sys.exit('spectators failed to connect')
+
+        start = time.perf_counter()
+        game.run(max_steps=int(args.seconds * fb.SIM_RATE))
+        elapsed = time.perf_counter() - start
+        # Game.run closed the server; collect what the spectators saw
+        time.sleep(0.5)
+        finish.set()
+        watched = results.get(timeout=30)
+        watcher.join()
+
+    publish_us = np.asarray(publish_times) * 1e6
+    fast = [w for w in watched if not w[0]]
+    slow = [w for w in watched if w[0]]
+    checked = matched = 0
+    for _, _, _, _, checks in fast:
+        for frame, seen in checks.items():
+            if frame in game.published:
+                checked += 1
+                matched += seen in game.published[frame]
+    deltas = sum(w[3] for w in fast)
+    print(f'{len(fast)} spectators + {len(slow)} slow over {address}, {elapsed:.1f}s, '
+          f'{len(publish_times)} frames published')
+    print(f'publish() in the frame loop: p50 {np.percentile(publish_us, 50):.1f}us, '
+          f'p99 {np.percentile(publish_us, 99):.1f}us, max {publish_us.max():.1f}us')
+    print(f'sent {server.sent} messages ({server.sent / elapsed:,.0f}/s), '
+          f'{sum(w[1] for w in fast) / max(1, deltas + sum(w[2] for w in fast)):.1f} bytes per message')
+    print(f'fast spectators: {deltas / max(1, len(fast)):.0f} deltas and '
+          f'{sum(w[2] for w in fast) / max(1, len(fast)):.1f} snapshots each, '
+          f'{matched}/{checked} sampled frames match the game')
+    if slow:
+        print(f'slow spectators: {server.dropped / len(slow):.0f} frames skipped each, then resynced '
+              f'with {sum(w[2] for w in slow) / len(slow) - 1:.1f} snapshots')
+    if matched != checked:
+        sys.exit('spectator state diverged from the game')
+
+
+if __name__ == '__main__':
+    main()
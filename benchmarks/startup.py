@@ -0,0 +1,73 @@
+"""Import-time and startup benchmark, each measurement in a fresh interpreter.
+
+Run from the repository root:
+    python benchmarks/startup.py [--runs N] [--check]
+
+With --check the script exits non-zero when a median exceeds its budget,
+so it can guard against import-time regressions in CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Snippets run after `t = time.perf_counter()`; each prints elapsed seconds
+CASES = {
+    'import flappy_core': 'import flappy_core',
+    'import batch_sim': 'import batch_sim',
+    'import flappy_bird': 'import flappy_bird',
+    'headless Game()': 'import flappy_bird; flappy_bird.Game(headless=True)',
+    'first frame (dummy video)': 'import flappy_bird; g = flappy_bird.Game(); g.update(); g.draw()',
+}
+
+# Median budgets in milliseconds
+BUDGETS_MS = {
+    'import flappy_core': 20,
+    'import batch_sim': 250,
+    'import flappy_bird': 600,
+    'headless Game()': 1000,
+    'first frame (dummy video)': 1500,
+}
+
+
+def measure(snippet):
+    code = ('import time, sys, io; t = time.perf_counter(); out = sys.stdout; sys.stdout = io.StringIO()\n'
+            f'{snippet}\n'
+            'sys.stdout = out; print(time.perf_counter() - t)')
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy',
+               PYGAME_HIDE_SUPPORT_PROMPT='1')
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+    return float(result.stdout.strip().splitlines()[-1]), wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--check', action='store_true', help='exit non-zero if a budget is exceeded')
+    args = parser.parse_args()
+
+    print(f"{'case':<27} {'median':>9} {'min':>9} {'process':>9} {'budget':>8}")
+    over = []
+    for name, snippet in CASES.items():
+        samples = [measure(snippet) for _ in range(args.runs)]
+        timings = [inner * 1000 for inner, _ in samples]
+        process = statistics.median(wall * 1000 for _, wall in samples)
+        median = statistics.median(timings)
+        budget = BUDGETS_MS[name]
+        flag = '' if median <= budget else '  OVER'
+        print(f'{name:<27} {median:>7.1f}ms {min(timings):>7.1f}ms {process:>7.1f}ms {budget:>6}ms{flag}')
+        if median > budget:
+            over.append(name)
+    if args.check and over:
+        sys.exit(f"over budget: {', '.join(over)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""Capture rendered frames to disk from a background thread, and render replays to video.
+
+After each Game.draw the back buffer is copied into one of a few
+preallocated frame slots, a single memcpy. A writer thread converts the
+slots to RGB and writes them out, then hands them back, so a frame never
+waits on the disk or the encoder unless every slot is still queued. Then
+capture() blocks until one frees up (back-pressure), and memory stays at
+CAPTURE_SLOTS frames however slow the output is.
+
+The output depends on the path:
+    *.mp4, *.mkv, *.webm, *.mov, *.gif   piped to the encoder (ffmpeg) if it is installed
+    *.rgb, *.raw                         one raw rgb24 stream
+    anything else                        a directory of numbered PNGs
+Without an encoder a video path falls back to a raw stream next to it.
+
+Render a replay headless, as fast as the CPU allows:
+    python capture.py replays/1234.fbr clip.mp4
+"""
+import argparse
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import pygame
+
+from flappy_core import FPS
+
+CAPTURE_SLOTS = 8  # preallocated frames queued between the game and the writer
+CAPTURE_ENCODER = 'ffmpeg'
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.webm', '.mov', '.gif')
+RAW_EXTENSIONS = ('.rgb', '.raw')
+LEAD_IN_FRAMES = 30  # frames on the start screen before a rendered replay starts
+HOLD_FRAMES = 90  # frames of the game-over screen after it ends
+
+
+def encoder_command(encoder, path, size, fps):
+    """ffmpeg arguments that read rgb24 frames from stdin and encode them to path"""
+    command = [encoder, '-loglevel', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+               '-s', f'{size[0]}x{size[1]}', '-r', str(fps), '-i', '-']
+    if not path.endswith('.gif'):
+        # Most players only decode 4:2:0
+        command += ['-pix_fmt', 'yuv420p']
+    return command + [path]
+
+
+class FrameCapture:
+    """A ring of frame slots filled by the game and drained by a writer thread.
+
+    The slots hold the screen's own pixel bytes, so capture() is a copy;
+    the writer reorders them to RGB with NumPy. 32-bit screens, the only
+    kind pygame gives this game, are supported. If the output can't be
+    opened the capture prints why and does nothing.
+    """
+
+    def __init__(self, path, screen, fps=FPS, slots=CAPTURE_SLOTS, encoder=CAPTURE_ENCODER):
+        self.path = path
+        self.screen = screen
+        self.size = width, height = screen.get_size()
+        self.fps = fps
+        self.frames = 0
+        self.written = 0
+        self.waits = 0
+        self.waited = 0.0
+        self.error = None
+        self.file = None
+        self.process = None
+        self.directory = None
+        self.thread = None
+        if screen.get_bytesize() != 4:
+            print(f'Error capturing: {screen.get_bitsize()}-bit screens are not supported')
+            return
+
+        # Byte offsets of red, green and blue within a pixel (little-endian)
+        self.channels = [shift // 8 for shift in screen.get_shifts()[:3]]
+        self.pitch = screen.get_pitch()
+        self.slots = [bytearray(self.pitch * height) for _ in range(slots)]
+        self.pixels = [np.frombuffer(slot, np.uint8).reshape(height, self.pitch)[:, :width * 4]
+                       .reshape(height, width, 4) for slot in self.slots]
+        self.views = [memoryview(slot) for slot in self.slots]
+        self.rgb = np.empty((height, width, 3), np.uint8)
+        self.free = queue.Queue()
+        for slot in range(slots):
+            self.free.put(slot)
+        self.ready = queue.Queue()
+
+        try:
+            self.kind = self.open(path, encoder)
+        except OSError as e:
+            print(f'Error opening capture output {path}: {e}')
+            return
+        self.thread = threading.Thread(target=self._write_loop, name='frame-writer', daemon=True)
+        self.thread.start()
+
+    def open(self, path, encoder):
+        """Start the encoder or open the stream or directory for path; returns the output kind"""
+        extension = os.path.splitext(path)[1].lower()
+        if extension in VIDEO_EXTENSIONS:
+            binary = shutil.which(encoder) if encoder else None
+            if binary:
+                self.process = subprocess.Popen(encoder_command(binary, path, self.size, self.fps),
+                                                stdin=subprocess.PIPE)
+                self.file = self.process.stdin
+                return 'video'
+            raw = os.path.splitext(path)[0] + '.rgb'
+            print(f'{encoder} not found, writing raw frames to {raw}. Encode them later with:\n'
+                  f'  {" ".join(encoder_command(encoder or CAPTURE_ENCODER, path, self.size, self.fps))} '
+                  f'< {raw}')
+            path = self.path = raw
+            extension = '.rgb'
+        if extension in RAW_EXTENSIONS:
+            self.file = open(path, 'wb')
+            return 'raw'
+        os.makedirs(path, exist_ok=True)
+        self.directory = path
+        return 'png'
+
+    def capture(self, screen=None):
+        """Queue the screen as the next frame, waiting for a free slot if all are queued"""
+        if self.thread is None:
+            return
+        try:
+            slot = self.free.get_nowait()
+        except queue.Empty:
+            start = time.perf_counter()
+            slot = self.free.get()
+            self.waits += 1
+            self.waited += time.perf_counter() - start
+        # The screen stays locked while its view exists
+        view = (screen or self.screen).get_view('0')
+        self.views[slot][:] = view
+        del view
+        self.ready.put((slot, self.frames))
+        self.frames += 1
+
+    def _write_loop(self):
+        rgb = self.rgb
+        red, green, blue = self.channels
+        while True:
+            item = self.ready.get()
+            if item is None:
+                break
+            slot, frame = item
+            if self.error is None:
+                pixels = self.pixels[slot]
+                rgb[..., 0] = pixels[..., red]
+                rgb[..., 1] = pixels[..., green]
+                rgb[..., 2] = pixels[..., blue]
+                try:
+                    if self.directory:
+                        image = pygame.image.frombuffer(rgb, self.size, 'RGB')
+                        pygame.image.save(image, os.path.join(self.directory, f'frame_{frame:06d}.png'))
+                    else:
+                        self.file.write(rgb.data)
+                    self.written += 1
+                except (OSError, pygame.error) as e:
+                    # Keep draining so the game never waits on a dead writer
+                    print(f'Error writing capture: {e}')
+                    self.error = e
+            self.free.put(slot)
+
+    def close(self):
+        """Write out queued frames and finish the output; returns a one-line summary"""
+        if self.thread is None:
+            return None
+        self.ready.put(None)
+        self.thread.join()
+        self.thread = None
+        try:
+            if self.file:
+                self.file.close()
+        except OSError as e:
+            print(f'Error finishing capture: {e}')
+        if self.process and self.process.wait() != 0:
+            print(f'Error encoding {self.path}: encoder exited with {self.process.returncode}')
+        return (f'captured {self.written}/{self.frames} frames to {self.path} ({self.kind}), '
+                f'waited on the writer {self.waits} times for {self.waited:.2f}s')
+
+
+def render_replay(replay, path, lead_in=LEAD_IN_FRAMES, hold=HOLD_FRAMES, slots=CAPTURE_SLOTS,
+                  encoder=CAPTURE_ENCODER):
+    """Draw every frame of a replay headless and capture it; returns the Game and the capture summary"""
+    import flappy_bird as fb
+
+    game = fb.Game(headless=True, seed=replay.seed, leaderboard_path=None)
+    # The sprites decide the sizes the game collides with
+    if game.geometry != replay.geometry:
+        print('Replay was recorded with other sprite sizes; it may not play back the same')
+    capture = FrameCapture(path, game.screen, FPS, slots, encoder)
+
+    def frame():
+        game.update()
+        game.roll_ahead()
+        game.draw()
+        capture.capture()
+    for _ in range(lead_in):
+        frame()
+    for flap in replay.flaps:
+        if flap:
+            game.flap()
+        frame()
+    for _ in range(hold):
+        frame()
+    return game, capture.close()
+
+
+def main():
+    from replay import Replay
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('replay', help='replay file (.fbr) to render')
+    parser.add_argument('output', help='video file, .rgb stream, or directory for PNG frames')
+    parser.add_argument('--lead-in', type=int, default=LEAD_IN_FRAMES, help='start-screen frames before the run')
+    parser.add_argument('--hold', type=int, default=HOLD_FRAMES, help='game-over frames after the run')
+    parser.add_argument('--slots', type=int, default=CAPTURE_SLOTS, help='frames buffered for the writer')
+    parser.add_argument('--encoder', default=CAPTURE_ENCODER, help='encoder binary for video outputs')
+    args = parser.parse_args()
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    try:
+        replay = Replay.load(args.replay)
+    except (OSError, ValueError) as e:
+        sys.exit(f'Error loading replay {args.replay}: {e}')
+    start = time.perf_counter()
+    game, summary = render_replay(replay, args.output, args.lead_in, args.hold, args.slots, args.encoder)
+    elapsed = time.perf_counter() - start
+    frames = args.lead_in + replay.frames + args.hold
+    if summary:
+        print(summary)
+    print(f'rendered {frames} frames in {elapsed:.1f}s, {frames / elapsed / FPS:.1f}x real time; '
+          f'score {game.score} (replay says {replay.score})')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,31 @@
+import argparse
+import concurrent.futures
+import gc
+import hashlib
+import json
+import mmap
 import pygame
+import numpy as np
 import random
 import sys
 import urllib.request
 import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict, deque
 
-# Initialize Pygame
-pygame.init()
+import flappy_core as core
+from flappy_core import (SCREEN_WIDTH, SCREEN_HEIGHT, FPS, SIM_RATE, BIRD_WIDTH, BIRD_HEIGHT,
+                         BIRD_X, GRAVITY, JUMP_STRENGTH, PIPE_WIDTH, PIPE_GAP, PIPE_SPEED,
+                         PIPE_SPAWN_FREQUENCY)
 
 # Game Constants
-SCREEN_WIDTH = 400
-SCREEN_HEIGHT = 600
-FPS = 60
+MAX_FRAME_TIME = 0.25  # longest real-time gap the simulation catches up on
+HIGH_SCORE_FILE = 'highscore.txt'  # legacy best score, imported into the leaderboard once
+# Capture, leaderboard, replay and spectator modules are imported where they are
+# used, so importing the game for its helpers stays cheap
+LEADERBOARD_FILE = 'leaderboard.db'  # as leaderboard.LEADERBOARD_FILE
 
 # Colors
 WHITE = (255, 255, 255)
@@ -21,17 +36,61 @@ YELLOW = (255, 255, 0)
 RED = (255, 0, 0)
 
 # Bird Constants
-BIRD_WIDTH = 40
-BIRD_HEIGHT = 30
-BIRD_X = 100
-GRAVITY = 0.5
-JUMP_STRENGTH = -10
+BIRD_ANIM_STEPS = 12  # simulation steps per animation frame (200 ms)
+BIRD_MIN_ANGLE = -90
+BIRD_MAX_ANGLE = 45
+ROTATION_STEP = 1.5  # degrees between pre-rotated bird sprites
 
 # Pipe Constants
-PIPE_WIDTH = 70
-PIPE_GAP = 200
-PIPE_SPEED = 3
-PIPE_SPAWN_FREQUENCY = 90  # frames
+PIPE_CACHE_SIZE = 64  # composed pipe columns kept in memory
+
+# Collision Constants
+PIXEL_COLLISION = False  # test sprite masks instead of bounding boxes
+
+# Particle Constants
+PARTICLE_CAPACITY = 256  # preallocated particle slots, grown on demand
+PARTICLE_ALPHA_LEVELS = 64  # pre-baked alpha steps per particle sprite
+PARTICLE_MIN_SIZE = 2
+PARTICLE_MAX_SIZE = 5
+JUMP_PARTICLES = 5
+SCORE_PARTICLES = 10
+JUMP_PARTICLE_COLORS = {'yellow': (255, 215, 0), 'blue': (100, 149, 237), 'red': (220, 20, 60)}
+SCORE_PARTICLE_COLOR = (255, 215, 0)
+
+# Ghost Constants
+GHOST_LIMIT = 500  # most ghosts drawn in one frame, nearest the player's bird first
+GHOST_ALPHA = 96  # opacity baked into ghost sprites
+GHOST_LOD_SYNC = 100  # above this many ghosts on screen, wings flap in step and coinciding ghosts draw once
+GHOST_LOD_COARSE = 250  # above this many, ghosts also snap to even rows and 4x coarser angles
+
+# Audio Constants
+AUDIO_FREQUENCY = 44100
+AUDIO_BUFFER = 256  # samples per mixer callback; 256 is about 6 ms at 44.1 kHz
+# Sound -> category; each category plays on its own reserved channels
+SOUND_CATEGORIES = {'wing': 'wing', 'point': 'point', 'hit': 'crash', 'die': 'crash'}
+SOUND_CHANNELS = {'wing': 2, 'point': 2, 'crash': 1}
+SOUND_MIN_INTERVAL = {'wing': 0.05, 'point': 0.08, 'hit': 0.0, 'die': 0.0}  # repeats inside this are dropped
+
+# Render Constants
+DIRTY_RECTS = False  # present only changed rects instead of full flips
+VSYNC = False  # let the display's refresh pace frames
+VSYNC_MAX_FPS = 240  # frame cap in case the driver ignores vsync
+
+# Input Constants
+LATE_INPUT = False  # poll input before every step and wake just in time for vsync
+LATE_INPUT_MARGIN = 0.002  # seconds of slack kept before the predicted vblank
+
+# Profiler Constants
+PROFILE_FRAMES = 600  # frames kept in the profiler's ring buffer
+PROFILE_SECTIONS = ('events', 'update', 'draw', 'pipes', 'particles', 'ghosts', 'flip')
+PROFILE_OVERLAY_REFRESH = 15  # frames between overlay text updates
+MEMORY_WARMUP = 600  # frames before the memory profiler takes its baseline
+MEMORY_TRACE_DEPTH = 10  # stack frames tracemalloc keeps per allocation
+MEMORY_TOP_SITES = 10  # allocation sites listed by the memory report
+
+# HUD Constants
+TEXT_CACHE_SIZE = 128  # rendered text surfaces kept in memory
+SCORE_OUTLINE_OFFSETS = [(-2, -2), (-2, 2), (2, -2), (2, 2), (-2, 0), (2, 0), (0, -2), (0, 2)]
 
 # Asset URLs
 ASSETS = {
@@ -59,63 +118,245 @@ SOUNDS = {
     'die': 'https://raw.githubusercontent.com/samuelcust/flappy-bird-assets/master/audio/die.wav'
 }
 
-def download_assets():
-    """Download game assets if they don't exist"""
-    assets_dir = 'assets'
+# Expected size and SHA-256 of every downloaded file
+ASSET_MANIFEST = {
+    'yellow_bird1.png': (426, '9c691e789dcb75158b24642d3d902bf918b7be259c5df6b8e504665b32fef860'),
+    'yellow_bird2.png': (425, '09b80bf4f6f51b4ef421c459fb6140eb0ece14ccb74d637559b50134354c7bbf'),
+    'yellow_bird3.png': (427, '8f0f7372cbfcf5d663077f28377d033807360b33cdfbd2f220bb84fea27a1131'),
+    'blue_bird1.png': (431, '0f3598235750ab603f0d7384b4b8c54b5c40d9e42b707355d338064df6388a4e'),
+    'blue_bird2.png': (430, '5b64cbbcf81fb53ab09c8865aa5f1098d836f4c3288a31abbb0f642f76beb124'),
+    'blue_bird3.png': (431, '0f7826033544db023eb20d87292241b777378445149cc8c463e7005fa2612f5a'),
+    'red_bird1.png': (425, '3e0ea4c3440ed3a1d826ecefbcb83a66550c0d788560414d5c26defc20946201'),
+    'red_bird2.png': (426, 'aa32d8e45a6009dd2524635253dfc754ae80ba695174ca9f860f5dc001a9bcbc'),
+    'red_bird3.png': (425, 'fc46d921c024d1792b59a674d7af61fd66cdc685c22a6106ec2f203ddce85c38'),
+    'pipe.png': (2527, '8a3fb1ec2fcc5b899a02af626dd6c7e52138faf3dfd64d5dce4b4e028b503edb'),
+    'background.png': (7026, '472c806b3caea5f65e9059e6b2ae1a5bb8728deeab38b65c83eb14e693b56921'),
+    'base.png': (470, '8afccfb7030e32c736c6433fc48990aa5b47332ddf184206e4e570fdc600f083'),
+    'message.png': (1602, '3cf1e7d7006e2c03cdbab9743eb81b931941372ba8902b263f0ff30a288e4a5b'),
+    'gameover.png': (758, 'd9c6bb732e116e9e8f57faf73126fcf11597289a7a08ef8ced6d2c5e5ba606a9'),
+    'font.ttf': (118204, '034c77f1f05ec89421e4a63f0e3a4ca1ecf852cc6d2bf611f126f275728e017d'),
+    'wing.wav': (29902, 'bbeac8587c16fcec63ef8d6f97bdf9a8c8d2613c290d127862642922b06616af'),
+    'point.wav': (177486, '2f4d013d3d0320cdce6f02647184a213a30158b9deaec62411de1e120453342c'),
+    'hit.wav': (96590, '23cd47d893fcc62339e3a527700678e91f7ce0703887d6c286e65d14f460e5ec'),
+    'die.wav': (194894, '80930ae5eabc4ea00c7ac7099ea6b80aa0882cb0f9efba94039dd8100e891cac'),
+}
+
+# Download settings
+ASSET_MIRROR = os.environ.get('FLAPPY_ASSET_MIRROR')  # base URL or local directory holding the files
+ASSET_WORKERS = 8
+ASSET_RETRIES = 3
+ASSET_BACKOFF = 0.5  # seconds, doubled after each failed attempt
+ASSET_TIMEOUT = 10  # seconds per request
+
+def asset_files():
+    """Map every asset file name to its upstream URL"""
+    files = {}
+    for name, url in ASSETS.items():
+        files[f'{name}.ttf' if name == 'font' else f'{name}.png'] = url
+    for name, url in SOUNDS.items():
+        files[f'{name}.wav'] = url
+    return files
+
+def verify_asset(filepath, filename):
+    """Check a file against the manifest; files missing from it only need to exist"""
+    if not os.path.exists(filepath):
+        return False
+    expected = ASSET_MANIFEST.get(filename)
+    if expected is None:
+        return True
+    size, digest = expected
+    if os.path.getsize(filepath) != size:
+        return False
+    with open(filepath, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest() == digest
+
+def asset_source(filename, url, mirror):
+    """Where to fetch a file from: the upstream URL, a mirror URL or a mirror directory"""
+    if not mirror:
+        return url
+    if '://' in mirror:
+        return mirror.rstrip('/') + '/' + filename
+    return os.path.join(mirror, filename)
+
+def fetch_asset(filename, source, assets_dir, retries=ASSET_RETRIES, backoff=ASSET_BACKOFF):
+    """Fetch one file into a temp file, verify it and rename it into place"""
+    filepath = os.path.join(assets_dir, filename)
+    for attempt in range(retries):
+        fd, temp_path = tempfile.mkstemp(prefix=f'.{filename}.', suffix='.part', dir=assets_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if '://' in source:
+                    with urllib.request.urlopen(source, timeout=ASSET_TIMEOUT) as response:
+                        shutil.copyfileobj(response, f)
+                else:
+                    with open(source, 'rb') as src:
+                        shutil.copyfileobj(src, f)
+            if not verify_asset(temp_path, filename):
+                raise ValueError('size or checksum does not match the manifest')
+            os.replace(temp_path, filepath)
+            return True
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            if attempt + 1 == retries:
+                print(f'Failed to download {filename}: {e}')
+                return False
+            time.sleep(backoff * 2 ** attempt)
+
+def download_assets(assets_dir='assets', mirror=ASSET_MIRROR, workers=ASSET_WORKERS):
+    """Download missing or corrupt game assets concurrently"""
     if not os.path.exists(assets_dir):
         os.makedirs(assets_dir)
     
-    for name, url in ASSETS.items():
-        if name == 'font':
-            filepath = os.path.join(assets_dir, f'{name}.ttf')
-        else:
-            filepath = os.path.join(assets_dir, f'{name}.png')
-        if not os.path.exists(filepath):
-            try:
-                print(f'Downloading {name}...')
-                urllib.request.urlretrieve(url, filepath)
-            except Exception as e:
-                print(f'Failed to download {name}: {e}')
+    missing = [(filename, url) for filename, url in asset_files().items()
+               if not verify_asset(os.path.join(assets_dir, filename), filename)]
+    if not missing:
+        return assets_dir
     
-    for name, url in SOUNDS.items():
-        filepath = os.path.join(assets_dir, f'{name}.wav')
-        if not os.path.exists(filepath):
-            try:
-                print(f'Downloading {name} sound...')
-                urllib.request.urlretrieve(url, filepath)
-            except Exception as e:
-                print(f'Failed to download {name} sound: {e}')
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = []
+        for filename, url in missing:
+            print(f'Downloading {filename}...')
+            futures.append(pool.submit(fetch_asset, filename, asset_source(filename, url, mirror), assets_dir))
+        concurrent.futures.wait(futures)
     
     return assets_dir
 
+# Sprite bundle: every sprite packed into one prescaled raw RGBA atlas
+BUNDLE_INDEX = 'sprites.json'
+BUNDLE_PIXELS = 'sprites.rgba'
+BUNDLE_MAX_WIDTH = 1024
+BIRD_COLORS = ['yellow', 'blue', 'red']
+SPRITE_NAMES = [f'{color}_bird{i}' for color in BIRD_COLORS for i in (1, 2, 3)] + \
+    ['pipe', 'background', 'base', 'message', 'gameover']
+
+def pack_sprites(sizes, max_width=BUNDLE_MAX_WIDTH):
+    """Shelf-pack named (width, height) sizes, tallest first; returns rects and atlas size"""
+    rects = {}
+    x = y = shelf_height = atlas_width = 0
+    for name, (width, height) in sorted(sizes.items(), key=lambda item: -item[1][1]):
+        if x + width > max_width and x > 0:
+            y += shelf_height
+            x = shelf_height = 0
+        rects[name] = (x, y, width, height)
+        x += width
+        shelf_height = max(shelf_height, height)
+        atlas_width = max(atlas_width, x)
+    return rects, (atlas_width, y + shelf_height)
+
+def bundle_sources(assets_dir):
+    """Size and modification time of each source image, to spot a stale bundle"""
+    sources = {}
+    for name in SPRITE_NAMES:
+        stat = os.stat(os.path.join(assets_dir, f'{name}.png'))
+        sources[name] = [stat.st_size, stat.st_mtime_ns]
+    return sources
+
+def build_asset_bundle(assets_dir):
+    """Pack the loose PNGs into a prescaled atlas that load_assets can map directly"""
+    # Convert to 32-bit RGBA first, turning palette colorkeys into alpha like convert_alpha does
+    sprites = {}
+    for name in SPRITE_NAMES:
+        sprites[name] = to_rgba(pygame.image.load(os.path.join(assets_dir, f'{name}.png')))
+    
+    # Prescale like Game.__init__ does, so startup skips the transforms
+    sprites['background'] = pygame.transform.scale(sprites['background'], (SCREEN_WIDTH, SCREEN_HEIGHT))
+    sprites['base'] = pygame.transform.scale(sprites['base'], (SCREEN_WIDTH, sprites['base'].get_height()))
+    
+    rects, atlas_size = pack_sprites({name: sprite.get_size() for name, sprite in sprites.items()})
+    atlas = pygame.Surface(atlas_size, pygame.SRCALPHA, 32)
+    for name, sprite in sprites.items():
+        # BLEND_RGBA_MAX onto the cleared atlas copies pixels, alpha included
+        atlas.blit(sprite, rects[name][:2], special_flags=pygame.BLEND_RGBA_MAX)
+    
+    index = {
+        'size': list(atlas_size),
+        'screen': [SCREEN_WIDTH, SCREEN_HEIGHT],
+        'sprites': {name: list(rect) for name, rect in rects.items()},
+        'sources': bundle_sources(assets_dir),
+    }
+    # Pixels first, index last: a bundle is only used once its index exists
+    with open(os.path.join(assets_dir, BUNDLE_PIXELS), 'wb') as f:
+        f.write(pygame.image.tobytes(atlas, 'RGBA'))
+    index_path = os.path.join(assets_dir, BUNDLE_INDEX)
+    with open(index_path + '.tmp', 'w') as f:
+        json.dump(index, f)
+    os.replace(index_path + '.tmp', index_path)
+    return index
+
+def load_asset_bundle(assets_dir):
+    """Load sprites from the packed atlas, or return None if it is missing or stale"""
+    try:
+        with open(os.path.join(assets_dir, BUNDLE_INDEX)) as f:
+            index = json.load(f)
+        if index['screen'] != [SCREEN_WIDTH, SCREEN_HEIGHT] or index['sources'] != bundle_sources(assets_dir):
+            return None
+        width, height = index['size']
+        with open(os.path.join(assets_dir, BUNDLE_PIXELS), 'rb') as f:
+            pixels = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        if len(pixels) != width * height * 4:
+            return None
+        # One copy into the display format, then every sprite is a subsurface
+        atlas = prepare_image(pygame.image.frombuffer(pixels, (width, height), 'RGBA'))
+    except (OSError, ValueError, KeyError, pygame.error):
+        return None
+    
+    sprites = {name: atlas.subsurface(rect) for name, rect in index['sprites'].items()}
+    images = {'bird_frames': {}}
+    for color in BIRD_COLORS:
+        images['bird_frames'][color] = [sprites[f'{color}_bird{i}'] for i in (1, 2, 3)]
+    for name in ('pipe', 'background', 'base', 'message', 'gameover'):
+        images[name] = sprites[name]
+    return images
+
+def to_rgba(image):
+    """Copy an image to 32-bit RGBA without a display, turning colorkeys into alpha"""
+    return pygame.image.frombytes(pygame.image.tobytes(image, 'RGBA'), image.get_size(), 'RGBA')
+
+def prepare_image(image):
+    """Convert an image for fast blits, to the display format when there is a display"""
+    if pygame.display.get_init() and pygame.display.get_surface():
+        return image.convert_alpha()
+    return to_rgba(image)
+
+def load_image(path):
+    return prepare_image(pygame.image.load(path))
+
 def load_assets(assets_dir):
     """Load all game assets"""
+    images = load_asset_bundle(assets_dir)
+    if images:
+        font_path = os.path.join(assets_dir, 'font.ttf')
+        if os.path.exists(font_path):
+            images['custom_font'] = font_path
+        return images
+    
     images = {}
     try:
         # Load bird animation frames for all colors
         images['bird_frames'] = {
             'yellow': [
-                pygame.image.load(os.path.join(assets_dir, 'yellow_bird1.png')).convert_alpha(),
-                pygame.image.load(os.path.join(assets_dir, 'yellow_bird2.png')).convert_alpha(),
-                pygame.image.load(os.path.join(assets_dir, 'yellow_bird3.png')).convert_alpha()
+                load_image(os.path.join(assets_dir, 'yellow_bird1.png')),
+                load_image(os.path.join(assets_dir, 'yellow_bird2.png')),
+                load_image(os.path.join(assets_dir, 'yellow_bird3.png'))
             ],
             'blue': [
-                pygame.image.load(os.path.join(assets_dir, 'blue_bird1.png')).convert_alpha(),
-                pygame.image.load(os.path.join(assets_dir, 'blue_bird2.png')).convert_alpha(),
-                pygame.image.load(os.path.join(assets_dir, 'blue_bird3.png')).convert_alpha()
+                load_image(os.path.join(assets_dir, 'blue_bird1.png')),
+                load_image(os.path.join(assets_dir, 'blue_bird2.png')),
+                load_image(os.path.join(assets_dir, 'blue_bird3.png'))
             ],
             'red': [
-                pygame.image.load(os.path.join(assets_dir, 'red_bird1.png')).convert_alpha(),
-                pygame.image.load(os.path.join(assets_dir, 'red_bird2.png')).convert_alpha(),
-                pygame.image.load(os.path.join(assets_dir, 'red_bird3.png')).convert_alpha()
+                load_image(os.path.join(assets_dir, 'red_bird1.png')),
+                load_image(os.path.join(assets_dir, 'red_bird2.png')),
+                load_image(os.path.join(assets_dir, 'red_bird3.png'))
             ]
         }
         
-        images['pipe'] = pygame.image.load(os.path.join(assets_dir, 'pipe.png')).convert_alpha()
-        images['background'] = pygame.image.load(os.path.join(assets_dir, 'background.png')).convert_alpha()
-        images['base'] = pygame.image.load(os.path.join(assets_dir, 'base.png')).convert_alpha()
-        images['message'] = pygame.image.load(os.path.join(assets_dir, 'message.png')).convert_alpha()
-        images['gameover'] = pygame.image.load(os.path.join(assets_dir, 'gameover.png')).convert_alpha()
+        images['pipe'] = load_image(os.path.join(assets_dir, 'pipe.png'))
+        images['background'] = load_image(os.path.join(assets_dir, 'background.png'))
+        images['base'] = load_image(os.path.join(assets_dir, 'base.png'))
+        images['message'] = load_image(os.path.join(assets_dir, 'message.png'))
+        images['gameover'] = load_image(os.path.join(assets_dir, 'gameover.png'))
     except Exception as e:
         print(f'Error loading assets: {e}')
         return None
@@ -127,88 +368,377 @@ def load_assets(assets_dir):
     
     return images
 
-def load_sounds(assets_dir):
-    """Load all game sounds"""
-    sounds = {}
-    #Loading assets from different sounds extracted from github
+def load_fonts(images):
+    """The score, message and overlay fonts: the custom font if it loaded, else system fonts"""
+    if not pygame.font.get_init():
+        pygame.font.init()
+    if images and images.get('custom_font'):
+        try:
+            return (pygame.font.Font(images['custom_font'], 42),
+                    pygame.font.Font(images['custom_font'], 20),
+                    pygame.font.Font(images['custom_font'], 14))
+        except:
+            pass
+    return (pygame.font.SysFont('arial', 54, bold=True),
+            pygame.font.SysFont('arial', 24, bold=True),
+            pygame.font.SysFont('arial', 18, bold=False))
+
+def fit_scenery(images):
+    """Scale the background and base to the screen in images (the bundle's are prescaled); returns base_y"""
+    if images and images.get('background'):
+        if images['background'].get_size() != (SCREEN_WIDTH, SCREEN_HEIGHT):
+            images['background'] = pygame.transform.scale(images['background'], (SCREEN_WIDTH, SCREEN_HEIGHT))
+    if images and images.get('base'):
+        base_height = images['base'].get_height()
+        if images['base'].get_width() != SCREEN_WIDTH:
+            images['base'] = pygame.transform.scale(images['base'], (SCREEN_WIDTH, base_height))
+        return SCREEN_HEIGHT - base_height
+    return SCREEN_HEIGHT - 50
+
+def background_layer(screen, images):
+    """The static background in the screen's format, for Renderer"""
+    background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), 0, screen)
+    if images and images.get('background'):
+        background.blit(images['background'], (0, 0))
+    else:
+        background.fill(BLUE)
+    return background
+
+def sprite_geometry(assets_dir='assets'):
+    """The Game.geometry the sprites in assets_dir give, read without building a Game.
+
+    Sizes come from the bundle index when it is fresh, or else from the PNG
+    headers; a missing sprite falls back to the size Game falls back to.
+    """
+    sizes = {}
     try:
-        pygame.mixer.init()
-        sounds['wing'] = pygame.mixer.Sound(os.path.join(assets_dir, 'wing.wav'))
-        sounds['point'] = pygame.mixer.Sound(os.path.join(assets_dir, 'point.wav'))
-        sounds['hit'] = pygame.mixer.Sound(os.path.join(assets_dir, 'hit.wav'))
-        sounds['die'] = pygame.mixer.Sound(os.path.join(assets_dir, 'die.wav'))
-    except Exception as e:
-        print(f'Error loading sounds: {e}')
-        return None
-    return sounds
-
-class Particle:
-    def __init__(self, x, y, color):
-        self.x = x
-        self.y = y
-        self.vx = random.uniform(-2, 2)
-        self.vy = random.uniform(-4, -1)
-        self.color = color
-        self.size = random.randint(2, 5)
-        self.lifetime = random.randint(20, 40)
-        self.age = 0
+        with open(os.path.join(assets_dir, BUNDLE_INDEX)) as f:
+            index = json.load(f)
+        if index['screen'] == [SCREEN_WIDTH, SCREEN_HEIGHT] and index['sources'] == bundle_sources(assets_dir):
+            sizes = {name: tuple(rect[2:]) for name, rect in index['sprites'].items()}
+    except (OSError, ValueError, KeyError):
+        pass
+    for name in ('yellow_bird1', 'pipe', 'base'):
+        if name not in sizes:
+            try:
+                sizes[name] = pygame.image.load(os.path.join(assets_dir, f'{name}.png')).get_size()
+            except (OSError, pygame.error):
+                pass
+    bird_width, bird_height = sizes.get('yellow_bird1', (BIRD_WIDTH, BIRD_HEIGHT))
+    base_y = SCREEN_HEIGHT - sizes['base'][1] if 'base' in sizes else SCREEN_HEIGHT - 50
+    return base_y, bird_width, bird_height, sizes.get('pipe', (PIPE_WIDTH,))[0]
+
+class AudioPlayer:
+    """Game sounds on a small mixer buffer with dedicated channels per category.
+    
+    The mixer is pre-initialised with `buffer` samples per callback, which
+    bounds the delay between play() and the sound being heard. Each sound
+    category gets its own reserved channels, so a point sound never steals
+    the wing's channel; within a category a free channel is used, or the one
+    that started longest ago. A sound repeated within its
+    SOUND_MIN_INTERVAL is dropped, since the first one is still playing.
+    
+    If the mixer or a sound fails to load, the player stays silent and
+    play() returns at once. With log=True every play() call is recorded as
+    (sound, perf_counter time) for latency measurements.
+    """
+    def __init__(self, assets_dir, buffer=AUDIO_BUFFER, frequency=AUDIO_FREQUENCY, log=False):
+        self.enabled = False
+        self.sounds = {}
+        self.channels = {}
+        self.started = {}
+        self.last_played = dict.fromkeys(SOUND_CATEGORIES, float('-inf'))
+        self.log = [] if log else None
+        self.buffer = buffer
+        self.frequency = frequency
+        try:
+            # pre_init only applies to the next init
+            if pygame.mixer.get_init():
+                pygame.mixer.quit()
+            pygame.mixer.pre_init(frequency, -16, 2, buffer)
+            pygame.mixer.init()
+            self.frequency = pygame.mixer.get_init()[0]
+            reserved = sum(SOUND_CHANNELS.values())
+            pygame.mixer.set_num_channels(max(reserved, pygame.mixer.get_num_channels()))
+            pygame.mixer.set_reserved(reserved)
+            first = 0
+            for category, count in SOUND_CHANNELS.items():
+                self.channels[category] = [pygame.mixer.Channel(i) for i in range(first, first + count)]
+                self.started[category] = [float('-inf')] * count
+                first += count
+            for name in SOUND_CATEGORIES:
+                self.sounds[name] = pygame.mixer.Sound(os.path.join(assets_dir, f'{name}.wav'))
+        except Exception as e:
+            print(f'Error loading sounds: {e}')
+            return
+        self.enabled = True
         
-    def update(self):
-        self.x += self.vx
-        self.y += self.vy
-        self.vy += 0.2  # gravity
-        self.age += 1
+    @property
+    def output_latency(self):
+        """Seconds of audio one mixer buffer holds"""
+        return self.buffer / self.frequency
         
-    def draw(self, screen):
-        alpha = int(255 * (1 - self.age / self.lifetime))
-        if alpha > 0:
-            s = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
-            color_with_alpha = (*self.color, alpha)
-            pygame.draw.circle(s, color_with_alpha, (self.size, self.size), self.size)
-            screen.blit(s, (int(self.x - self.size), int(self.y - self.size)))
-    
-    def is_dead(self):
-        return self.age >= self.lifetime
-
-class Bird:
-    def __init__(self, frames=None):
-        self.x = BIRD_X
-        self.y = SCREEN_HEIGHT // 2
-        self.velocity = 0
-        self.frames = frames
-        self.frame_index = 0
-        if frames and len(frames) > 0:
-            self.width = frames[0].get_width()
-            self.height = frames[0].get_height()
+    def play(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if now - self.last_played[name] < SOUND_MIN_INTERVAL[name]:
+            return
+        self.last_played[name] = now
+        category = SOUND_CATEGORIES[name]
+        channels = self.channels[category]
+        started = self.started[category]
+        for index, channel in enumerate(channels):
+            if not channel.get_busy():
+                break
         else:
-            self.width = BIRD_WIDTH
-            self.height = BIRD_HEIGHT
+            # All busy: cut off the one that started longest ago
+            index = started.index(min(started))
+            channel = channels[index]
+        started[index] = now
+        channel.play(self.sounds[name])
+        if self.log is not None:
+            self.log.append((name, now))
+
+def lerp(previous, current, alpha):
+    """Interpolate a position between the last two simulation steps"""
+    if alpha >= 1.0:
+        return current
+    return previous + (current - previous) * alpha
+
+class ParticleSystem:
+    """Particles stored as NumPy arrays with a free-list pool of slots.
+    
+    Each particle moves like the old Particle object: a random velocity,
+    gravity of 0.2 per frame and an alpha that fades over its lifetime.
+    Drawing uses pre-baked circle sprites per color, size and alpha level.
+    """
+    def __init__(self, capacity=PARTICLE_CAPACITY, alpha_levels=PARTICLE_ALPHA_LEVELS):
+        self.capacity = 0
+        self.alpha_levels = alpha_levels
+        self.sizes = PARTICLE_MAX_SIZE - PARTICLE_MIN_SIZE + 1
+        self.rng = np.random.default_rng()
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.vx = np.zeros(0)
+        self.vy = np.zeros(0)
+        self.age = np.zeros(0, dtype=np.int32)
+        self.lifetime = np.ones(0, dtype=np.int32)
+        self.size = np.zeros(0, dtype=np.int32)
+        self.color = np.zeros(0, dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.free = np.zeros(0, dtype=np.int64)
+        self.free_count = 0
+        self.count = 0
         
-    def jump(self):
-        self.velocity = JUMP_STRENGTH
+        # Sprite table: color index -> size -> alpha level
+        self.colors = {}
+        self.sprites = np.empty(0, dtype=object)
+        self.grow(capacity)
+        
+    def __len__(self):
+        return self.count
+    
+    def grow(self, capacity):
+        """Enlarge the pool, keeping live particles in their slots"""
+        old = self.capacity
+        extra = capacity - old
+        for name in ('x', 'y', 'vx', 'vy', 'age', 'lifetime', 'size', 'color', 'alive'):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros(extra, dtype=array.dtype)]))
+        self.lifetime[old:] = 1
+        # New slots go on top of the free stack, lowest index popped first
+        free = np.empty(capacity, dtype=np.int64)
+        free[:self.free_count] = self.free[:self.free_count]
+        free[self.free_count:self.free_count + extra] = np.arange(capacity - 1, old - 1, -1)
+        self.free = free
+        self.free_count += extra
+        self.capacity = capacity
+        
+    def color_index(self, color):
+        index = self.colors.get(color)
+        if index is None:
+            index = len(self.colors)
+            self.colors[color] = index
+            self.sprites = np.concatenate([self.sprites, self.bake_sprites(color)])
+        return index
+    
+    def bake_sprites(self, color):
+        """Circle sprites for every size and alpha level of one color"""
+        sprites = np.empty(self.sizes * self.alpha_levels, dtype=object)
+        for i in range(self.sizes):
+            size = PARTICLE_MIN_SIZE + i
+            for level in range(self.alpha_levels):
+                alpha = min(255, (2 * level + 1) * 128 // self.alpha_levels)
+                s = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+                pygame.draw.circle(s, (*color, alpha), (size, size), size)
+                sprites[i * self.alpha_levels + level] = s
+        return sprites
+        
+    def emit(self, x, y, color, count):
+        """Spawn count particles at (x, y)"""
+        if count > self.free_count:
+            self.grow(max(self.capacity * 2, self.count + count))
+        self.free_count -= count
+        slots = self.free[self.free_count:self.free_count + count]
+        self.x[slots] = x
+        self.y[slots] = y
+        self.vx[slots] = self.rng.uniform(-2, 2, count)
+        self.vy[slots] = self.rng.uniform(-4, -1, count)
+        self.size[slots] = self.rng.integers(PARTICLE_MIN_SIZE, PARTICLE_MAX_SIZE + 1, count)
+        self.lifetime[slots] = self.rng.integers(20, 41, count)
+        self.age[slots] = 0
+        self.color[slots] = self.color_index(color)
+        self.alive[slots] = True
+        self.count += count
         
     def update(self):
-        self.velocity += GRAVITY
-        self.y += self.velocity
+        if self.count == 0:
+            return
+        live = np.flatnonzero(self.alive)
+        self.x[live] += self.vx[live]
+        self.y[live] += self.vy[live]
+        self.vy[live] += 0.2  # gravity
+        self.age[live] += 1
         
+        # Return dead particles to the pool
+        dead = live[self.age[live] >= self.lifetime[live]]
+        if len(dead):
+            self.alive[dead] = False
+            self.free[self.free_count:self.free_count + len(dead)] = dead
+            self.free_count += len(dead)
+            self.count -= len(dead)
+            
     def draw(self, screen):
+        if self.count == 0:
+            return None
+        live = np.flatnonzero(self.alive)
+        age = self.age[live]
+        lifetime = self.lifetime[live]
+        size = self.size[live]
+        alpha = (255 * (1 - age / lifetime)).astype(np.int32)
+        level = alpha * self.alpha_levels // 256
+        index = (self.color[live] * self.sizes + size - PARTICLE_MIN_SIZE) * self.alpha_levels + level
+        # int() truncates toward zero, as the blit position always did
+        positions = np.empty((len(live), 2), dtype=np.int64)
+        positions[:, 0] = np.trunc(self.x[live] - size)
+        positions[:, 1] = np.trunc(self.y[live] - size)
+        visible = alpha > 0
+        if not visible.all():
+            index = index[visible]
+            positions = positions[visible]
+            size = size[visible]
+            if len(index) == 0:
+                return None
+        screen.blits(zip(self.sprites[index], positions.tolist()), False)
+        
+        # One bounding rect for all particles keeps dirty-rect updates cheap
+        left, top = positions.min(axis=0)
+        right = int((positions[:, 0] + 2 * size).max())
+        bottom = int((positions[:, 1] + 2 * size).max())
+        return pygame.Rect(int(left), int(top), right - left, bottom - top)
+        
+    def clear(self):
+        live = np.flatnonzero(self.alive)
+        self.alive[:] = False
+        self.free[self.free_count:self.free_count + len(live)] = live
+        self.free_count += len(live)
+        self.count = 0
+
+class RotationAtlas:
+    """Pre-rotated copies of each bird frame, quantized to a fixed angle step"""
+    def __init__(self, step=ROTATION_STEP):
+        self.step = step
+        self.count = int(round((BIRD_MAX_ANGLE - BIRD_MIN_ANGLE) / step)) + 1
+        self.tables = {}
+        self.masks = {}
+        
+    def build(self, frame):
+        """Rotate one frame to every angle bucket"""
+        table = []
+        for i in range(self.count):
+            angle = min(BIRD_MIN_ANGLE + i * self.step, BIRD_MAX_ANGLE)
+            rotated = pygame.transform.rotozoom(frame, angle, 1)
+            # Offsets from the bird's center to the rotated sprite's top-left corner
+            table.append((rotated, rotated.get_width() // 2, rotated.get_height() // 2))
+        self.tables[frame] = table
+        return table
+        
+    def build_masks(self, frame):
+        """Collision masks for every angle bucket of one frame"""
+        table = self.tables.get(frame) or self.build(frame)
+        masks = [(pygame.mask.from_surface(rotated), offset_x, offset_y)
+                 for rotated, offset_x, offset_y in table]
+        self.masks[frame] = masks
+        return masks
+        
+    def prebuild(self, bird_frames, masks=False):
+        """Build the tables, and optionally masks, for every color in images['bird_frames']"""
+        for frames in bird_frames.values():
+            for frame in frames:
+                if frame not in self.tables:
+                    self.build(frame)
+                if masks and frame not in self.masks:
+                    self.build_masks(frame)
+        
+    def index(self, angle):
+        index = int(round((angle - BIRD_MIN_ANGLE) / self.step))
+        return max(0, min(index, self.count - 1))
+        
+    def get(self, frame, angle):
+        table = self.tables.get(frame)
+        if table is None:
+            table = self.build(frame)
+        return table[self.index(angle)]
+    
+    def get_mask(self, frame, angle):
+        masks = self.masks.get(frame)
+        if masks is None:
+            masks = self.build_masks(frame)
+        return masks[self.index(angle)]
+    
+    def clear(self):
+        self.tables.clear()
+        self.masks.clear()
+
+bird_rotation_atlas = RotationAtlas()
+
+class Bird(core.Bird):
+    __slots__ = ('frames', 'frame_index', 'pixel_collision')
+    
+    def __init__(self, frames=None, pixel_collision=False):
+        if frames and len(frames) > 0:
+            super().__init__(frames[0].get_width(), frames[0].get_height())
+        else:
+            super().__init__()
+        self.frames = frames
+        self.frame_index = 0
+        self.pixel_collision = pixel_collision and bool(frames)
+        
+    def angle(self):
+        """Rotation based on velocity"""
+        return max(BIRD_MIN_ANGLE, min(-self.velocity * 3, BIRD_MAX_ANGLE))
+    
+    def center(self, y):
+        """Sprite center like Rect.center, rounding half away from zero"""
+        center_y = y + self.height // 2
+        return self.x + self.width // 2, int(center_y + 0.5 if center_y >= 0 else center_y - 0.5)
+        
+    def draw(self, screen, alpha=1.0):
+        y = lerp(self.prev_y, self.y, alpha)
         if self.frames and len(self.frames) > 0:
-            # Get current frame
             current_frame = self.frames[self.frame_index]
-            # Rotate bird based on velocity
-            angle = -self.velocity * 3
-            angle = max(-90, min(angle, 45))
-            rotated_image = pygame.transform.rotozoom(current_frame, angle, 1)
-            rotated_rect = rotated_image.get_rect(center=(self.x + self.width // 2, self.y + self.height // 2))
-            screen.blit(rotated_image, rotated_rect)
+            rotated_image, offset_x, offset_y = bird_rotation_atlas.get(current_frame, self.angle())
+            center_x, center_y = self.center(y)
+            return screen.blit(rotated_image, (center_x - offset_x, center_y - offset_y))
         else:
             # Fallback to drawn bird
-            pygame.draw.ellipse(screen, YELLOW, (self.x, self.y, self.width, self.height))
-            pygame.draw.circle(screen, BLACK, (self.x + 30, self.y + 10), 5)
-            beak_points = [(self.x + self.width, self.y + 15),
-                           (self.x + self.width + 10, self.y + 12),
-                           (self.x + self.width, self.y + 18)]
-            pygame.draw.polygon(screen, RED, beak_points)
+            rect = pygame.draw.ellipse(screen, YELLOW, (self.x, y, self.width, self.height))
+            pygame.draw.circle(screen, BLACK, (self.x + 30, y + 10), 5)
+            beak_points = [(self.x + self.width, y + 15),
+                           (self.x + self.width + 10, y + 12),
+                           (self.x + self.width, y + 18)]
+            return rect.union(pygame.draw.polygon(screen, RED, beak_points))
     
     def animate(self):
         """Cycle through animation frames"""
@@ -217,426 +747,1324 @@ class Bird:
         
     def get_rect(self):
         return pygame.Rect(self.x, self.y, self.width, self.height)
+    
+    def get_mask(self):
+        """Mask of the rotated sprite and its top-left corner at the simulated position"""
+        mask, offset_x, offset_y = bird_rotation_atlas.get_mask(self.frames[self.frame_index], self.angle())
+        center_x, center_y = self.center(self.y)
+        return mask, center_x - offset_x, center_y - offset_y
+    
+    def span(self):
+        if not self.pixel_collision:
+            return super().span()
+        # The rotated sprite can reach past the unrotated box
+        mask, x, _ = self.get_mask()
+        return x, x + mask.get_size()[0]
 
-class Pipe:
-    def __init__(self, x, image=None, base_y=None):
-        self.x = x
-        self.image = image
-        self.base_y = base_y if base_y else SCREEN_HEIGHT - 50
-        if image:
-            self.width = image.get_width()
+class GhostLayer:
+    """Recorded runs raced as translucent ghost birds, drawn in one batched blit.
+    
+    Each ghost is a trajectory: the bird's y and velocity before its first
+    frame and after each one, as Replay.trajectory() returns them. All
+    trajectories live end to end in two float32 arrays, so a frame's
+    positions are one fancy-indexed read. Sprites come from the rotation
+    atlas with GHOST_ALPHA baked in, one table shared by every ghost of a
+    color, and the whole layer goes to the screen in a single blits call.
+    
+    Ghosts whose run has ended or that are off screen are culled. Past
+    GHOST_LOD_SYNC ghosts on screen the cheapest detail goes first: wings
+    flap in step so ghosts at the same spot and angle draw once. Past
+    GHOST_LOD_COARSE rows and angles are rounded so more of them coincide,
+    and past the limit only the ghosts nearest the player are drawn.
+    """
+    def __init__(self, bird_frames, limit=GHOST_LIMIT, alpha=GHOST_ALPHA, atlas=None):
+        self.limit = limit
+        atlas = atlas or bird_rotation_atlas
+        self.atlas = atlas
+        self.color_names = [color for color in BIRD_COLORS if color in bird_frames]
+        self.anim_frames = min(len(bird_frames[color]) for color in self.color_names)
+        first = bird_frames[self.color_names[0]][0]
+        self.width, self.height = first.get_size()
+        
+        # Sprite table: color -> animation frame -> angle bucket
+        sprites, offsets, sizes = [], [], []
+        for color in self.color_names:
+            for frame in bird_frames[color][:self.anim_frames]:
+                for rotated, offset_x, offset_y in atlas.tables.get(frame) or atlas.build(frame):
+                    ghost = rotated.copy()
+                    ghost.fill((255, 255, 255, alpha), special_flags=pygame.BLEND_RGBA_MULT)
+                    sprites.append(ghost)
+                    offsets.append((offset_x, offset_y))
+                    sizes.append(ghost.get_size())
+        self.sprites = np.empty(len(sprites), dtype=object)
+        self.sprites[:] = sprites
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.sizes = np.array(sizes, dtype=np.int64)
+        
+        self.ys = np.zeros(0, dtype=np.float32)
+        self.velocities = np.zeros(0, dtype=np.float32)
+        self.starts = np.zeros(0, dtype=np.int64)
+        self.lengths = np.zeros(0, dtype=np.int64)
+        self.colors = np.zeros(0, dtype=np.int64)
+        self.visible = 0
+        self.drawn = 0
+        
+    def __len__(self):
+        return len(self.starts)
+    
+    def load(self, trajectories):
+        """Add (ys, velocities, color) trajectories, packed into the arrays at once"""
+        ys, velocities, starts, lengths, colors = [self.ys], [self.velocities], [], [], []
+        start = len(self.ys)
+        for y, velocity, color in trajectories:
+            y = np.asarray(y, dtype=np.float32)
+            if len(y) == 0:
+                continue
+            ys.append(y)
+            velocities.append(np.asarray(velocity, dtype=np.float32))
+            starts.append(start)
+            lengths.append(len(y))
+            colors.append(self.color_names.index(color) if color in self.color_names else 0)
+            start += len(y)
+        self.ys = np.concatenate(ys)
+        self.velocities = np.concatenate(velocities)
+        self.starts = np.concatenate([self.starts, np.array(starts, dtype=np.int64)])
+        self.lengths = np.concatenate([self.lengths, np.array(lengths, dtype=np.int64)])
+        self.colors = np.concatenate([self.colors, np.array(colors, dtype=np.int64)])
+        
+    def load_replays(self, replays):
+        """Add each replay as a ghost, in the bird color its seed gives a game"""
+        self.load((*replay.trajectory(), random.Random(replay.seed).choice(BIRD_COLORS))
+                  for replay in replays)
+        
+    def clear(self):
+        self.ys = self.ys[:0]
+        self.velocities = self.velocities[:0]
+        self.starts = self.starts[:0]
+        self.lengths = self.lengths[:0]
+        self.colors = self.colors[:0]
+        
+    def draw(self, screen, frame, alpha=1.0, near_y=None):
+        """Draw every ghost as it was frame steps into its run; returns the rect drawn over"""
+        self.visible = self.drawn = 0
+        if len(self.starts) == 0:
+            return None
+        ghosts = np.flatnonzero(frame < self.lengths)
+        current = self.starts[ghosts] + frame
+        y = self.ys[current]
+        if frame > 0 and alpha < 1.0:
+            previous = self.ys[current - 1]
+            y = previous + (y - previous) * np.float32(alpha)
+        
+        # Cull ghosts off the top or bottom of the screen
+        on_screen = (y + self.height > 0) & (y < SCREEN_HEIGHT)
+        if not on_screen.all():
+            ghosts, current, y = ghosts[on_screen], current[on_screen], y[on_screen]
+        if len(ghosts) > self.limit:
+            nearest = np.argpartition(np.abs(y - (SCREEN_HEIGHT // 2 if near_y is None else near_y)),
+                                      self.limit - 1)[:self.limit]
+            ghosts, current, y = ghosts[nearest], current[nearest], y[nearest]
+        count = self.visible = len(ghosts)
+        if count == 0:
+            return None
+        
+        # Same angle buckets as RotationAtlas.index, from Bird.angle
+        atlas = self.atlas
+        angle = np.clip(-self.velocities[current] * 3, BIRD_MIN_ANGLE, BIRD_MAX_ANGLE)
+        bucket = np.clip(np.rint((angle - BIRD_MIN_ANGLE) / atlas.step).astype(np.int64), 0, atlas.count - 1)
+        step = frame // BIRD_ANIM_STEPS
+        if count > GHOST_LOD_SYNC:
+            anim = step % self.anim_frames
         else:
-            self.width = PIPE_WIDTH
-        self.gap_y = random.randint(150, int(self.base_y) - 250)
-        self.passed = False
+            # Ghosts flap out of step with each other
+            anim = (step + ghosts) % self.anim_frames
+        # Sprite center like Bird.center, rounding half away from zero
+        center_y = y + self.height // 2
+        center_y = np.where(center_y >= 0, np.floor(center_y + 0.5), np.ceil(center_y - 0.5)).astype(np.int64)
+        if count > GHOST_LOD_COARSE:
+            bucket = np.minimum(bucket // 4 * 4, atlas.count - 1)
+            center_y &= ~1
+        index = (self.colors[ghosts] * self.anim_frames + anim) * atlas.count + bucket
+        if count > GHOST_LOD_SYNC:
+            # Ghosts with the same sprite at the same row cover each other exactly
+            keys = np.unique((index << 16) | (center_y + 0x8000))
+            index = keys >> 16
+            center_y = (keys & 0xFFFF) - 0x8000
         
-    def update(self):
-        self.x -= PIPE_SPEED
+        offsets = self.offsets[index]
+        positions = np.empty((len(index), 2), dtype=np.int64)
+        positions[:, 0] = BIRD_X + self.width // 2 - offsets[:, 0]
+        positions[:, 1] = center_y - offsets[:, 1]
+        screen.blits(zip(self.sprites[index], positions.tolist()), False)
+        self.drawn = len(index)
         
-    def draw(self, screen):
+        # One bounding rect for the layer, as for particles
+        corners = positions + self.sizes[index]
+        left, top = positions.min(axis=0)
+        right, bottom = corners.max(axis=0)
+        return pygame.Rect(int(left), int(top), int(right - left), int(bottom - top))
+
+class PipeColumnCache:
+    """Fully composed top and bottom pipe columns, evicted least recently used"""
+    def __init__(self, max_size=PIPE_CACHE_SIZE):
+        self.max_size = max_size
+        self.columns = OrderedDict()
+        self.masks = OrderedDict()
+        
+    def get(self, image, gap_y, base_y, gap=PIPE_GAP):
+        key = (gap_y, gap, int(base_y), image)
+        columns = self.columns.get(key)
+        if columns is None:
+            columns = compose_pipe_columns(image, gap_y, int(base_y), gap)
+            self.columns[key] = columns
+            if len(self.columns) > self.max_size:
+                self.columns.popitem(last=False)
+        else:
+            self.columns.move_to_end(key)
+        return columns
+    
+    def get_masks(self, image, gap_y, base_y, gap=PIPE_GAP):
+        """Collision masks of the top and bottom columns"""
+        key = (gap_y, gap, int(base_y), image)
+        masks = self.masks.get(key)
+        if masks is None:
+            masks = tuple(pygame.mask.from_surface(column) for column in self.get(image, gap_y, base_y, gap))
+            self.masks[key] = masks
+            if len(self.masks) > self.max_size:
+                self.masks.popitem(last=False)
+        else:
+            self.masks.move_to_end(key)
+        return masks
+    
+    def clear(self):
+        self.columns.clear()
+        self.masks.clear()
+
+def compose_pipe_columns(image, gap_y, base_y, gap=PIPE_GAP):
+    """Tile the pipe image into a top column ending at gap_y and a bottom column ending at base_y"""
+    width = image.get_width()
+    tile_height = image.get_height()
+    
+    # Top pipe (flipped), the last tile cropped to keep the cap at the gap
+    top_pipe = pygame.transform.flip(image, False, True)
+    top_column = pygame.Surface((width, gap_y), pygame.SRCALPHA)
+    for y in range(0, gap_y, tile_height):
+        crop_height = min(tile_height, gap_y - y)
+        # BLEND_RGBA_MAX onto the cleared surface copies pixels, alpha included
+        top_column.blit(top_pipe, (0, y), (0, tile_height - crop_height, width, crop_height),
+                        special_flags=pygame.BLEND_RGBA_MAX)
+    
+    # Bottom pipe - stop at ground level
+    bottom_pipe_y = gap_y + gap
+    bottom_height = max(0, base_y - bottom_pipe_y)
+    bottom_column = pygame.Surface((width, bottom_height), pygame.SRCALPHA)
+    for y in range(0, bottom_height, tile_height):
+        crop_height = min(tile_height, bottom_height - y)
+        bottom_column.blit(image, (0, y), (0, 0, width, crop_height),
+                           special_flags=pygame.BLEND_RGBA_MAX)
+    
+    return top_column, bottom_column
+
+pipe_column_cache = PipeColumnCache()
+
+class Pipe(core.Pipe):
+    __slots__ = ('image', 'columns', 'masks', 'pixel_collision')
+    
+    def __init__(self, x, image=None, base_y=None, rng=None, pixel_collision=False,
+                 gap_y=None, gap=PIPE_GAP):
+        super().__init__(x, base_y, image.get_width() if image else PIPE_WIDTH, rng, gap_y, gap)
+        self.image = image
+        self.columns = None
+        self.masks = None
+        self.pixel_collision = pixel_collision and image is not None
+        
+    def place(self, x, gap_y, gap):
+        super().place(x, gap_y, gap)
+        self.columns = None
+        self.masks = None
+        
+    def collides_with(self, bird):
+        if not (self.pixel_collision and bird.pixel_collision):
+            return super().collides_with(bird)
+        if self.masks is None:
+            self.masks = pipe_column_cache.get_masks(self.image, self.gap_y, self.base_y, self.gap)
+        top_mask, bottom_mask = self.masks
+        bird_mask, bird_x, bird_y = bird.get_mask()
+        bird_width, bird_height = bird_mask.get_size()
+        x = int(self.x)
+        
+        # Rect broad phase, then compare the opaque pixels
+        if core.rects_collide(bird_x, bird_y, bird_width, bird_height, x, 0, self.width, self.gap_y):
+            if top_mask.overlap(bird_mask, (bird_x - x, bird_y)):
+                return True
+        bottom_pipe_y = self.gap_y + self.gap
+        if core.rects_collide(bird_x, bird_y, bird_width, bird_height,
+                              x, bottom_pipe_y, self.width, bottom_mask.get_size()[1]):
+            if bottom_mask.overlap(bird_mask, (bird_x - x, bird_y - bottom_pipe_y)):
+                return True
+        return False
+        
+    def draw(self, screen, alpha=1.0):
+        x = lerp(self.prev_x, self.x, alpha)
         if self.image:
-            # Top pipe (flipped)
-            top_pipe = pygame.transform.flip(self.image, False, True)
-            pipe_height = self.gap_y
-            # Tile the pipe vertically
-            for y in range(0, pipe_height, self.image.get_height()):
-                if y + self.image.get_height() > pipe_height:
-                    # Crop the last tile
-                    crop_height = pipe_height - y
-                    cropped = pygame.Surface((self.image.get_width(), crop_height), pygame.SRCALPHA)
-                    cropped.blit(top_pipe, (0, 0), (0, self.image.get_height() - crop_height, self.image.get_width(), crop_height))
-                    screen.blit(cropped, (self.x, y))
-                else:
-                    screen.blit(top_pipe, (self.x, y))
-            
-            # Bottom pipe - stop at ground level
-            bottom_pipe_y = self.gap_y + PIPE_GAP
-            for y in range(bottom_pipe_y, int(self.base_y), self.image.get_height()):
-                if y + self.image.get_height() > self.base_y:
-                    # Crop the last tile to stop at ground
-                    crop_height = int(self.base_y - y)
-                    if crop_height > 0:
-                        cropped = pygame.Surface((self.image.get_width(), crop_height), pygame.SRCALPHA)
-                        cropped.blit(self.image, (0, 0), (0, 0, self.image.get_width(), crop_height))
-                        screen.blit(cropped, (self.x, y))
-                else:
-                    screen.blit(self.image, (self.x, y))
+            # Columns are composed once and shared by pipes with the same gap
+            if self.columns is None:
+                self.columns = pipe_column_cache.get(self.image, self.gap_y, self.base_y, self.gap)
+            top_column, bottom_column = self.columns
+            top_rect = screen.blit(top_column, (x, 0))
+            return top_rect.union(screen.blit(bottom_column, (x, self.gap_y + self.gap)))
         else:
             # Fallback to drawn pipes
-            pygame.draw.rect(screen, GREEN, (self.x, 0, self.width, self.gap_y))
-            pygame.draw.rect(screen, BLACK, (self.x, 0, self.width, self.gap_y), 2)
-            pygame.draw.rect(screen, GREEN, (self.x - 5, self.gap_y - 20, self.width + 10, 20))
-            pygame.draw.rect(screen, BLACK, (self.x - 5, self.gap_y - 20, self.width + 10, 20), 2)
-            bottom_pipe_y = self.gap_y + PIPE_GAP
-            pygame.draw.rect(screen, GREEN, (self.x, bottom_pipe_y, self.width, SCREEN_HEIGHT - bottom_pipe_y))
-            pygame.draw.rect(screen, BLACK, (self.x, bottom_pipe_y, self.width, SCREEN_HEIGHT - bottom_pipe_y), 2)
-            pygame.draw.rect(screen, GREEN, (self.x - 5, bottom_pipe_y, self.width + 10, 20))
-            pygame.draw.rect(screen, BLACK, (self.x - 5, bottom_pipe_y, self.width + 10, 20), 2)
+            pygame.draw.rect(screen, GREEN, (x, 0, self.width, self.gap_y))
+            pygame.draw.rect(screen, BLACK, (x, 0, self.width, self.gap_y), 2)
+            pygame.draw.rect(screen, GREEN, (x - 5, self.gap_y - 20, self.width + 10, 20))
+            pygame.draw.rect(screen, BLACK, (x - 5, self.gap_y - 20, self.width + 10, 20), 2)
+            bottom_pipe_y = self.gap_y + self.gap
+            pygame.draw.rect(screen, GREEN, (x, bottom_pipe_y, self.width, SCREEN_HEIGHT - bottom_pipe_y))
+            pygame.draw.rect(screen, BLACK, (x, bottom_pipe_y, self.width, SCREEN_HEIGHT - bottom_pipe_y), 2)
+            pygame.draw.rect(screen, GREEN, (x - 5, bottom_pipe_y, self.width + 10, 20))
+            pygame.draw.rect(screen, BLACK, (x - 5, bottom_pipe_y, self.width + 10, 20), 2)
+            return pygame.Rect(x - 5, 0, self.width + 10, SCREEN_HEIGHT)
+
+class TextCache:
+    """Rendered text surfaces keyed by font, text and colors, evicted least recently used"""
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
         
-    def collides_with(self, bird):
-        bird_rect = bird.get_rect()
+    def _lookup(self, key, build):
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = build()
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
         
-        # Top pipe collision
-        top_pipe_rect = pygame.Rect(self.x, 0, self.width, self.gap_y)
-        if bird_rect.colliderect(top_pipe_rect):
-            return True
+    def render(self, font, text, color):
+        return self._lookup((font, text, color), lambda: font.render(text, True, color))
+    
+    def clear(self):
+        self.surfaces.clear()
+
+class Hud:
+    """Draws the score, overlays and hints from cached surfaces"""
+    def __init__(self, font, small_font, tiny_font, images=None):
+        self.font = font
+        self.small_font = small_font
+        self.tiny_font = tiny_font
+        self.images = images
+        self.text = TextCache()
+        self.dims = {}
+        self.pause_layer = None
+        self.start_layer = None
+        self.game_over_layer = None
+        
+    def _blit_centered(self, screen, surface, center):
+        return screen.blit(surface, surface.get_rect(center=center))
+        
+    def _dim(self, screen, alpha):
+        """Darken the whole screen with a cached black surface of the given alpha"""
+        dim = self.dims.get(alpha)
+        if dim is None:
+            dim = self.dims[alpha] = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            dim.set_alpha(alpha)
+            dim.fill(BLACK)
+        return screen.blit(dim, (0, 0))
+        
+    def draw_score(self, screen, score):
+        # Re-rendered only when the score changes. The outline copies are
+        # blitted one by one, since baking them into one surface blends the
+        # antialiased edges differently
+        text = str(score)
+        outline = self.text.render(self.font, text, BLACK)
+        rect = outline.get_rect(center=(SCREEN_WIDTH // 2, 55))
+        dirty = rect.inflate(4, 4)
+        for dx, dy in SCORE_OUTLINE_OFFSETS:
+            screen.blit(outline, rect.move(dx, dy))
+        screen.blit(self.text.render(self.font, text, WHITE), rect)
+        return dirty
+        
+    def draw_controls_hint(self, screen, base_y):
+        controls_text = self.text.render(self.tiny_font, "Press P to Pause", (150, 150, 150))
+        return self._blit_centered(screen, controls_text, (SCREEN_WIDTH // 2, base_y - 20))
+        
+    def draw_pause(self, screen):
+        if self.pause_layer is None:
+            self.pause_layer = self.build_pause_layer()
+        rect = self._dim(screen, 180)
+        screen.blit(self.pause_layer, (0, 0))
+        return rect
+        
+    def draw_start(self, screen):
+        if self.start_layer is None:
+            if self.images and self.images.get('message'):
+                self.start_layer = self.images['message']
+            else:
+                self.start_layer = self.text.render(self.small_font, "Press SPACE to Start", WHITE)
+        return self._blit_centered(screen, self.start_layer, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+        
+    def draw_game_over(self, screen, score, high_score):
+        if self.game_over_layer is None:
+            self.game_over_layer = self.build_game_over_layer()
+        rect = self._dim(screen, 128)
+        screen.blit(self.game_over_layer, (0, 0))
+        
+        # Only the two values change between games
+        panel_width = 300
+        panel_x = (SCREEN_WIDTH - panel_width) // 2
+        panel_y = 180
+        score_value = self.text.render(self.font, str(score), (60, 55, 40))
+        screen.blit(score_value, score_value.get_rect(right=panel_x + panel_width - 25, centery=panel_y + 42))
+        best_value = self.text.render(self.font, str(high_score), (60, 55, 40))
+        screen.blit(best_value, best_value.get_rect(right=panel_x + panel_width - 25, centery=panel_y + 107))
+        return rect
+        
+    def build_pause_layer(self):
+        """The pause text, composited once and drawn over the dimmed screen"""
+        layer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        
+        pause_text = self.font.render("PAUSED", True, WHITE)
+        self._blit_centered(layer, pause_text, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 30))
+        
+        continue_text = self.small_font.render("Press P to Continue", True, WHITE)
+        self._blit_centered(layer, continue_text, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30))
+        return layer
+        
+    def build_game_over_layer(self):
+        """Panel, labels and restart button, composited once and drawn over the dimmed screen"""
+        layer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        
+        # Draw GAME OVER sprite or text
+        if self.images and self.images.get('gameover'):
+            self._blit_centered(layer, self.images['gameover'], (SCREEN_WIDTH // 2, 100))
+        else:
+            game_over_text = self.font.render("GAME OVER", True, RED)
+            self._blit_centered(layer, game_over_text, (SCREEN_WIDTH // 2, 100))
+        
+        # Draw score panel with rounded appearance
+        panel_width = 300
+        panel_height = 150
+        panel_x = (SCREEN_WIDTH - panel_width) // 2
+        panel_y = 180
+        
+        # Draw panel shadow
+        shadow_offset = 4
+        pygame.draw.rect(layer, (100, 95, 70), (panel_x + shadow_offset, panel_y + shadow_offset, panel_width, panel_height), border_radius=10)
+        
+        # Draw main panel
+        pygame.draw.rect(layer, (240, 230, 180), (panel_x, panel_y, panel_width, panel_height), border_radius=10)
+        pygame.draw.rect(layer, (200, 185, 130), (panel_x, panel_y, panel_width, panel_height), 5, border_radius=10)
+        
+        # Draw divider line
+        divider_y = panel_y + panel_height // 2
+        pygame.draw.line(layer, (200, 185, 130), (panel_x + 20, divider_y), (panel_x + panel_width - 20, divider_y), 2)
+        
+        # Draw labels, the values are drawn each frame on top of the layer
+        score_label = self.small_font.render("SCORE", True, (100, 90, 70))
+        layer.blit(score_label, (panel_x + 25, panel_y + 25))
+        best_label = self.small_font.render("BEST", True, (100, 90, 70))
+        layer.blit(best_label, (panel_x + 25, panel_y + 90))
+        
+        # Draw restart instruction with styled background
+        restart_y = panel_y + panel_height + 30
+        
+        # First render text to get its size
+        restart_text = self.tiny_font.render("Press SPACE to Restart", True, WHITE)
+        text_width = restart_text.get_width()
+        
+        # Make button fit text with padding
+        restart_width = text_width + 20
+        restart_height = 35
+        restart_x = (SCREEN_WIDTH - restart_width) // 2
+        
+        # Draw button shadow
+        pygame.draw.rect(layer, (40, 40, 40), (restart_x + 3, restart_y + 3, restart_width, restart_height), border_radius=8)
+        
+        # Draw button
+        pygame.draw.rect(layer, (70, 70, 70), (restart_x, restart_y, restart_width, restart_height), border_radius=8)
+        pygame.draw.rect(layer, (120, 120, 120), (restart_x, restart_y, restart_width, restart_height), 3, border_radius=8)
+        
+        self._blit_centered(layer, restart_text, (SCREEN_WIDTH // 2, restart_y + restart_height // 2))
+        
+        # Show bird color hint (smaller and closer)
+        color_hint = self.tiny_font.render("(New random color)", True, (180, 180, 180))
+        self._blit_centered(layer, color_hint, (SCREEN_WIDTH // 2, restart_y + restart_height + 15))
+        return layer
+
+class Renderer:
+    """Presents frames with full flips or, optionally, with dirty rectangles.
+    
+    In dirty-rect mode each frame restores only the rects drawn on the
+    previous frame from a cached background layer, and pushes just the
+    previous and current rects with pygame.display.update.
+    """
+    def __init__(self, screen, background, dirty_rects=False, display=True):
+        self.screen = screen
+        self.background = background
+        self.dirty_rects = dirty_rects
+        self.display = display
+        self.screen_rect = screen.get_rect()
+        self.previous = [self.screen_rect]
+        self.current = []
+        self.flip_started = self.flipped_at = time.perf_counter()
+        
+    def begin(self):
+        """Clear the screen to the background layer"""
+        self.current = []
+        if self.dirty_rects:
+            for rect in self.previous:
+                self.screen.blit(self.background, rect, rect)
+        else:
+            self.screen.blit(self.background, (0, 0))
             
-        # Bottom pipe collision - only up to ground level
-        bottom_pipe_y = self.gap_y + PIPE_GAP
-        bottom_pipe_height = self.base_y - bottom_pipe_y
-        bottom_pipe_rect = pygame.Rect(self.x, bottom_pipe_y, self.width, bottom_pipe_height)
-        if bird_rect.colliderect(bottom_pipe_rect):
-            return True
+    def mark(self, rect):
+        """Record a rect drawn this frame"""
+        if rect:
+            self.current.append(rect.clip(self.screen_rect))
             
-        return False
+    def invalidate(self):
+        """Force the next frame to be restored and presented in full"""
+        self.previous = [self.screen_rect]
         
-    def is_off_screen(self):
-        return self.x + self.width < 0
+    def present(self):
+        self.flip_started = time.perf_counter()
+        if self.dirty_rects:
+            if self.display:
+                pygame.display.update(self.previous + self.current)
+            self.previous = self.current
+        elif self.display:
+            pygame.display.flip()
+        self.flipped_at = time.perf_counter()
 
-class Game:
+class InputLatencyLog:
+    """Times from each flap press to the flip that first showed it.
+    
+    Presses are stamped when they are polled; a row is kept per press that
+    made the bird jump, with the delays until its simulation step and until
+    the frame after that step was presented.
+    """
     def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Flappy Bird")
+        self.rows = []
+        self.unpresented = []
+        
+    def applied(self, stamp, now):
+        self.unpresented.append((stamp, now))
+        
+    def presented(self, now):
+        for stamp, applied in self.unpresented:
+            self.rows.append((stamp, applied - stamp, now - stamp))
+        self.unpresented.clear()
+        
+    def summary(self):
+        """Press-to-flip latency percentiles in milliseconds"""
+        if not self.rows:
+            return 'no flaps recorded'
+        latency = np.array([row[2] for row in self.rows]) * 1e3
+        p50, p90, p99 = np.percentile(latency, (50, 90, 99))
+        return (f'{len(latency)} flaps, press to flip p50 {p50:.1f}ms, p90 {p90:.1f}ms, '
+                f'p99 {p99:.1f}ms, max {latency.max():.1f}ms')
+        
+    def export(self, path):
+        """Write one CSV row per flap"""
+        try:
+            with open(path, 'w') as f:
+                f.write('pressed_s,to_step_ms,to_flip_ms\n')
+                for stamp, to_step, to_flip in self.rows:
+                    f.write(f'{stamp:.6f},{to_step * 1e3:.3f},{to_flip * 1e3:.3f}\n')
+        except Exception as e:
+            print(f'Error saving input latencies: {e}')
+
+class FrameProfiler:
+    """Per-frame section timings kept in a ring buffer of the last frames.
+    
+    Game.run brackets each frame with begin_frame and end_frame. lap times
+    the top-level sections (events, update, draw, flip) back to back, and
+    add times sub-sections inside them. While Game.profiler is None nothing
+    is timed, so the cost of instrumentation is a few None checks a frame.
+    """
+    def __init__(self, capacity=PROFILE_FRAMES):
+        self.capacity = capacity
+        self.sections = {name: i for i, name in enumerate(PROFILE_SECTIONS)}
+        self.start = np.zeros(capacity)  # frame start, seconds since epoch
+        self.interval = np.zeros(capacity)  # previous frame start to this one
+        self.work = np.zeros(capacity)  # begin_frame to end_frame
+        self.begin = np.zeros((capacity, len(PROFILE_SECTIONS)))
+        self.duration = np.zeros((capacity, len(PROFILE_SECTIONS)))
+        self.pipes = np.zeros(capacity, dtype=np.int32)
+        self.particles = np.zeros(capacity, dtype=np.int32)
+        self.frames = 0
+        self.row = 0
+        self.epoch = time.perf_counter()
+        self.frame_start = self.last = self.epoch
+        self.previous_start = None
+        self.in_frame = False
+        self.overlay = None
+        
+    def begin_frame(self):
+        now = time.perf_counter()
+        row = self.row = self.frames % self.capacity
+        self.start[row] = now - self.epoch
+        self.interval[row] = now - self.previous_start if self.previous_start is not None else 0.0
+        self.begin[row] = 0.0
+        self.duration[row] = 0.0
+        self.frame_start = self.last = self.previous_start = now
+        self.in_frame = True
+        
+    def lap(self, name):
+        """Time a top-level section that ran since the previous lap"""
+        now = time.perf_counter()
+        i = self.sections[name]
+        self.begin[self.row, i] = self.last - self.epoch
+        self.duration[self.row, i] += now - self.last
+        self.last = now
+        
+    def add(self, name, start):
+        """Time a sub-section that began at perf_counter() value start"""
+        i = self.sections[name]
+        self.begin[self.row, i] = start - self.epoch
+        self.duration[self.row, i] += time.perf_counter() - start
+        
+    def end_frame(self, pipes, particles):
+        self.work[self.row] = time.perf_counter() - self.frame_start
+        self.pipes[self.row] = pipes
+        self.particles[self.row] = particles
+        self.frames += 1
+        self.in_frame = False
+        
+    def rows(self):
+        """Ring buffer rows from the oldest recorded frame to the newest"""
+        count = min(self.frames, self.capacity)
+        return np.arange(self.frames - count, self.frames) % self.capacity
+    
+    def stats(self):
+        """FPS and frame, work and section times in ms over the buffered frames"""
+        rows = self.rows()
+        intervals = self.interval[rows]
+        intervals = intervals[intervals > 0]
+        if len(intervals) == 0:
+            return None
+        frame_p50, frame_p99 = np.percentile(intervals, (50, 99)) * 1000
+        work_p50, work_p99 = np.percentile(self.work[rows], (50, 99)) * 1000
+        means = self.duration[rows].mean(axis=0) * 1000
+        return {
+            'fps': len(intervals) / intervals.sum(),
+            'frame_p50': frame_p50, 'frame_p99': frame_p99,
+            'work_p50': work_p50, 'work_p99': work_p99,
+            'sections': dict(zip(PROFILE_SECTIONS, means)),
+        }
+    
+    def draw_overlay(self, screen, font, pipes, particles):
+        """Draw the stats box in the top-left corner, re-rendered a few times a second"""
+        if self.overlay is None or self.frames % PROFILE_OVERLAY_REFRESH == 0:
+            stats = self.stats()
+            if stats is None:
+                lines = ['profiling...']
+            else:
+                sections = stats['sections']
+                lines = [
+                    f"FPS {stats['fps']:.1f}",
+                    f"frame ms p50 {stats['frame_p50']:.1f} p99 {stats['frame_p99']:.1f}",
+                    f"work ms p50 {stats['work_p50']:.2f} p99 {stats['work_p99']:.2f}",
+                    f"update {sections['update']:.2f} draw {sections['draw']:.2f}",
+                    f"flip {sections['flip']:.2f} pipes {sections['pipes']:.2f}",
+                    f"pipes {pipes} particles {particles}",
+                ]
+            rendered = [font.render(line, True, WHITE) for line in lines]
+            width = max(text.get_width() for text in rendered) + 8
+            height = sum(text.get_height() for text in rendered) + 8
+            self.overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+            self.overlay.fill((0, 0, 0, 160))
+            y = 4
+            for text in rendered:
+                self.overlay.blit(text, (4, y))
+                y += text.get_height()
+        return screen.blit(self.overlay, (4, 4))
+    
+    def export(self, path):
+        """Write the buffered frames as CSV, or as Chrome trace JSON for any other extension"""
+        rows = self.rows()
+        if path.endswith('.csv'):
+            with open(path, 'w') as f:
+                f.write(','.join(['frame', 'start_ms', 'interval_ms', 'work_ms'] +
+                                 [f'{name}_ms' for name in PROFILE_SECTIONS] + ['pipes', 'particles']) + '\n')
+                for frame, row in enumerate(rows, self.frames - len(rows)):
+                    values = [self.start[row], self.interval[row], self.work[row], *self.duration[row]]
+                    f.write(f'{frame},' + ','.join(f'{v * 1000:.3f}' for v in values) +
+                            f',{self.pipes[row]},{self.particles[row]}\n')
+            return
+        
+        # Chrome trace events (chrome://tracing, Perfetto): times in microseconds
+        events = []
+        for frame, row in enumerate(rows, self.frames - len(rows)):
+            start = self.start[row] * 1e6
+            events.append({'name': 'frame', 'ph': 'X', 'pid': 1, 'tid': 1, 'ts': start,
+                           'dur': self.work[row] * 1e6, 'args': {'frame': frame}})
+            for name, i in self.sections.items():
+                if self.duration[row, i] > 0:
+                    events.append({'name': name, 'ph': 'X', 'pid': 1, 'tid': 1,
+                                   'ts': self.begin[row, i] * 1e6, 'dur': self.duration[row, i] * 1e6})
+            events.append({'name': 'objects', 'ph': 'C', 'pid': 1, 'tid': 1, 'ts': start,
+                           'args': {'pipes': int(self.pipes[row]), 'particles': int(self.particles[row])}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+class MemoryProfiler:
+    """Per-frame allocations and garbage collector pauses, for long soak runs.
+    
+    Each frame records the net change in allocated memory blocks and in
+    objects tracked by the garbage collector, as seen by gc's generation 0
+    counter, plus the time spent in collections during that frame (timed
+    with gc.callbacks). Totals cover the whole run; the ring buffer keeps the
+    last frames for export. With trace, tracemalloc runs too, and the report
+    lists the sites whose memory grew since a baseline taken after
+    MEMORY_WARMUP frames.
+    """
+    def __init__(self, capacity=PROFILE_FRAMES, trace=True):
+        self.capacity = capacity
+        self.blocks = np.zeros(capacity, dtype=np.int64)
+        self.tracked = np.zeros(capacity, dtype=np.int64)
+        self.pause = np.zeros(capacity)
+        self.traced = np.zeros(capacity, dtype=np.int64)
+        self.frames = 0
+        self.row = 0
+        # Whole-run totals, from the end of the warm-up on
+        self.steady_frames = 0
+        self.steady_blocks = 0
+        self.steady_tracked = 0
+        self.max_blocks = 0
+        self.max_tracked = 0
+        self.collections = [0, 0, 0]
+        self.pauses = []  # (frame, generation, seconds) per collection
+        self.gc_started = None
+        self.gc_carry = 0
+        self.frame_blocks = 0
+        self.frame_count = 0
+        import tracemalloc
+        self.started_trace = trace and not tracemalloc.is_tracing()
+        if self.started_trace:
+            tracemalloc.start(MEMORY_TRACE_DEPTH)
+        self.trace = trace
+        self.baseline = None
+        self.baseline_traced = 0
+        gc.callbacks.append(self.on_gc)
+        
+    def on_gc(self, phase, info):
+        if phase == 'start':
+            # Generation 0's count resets in the collection; carry it into the frame
+            self.gc_carry += gc.get_count()[0]
+            self.gc_started = time.perf_counter()
+        elif self.gc_started is not None:
+            pause = time.perf_counter() - self.gc_started
+            self.gc_started = None
+            self.pause[self.row] += pause
+            self.collections[info['generation']] += 1
+            self.pauses.append((self.frames, info['generation'], pause))
+        
+    def begin_frame(self):
+        self.row = self.frames % self.capacity
+        self.pause[self.row] = 0.0
+        self.gc_carry = 0
+        self.frame_count = gc.get_count()[0]
+        self.frame_blocks = sys.getallocatedblocks()
+        
+    def end_frame(self):
+        row = self.row
+        blocks = self.blocks[row] = sys.getallocatedblocks() - self.frame_blocks
+        tracked = self.tracked[row] = gc.get_count()[0] + self.gc_carry - self.frame_count
+        if self.trace:
+            import tracemalloc
+            self.traced[row] = tracemalloc.get_traced_memory()[0]
+        self.frames += 1
+        if self.frames == MEMORY_WARMUP:
+            if self.trace:
+                self.baseline = tracemalloc.take_snapshot()
+                self.baseline_traced = tracemalloc.get_traced_memory()[0]
+        elif self.frames > MEMORY_WARMUP:
+            self.steady_frames += 1
+            self.steady_blocks += blocks
+            self.steady_tracked += tracked
+            self.max_blocks = max(self.max_blocks, blocks)
+            self.max_tracked = max(self.max_tracked, tracked)
+            
+    def rows(self):
+        """Ring buffer rows from the oldest recorded frame to the newest"""
+        count = min(self.frames, self.capacity)
+        return np.arange(self.frames - count, self.frames) % self.capacity
+    
+    def report(self):
+        """Lines summarizing the run after the warm-up"""
+        import tracemalloc
+        # Snapshot before anything here allocates, or imports, on its own
+        snapshot = tracemalloc.take_snapshot() if self.baseline is not None else None
+        current = tracemalloc.get_traced_memory()[0] if snapshot else 0
+        frames = max(1, self.steady_frames)
+        pauses = np.array([pause for frame, _, pause in self.pauses if frame >= MEMORY_WARMUP]) * 1000
+        lines = [
+            f'{self.steady_frames} frames after a {MEMORY_WARMUP}-frame warm-up',
+            f'net memory blocks per frame: mean {self.steady_blocks / frames:+.3f}, max {self.max_blocks:+d}',
+            f'net gc-tracked objects per frame: mean {self.steady_tracked / frames:+.3f}, max {self.max_tracked:+d}',
+            f'collections by generation: {self.collections[0]}/{self.collections[1]}/{self.collections[2]}',
+        ]
+        if len(pauses):
+            lines.append(f'gc pauses: {len(pauses)}, total {pauses.sum():.1f}ms, '
+                         f'p99 {np.percentile(pauses, 99):.3f}ms, max {pauses.max():.3f}ms')
+        else:
+            lines.append('gc pauses: none')
+        if snapshot:
+            lines.append(f'traced memory: {self.baseline_traced / 1024:.0f}KiB at baseline, '
+                         f'{current / 1024:.0f}KiB now ({(current - self.baseline_traced) / 1024:+.1f}KiB)')
+            stats = snapshot.compare_to(self.baseline, 'lineno')
+            grown = [stat for stat in stats if stat.size_diff > 0][:MEMORY_TOP_SITES]
+            for stat in grown:
+                frame = stat.traceback[0]
+                lines.append(f'  {stat.size_diff / 1024:+8.1f}KiB {stat.count_diff:+6d} blocks  '
+                             f'{os.path.basename(frame.filename)}:{frame.lineno}')
+        return lines
+    
+    def export(self, path):
+        """Write the buffered frames as CSV"""
+        with open(path, 'w') as f:
+            f.write('frame,blocks,tracked,gc_ms,traced_kib\n')
+            for frame, row in enumerate(self.rows(), self.frames - min(self.frames, self.capacity)):
+                f.write(f'{frame},{self.blocks[row]},{self.tracked[row]},{self.pause[row] * 1000:.3f},'
+                        f'{self.traced[row] / 1024:.1f}\n')
+    
+    def close(self):
+        if self.on_gc in gc.callbacks:
+            gc.callbacks.remove(self.on_gc)
+        if self.started_trace:
+            import tracemalloc
+            tracemalloc.stop()
+            self.started_trace = False
+
+class Game(core.Simulation):
+    def __init__(self, dirty_rects=DIRTY_RECTS, headless=False, seed=None, replay_dir=None,
+                 profile=False, profile_path=None, pixel_collision=PIXEL_COLLISION,
+                 leaderboard_path=LEADERBOARD_FILE, player=None, screen=None, difficulty='flat',
+                 audio_buffer=AUDIO_BUFFER, audio_log=False, vsync=VSYNC, late_input=LATE_INPUT,
+                 latency_path=None, spectate=None, ghosts=None, ghost_limit=GHOST_LIMIT,
+                 memory_profile=False, memory_path=None, capture_path=None):
+        # Headless games draw into an off-screen surface (screen, if given) and
+        # never start video or audio
+        self.headless = headless
+        self.vsync = False
+        if headless:
+            self.screen = screen if screen is not None else pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        else:
+            pygame.display.init()
+            if vsync:
+                try:
+                    # pygame only honours vsync on SCALED or OpenGL displays
+                    self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SCALED, vsync=1)
+                    self.vsync = True
+                except pygame.error as e:
+                    print(f'Error enabling vsync: {e}')
+            if not self.vsync:
+                self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("Flappy Bird")
         self.clock = pygame.time.Clock()
         
         # Load assets
         print('Loading assets...')
         assets_dir = download_assets()
         self.images = load_assets(assets_dir)
-        self.sounds = load_sounds(assets_dir)
+        self.audio = None if headless else AudioPlayer(assets_dir, audio_buffer, log=audio_log)
         
         # Load custom font or use system fonts
-        if self.images and self.images.get('custom_font'):
-            try:
-                self.font = pygame.font.Font(self.images['custom_font'], 42)
-                self.small_font = pygame.font.Font(self.images['custom_font'], 20)
-                self.tiny_font = pygame.font.Font(self.images['custom_font'], 14)
-            except:
-                self.font = pygame.font.SysFont('arial', 54, bold=True)
-                self.small_font = pygame.font.SysFont('arial', 24, bold=True)
-                self.tiny_font = pygame.font.SysFont('arial', 18, bold=False)
-        else:
-            self.font = pygame.font.SysFont('arial', 54, bold=True)
-            self.small_font = pygame.font.SysFont('arial', 24, bold=True)
-            self.tiny_font = pygame.font.SysFont('arial', 18, bold=False)
+        self.font, self.small_font, self.tiny_font = load_fonts(self.images)
         
-        # Bird animation timer
-        self.bird_anim_timer = pygame.USEREVENT + 1
-        pygame.time.set_timer(self.bird_anim_timer, 200)
+        self.hud = Hud(self.font, self.small_font, self.tiny_font, self.images)
         
-        # Scale background to fit screen
-        if self.images and self.images.get('background'):
-            self.images['background'] = pygame.transform.scale(self.images['background'], (SCREEN_WIDTH, SCREEN_HEIGHT))
+        # Bird animation runs on simulation steps rather than a wall-clock timer
+        self.anim_steps = 0
         
-        # Scale base to fit screen width and position at bottom
-        if self.images and self.images.get('base'):
-            base_height = self.images['base'].get_height()
-            self.images['base'] = pygame.transform.scale(self.images['base'], (SCREEN_WIDTH, base_height))
-            self.base_y = SCREEN_HEIGHT - base_height
-        else:
-            self.base_y = SCREEN_HEIGHT - 50
+        # Pre-rotate every bird frame so Bird.draw is a lookup and a blit
+        self.pixel_collision = pixel_collision
+        if self.images and self.images.get('bird_frames'):
+            bird_rotation_atlas.prebuild(self.images['bird_frames'], masks=pixel_collision)
+        
+        # Scale background and base to the screen, and put the base at the bottom
+        base_y = fit_scenery(self.images)
+        
+        # Static background layer in the screen's format, restored under dirty rects
+        self.renderer = Renderer(self.screen, background_layer(self.screen, self.images), dirty_rects,
+                                 display=not headless)
+        
+        if self.images and self.images.get('pipe'):
+            self.pipe_width = self.images['pipe'].get_width()
+        
+        # Scores are written by the leaderboard's own thread; without a path
+        # the high score is kept in memory only
+        from leaderboard import Leaderboard, default_player
+        self.player = player or default_player()
+        self.leaderboard = Leaderboard(leaderboard_path)
+        if leaderboard_path:
+            self.leaderboard.import_high_score(HIGH_SCORE_FILE, self.player)
+        
+        # Finished runs are saved here as replays when set; replays assume box
+        # collisions on the flat course
+        if replay_dir and pixel_collision:
+            print('Replays are not recorded with pixel collisions')
+            replay_dir = None
+        if replay_dir and difficulty not in ('flat', core.flat):
+            print('Replays are only recorded on the flat difficulty')
+            replay_dir = None
+        self.replay_dir = replay_dir
+        
+        # Frame timings; F3 shows the overlay and starts profiling if needed
+        self.profiler = FrameProfiler() if profile or profile_path else None
+        self.profile_path = profile_path
+        self.show_profile = False
         
-        self.base_x = 0
-        self.reset()
+        # Allocations and GC pauses per frame, reported on exit
+        self.memory = MemoryProfiler() if memory_profile or memory_path else None
+        self.memory_path = memory_path
         
-    def reset(self):
-        # Select random bird color
-        if not hasattr(self, 'bird_color'):
-            self.bird_color = random.choice(['yellow', 'blue', 'red'])
+        # Flap presses wait here, stamped for the latency log, until the next step
+        self.pending_flaps = deque()
+        self.late_input = late_input
+        self.latency_log = InputLatencyLog() if latency_path else None
+        self.latency_path = latency_path
         
+        # Spectators watching over a local socket get the state after every frame's steps
+        self.spectators = None
+        if spectate:
+            from spectator import SpectatorServer
+            self.spectators = SpectatorServer(spectate)
+        
+        # Recorded runs (Replays) raced as ghost birds, stepped with the game's own frames
+        self.ghosts = None
+        if ghosts and self.images and self.images.get('bird_frames'):
+            self.ghosts = GhostLayer(self.images['bird_frames'], ghost_limit)
+            self.ghosts.load_replays(ghosts)
+        
+        # Every drawn frame is copied into a ring of slots and written out by a
+        # background thread; the game only waits when all slots are queued
+        self.capture = None
+        if capture_path:
+            from capture import FrameCapture
+            self.capture = FrameCapture(capture_path, self.screen, FPS)
+        
+        # Bake every particle color's sprites now rather than on a color's first flap
+        self.particles = ParticleSystem()
+        for color in (*JUMP_PARTICLE_COLORS.values(), WHITE, SCORE_PARTICLE_COLOR):
+            self.particles.color_index(color)
+        super().__init__(base_y, seed, difficulty)
+        
+    def reset(self, seed=None, course=None):
+        # Bird color and particles follow from the game's seed as well
+        if seed is None:
+            seed = course.seed if course is not None else core.new_seed()
+        seed = core.check_seed(seed)
+        self.bird_color = random.Random(seed).choice(BIRD_COLORS)
+        self.particles.rng = np.random.default_rng(seed)
+        
+        super().reset(seed, course)
+        self.particles.clear()
+        self.pending_flaps.clear()
+        
+        self.high_score = self.leaderboard.best(self.player)
+                
+    def make_bird(self):
         if self.images and 'bird_frames' in self.images:
             bird_frames = self.images['bird_frames'].get(self.bird_color, self.images['bird_frames']['yellow'])
         else:
             bird_frames = None
-        
-        self.bird = Bird(bird_frames)
-        self.pipes = []
-        self.score = 0
-        self.frame_count = 0
-        self.game_over = False
-        self.game_started = False
-        self.paused = False
-        self.particles = []
-        
-        # Load high score from file
-        if not hasattr(self, 'high_score'):
-            try:
-                with open('highscore.txt', 'r') as f:
-                    self.high_score = int(f.read())
-            except:
-                self.high_score = 0
+        return Bird(bird_frames, self.pixel_collision)
+    
+    def make_pipe(self, x, gap_y=None, gap=PIPE_GAP):
+        pipe_image = self.images.get('pipe') if self.images else None
+        return Pipe(x, pipe_image, self.base_y, pixel_collision=self.pixel_collision, gap_y=gap_y, gap=gap)
         
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
-            if event.type == self.bird_anim_timer:
-                self.bird.animate()
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
                     if self.game_over:
-                        # Change bird color on restart
-                        self.bird_color = random.choice(['yellow', 'blue', 'red'])
+                        # Restart with a new seed, and so a new bird color
                         self.reset()
-                    elif not self.game_started:
-                        self.game_started = True
-                        self.bird.jump()
-                        if self.sounds:
-                            self.sounds['wing'].play()
-                        # Create particles on jump
-                        self.create_jump_particles()
-                    elif not self.paused:
-                        self.bird.jump()
-                        if self.sounds:
-                            self.sounds['wing'].play()
-                        # Create particles on jump
-                        self.create_jump_particles()
-                if event.key == pygame.K_p and self.game_started and not self.game_over:
-                    self.paused = not self.paused
+                    else:
+                        self.pending_flaps.append(time.perf_counter())
+                if event.key == pygame.K_p:
+                    # Earlier flaps still count before the game pauses
+                    self.apply_input()
+                    self.toggle_pause()
+                if event.key == pygame.K_F3:
+                    self.show_profile = not self.show_profile
                 if event.key == pygame.K_ESCAPE:
                     return False
         return True
     
+    def apply_input(self):
+        """Flap for each pending press"""
+        pending = self.pending_flaps
+        while pending:
+            stamp = pending.popleft()
+            if self.flap() and self.latency_log:
+                self.latency_log.applied(stamp, time.perf_counter())
+    
+    def on_flap(self):
+        if self.audio:
+            self.audio.play('wing')
+        # Create particles on jump
+        self.create_jump_particles()
+        
+    def on_score(self):
+        if self.audio:
+            self.audio.play('point')
+        # Create score particles
+        self.create_score_particles()
+        
+    def on_crash(self, cause):
+        if self.audio:
+            self.audio.play(cause)
+    
     def create_jump_particles(self):
         """Create particles when bird jumps"""
-        bird_colors = {
-            'yellow': (255, 215, 0),
-            'blue': (100, 149, 237),
-            'red': (220, 20, 60)
-        }
-        color = bird_colors.get(self.bird_color, (255, 255, 255))
-        for _ in range(5):
-            self.particles.append(Particle(self.bird.x + self.bird.width // 2, 
-                                          self.bird.y + self.bird.height, color))
+        color = JUMP_PARTICLE_COLORS.get(self.bird_color, WHITE)
+        self.particles.emit(self.bird.x + self.bird.width // 2,
+                            self.bird.y + self.bird.height, color, JUMP_PARTICLES)
     
     def create_score_particles(self):
         """Create particles when scoring"""
-        for _ in range(10):
-            self.particles.append(Particle(SCREEN_WIDTH // 2, 60, (255, 215, 0)))
+        self.particles.emit(SCREEN_WIDTH // 2, 60, SCORE_PARTICLE_COLOR, SCORE_PARTICLES)
         
     def update(self):
+        """Step once, first flapping for the pending presses"""
+        self.apply_input()
+        
+        # Animate the bird
+        self.anim_steps += 1
+        if self.anim_steps % BIRD_ANIM_STEPS == 0:
+            self.bird.animate()
+        
         # Update particles always
-        for particle in self.particles[:]:
-            particle.update()
-            if particle.is_dead():
-                self.particles.remove(particle)
+        self.particles.update()
         
-        if not self.game_started or self.game_over or self.paused:
-            return
-            
-        # Update bird
-        self.bird.update()
-        
-        # Check if bird hit ground or ceiling
-        if self.bird.y + self.bird.height >= self.base_y or self.bird.y < 0:
-            if not self.game_over:
-                if self.sounds:
-                    self.sounds['die'].play()
-                self.save_high_score()
-            self.game_over = True
-            
-        # Update pipes
-        self.frame_count += 1
-        if self.frame_count % PIPE_SPAWN_FREQUENCY == 0:
-            pipe_image = self.images.get('pipe') if self.images else None
-            self.pipes.append(Pipe(SCREEN_WIDTH, pipe_image, self.base_y))
-            
-        for pipe in self.pipes[:]:
-            pipe.update()
-            
-            # Check collision
-            if pipe.collides_with(self.bird):
-                if not self.game_over:
-                    if self.sounds:
-                        self.sounds['hit'].play()
-                    self.save_high_score()
-                self.game_over = True
-                
-            # Check if bird passed pipe
-            if not pipe.passed and pipe.x + pipe.width < self.bird.x:
-                pipe.passed = True
-                self.score += 1
-                if self.sounds:
-                    self.sounds['point'].play()
-                # Create score particles
-                self.create_score_particles()
-                
-            # Remove off-screen pipes
-            if pipe.is_off_screen():
-                self.pipes.remove(pipe)
+        was_over = self.game_over
+        super().update()
+        
+        # Save the run once its final frame, scoring included, has been simulated
+        if self.game_over and not was_over:
+            self.save_high_score()
+            if self.replay_dir:
+                self.save_replay()
+    
+    def spectator_state(self):
+        """What a spectator needs to draw the current frame, as a tuple"""
+        import spectator
+        flags = (self.game_started and spectator.STARTED) | (self.game_over and spectator.GAME_OVER) | \
+                (self.paused and spectator.PAUSED)
+        return (self.frame_count, self.seed, self.bird.y, self.bird.velocity, int(self.base_x),
+                self.score, flags, BIRD_COLORS.index(self.bird_color), self.pipe_index,
+                tuple((int(pipe.x), pipe.gap_y, pipe.gap) for pipe in self.pipes))
     
     def save_high_score(self):
-        """Save high score if current score is higher"""
-        if self.score > self.high_score:
-            self.high_score = self.score
-            try:
-                with open('highscore.txt', 'w') as f:
-                    f.write(str(self.high_score))
-            except:
-                pass
+        """Queue the finished run for the leaderboard and update the high score"""
+        self.leaderboard.submit(self.player, self.seed, self.score, self.frame_count,
+                                self.difficulty.__name__)
+        self.high_score = max(self.high_score, self.score)
                 
-    def draw(self):
+    def save_replay(self):
+        """Save the finished run to replay_dir as <seed>.fbr"""
+        from replay import Replay
+        try:
+            os.makedirs(self.replay_dir, exist_ok=True)
+            path = os.path.join(self.replay_dir, f'{self.seed}.fbr')
+            Replay.from_simulation(self).save(path)
+        except OSError as e:
+            print(f'Error saving replay: {e}')
+                
+    def draw(self, alpha=1.0):
+        """Render the game, interpolating positions alpha of the way into the last step"""
+        # A game that isn't stepping keeps the last step's previous positions,
+        # so interpolating would redraw it somewhere else every frame
+        running = self.game_started and not self.game_over and not self.paused
+        if not running:
+            alpha = 1.0
+        
         # Draw background
-        if self.images and self.images.get('background'):
-            self.screen.blit(self.images['background'], (0, 0))
-        else:
-            self.screen.fill(BLUE)
+        renderer = self.renderer
+        renderer.begin()
         
-        # Draw and scroll base (ground)
+        # Draw base (ground)
         if self.images and self.images.get('base'):
-            if self.game_started and not self.game_over:
-                self.base_x -= PIPE_SPEED
-                if self.base_x <= -SCREEN_WIDTH:
-                    self.base_x = 0
-            self.screen.blit(self.images['base'], (self.base_x, self.base_y))
-            self.screen.blit(self.images['base'], (self.base_x + SCREEN_WIDTH, self.base_y))
+            base_shift = self.base_x - self.prev_base_x
+            if base_shift > 0:
+                # Wrapped around; the ground repeats every SCREEN_WIDTH pixels
+                base_shift -= SCREEN_WIDTH
+            base_x = self.prev_base_x + base_shift * alpha
+            # Redrawn every frame so restored rects never leave holes in it
+            ground = self.screen.blit(self.images['base'], (base_x, self.base_y))
+            ground.union_ip(self.screen.blit(self.images['base'], (base_x + SCREEN_WIDTH, self.base_y)))
+            if base_shift:
+                renderer.mark(ground)
+        
+        # Only frames begun by run() are timed; other callers would write
+        # into a finished frame's row
+        profiler = self.profiler if self.profiler and self.profiler.in_frame else None
+        
+        # Draw ghosts under the bird
+        if self.ghosts:
+            if profiler:
+                start = time.perf_counter()
+            renderer.mark(self.ghosts.draw(self.screen, self.frame_count, alpha, self.bird.y))
+            if profiler:
+                profiler.add('ghosts', start)
         
         # Draw bird
-        self.bird.draw(self.screen)
+        renderer.mark(self.bird.draw(self.screen, alpha))
         
         # Draw pipes
+        if profiler:
+            start = time.perf_counter()
         for pipe in self.pipes:
-            pipe.draw(self.screen)
+            renderer.mark(pipe.draw(self.screen, alpha))
+        if profiler:
+            profiler.add('pipes', start)
         
         # Draw particles
-        for particle in self.particles:
-            particle.draw(self.screen)
+        if profiler:
+            start = time.perf_counter()
+        renderer.mark(self.particles.draw(self.screen))
+        if profiler:
+            profiler.add('particles', start)
             
         # Draw score with outline for visibility
         if self.game_started and not self.game_over:
-            score_str = str(self.score)
-            # Draw outline
-            for dx, dy in [(-2, -2), (-2, 2), (2, -2), (2, 2), (-2, 0), (2, 0), (0, -2), (0, 2)]:
-                score_outline = self.font.render(score_str, True, BLACK)
-                outline_rect = score_outline.get_rect(center=(SCREEN_WIDTH // 2 + dx, 55 + dy))
-                self.screen.blit(score_outline, outline_rect)
-            
-            # Draw main score
-            score_text = self.font.render(score_str, True, WHITE)
-            score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, 55))
-            self.screen.blit(score_text, score_rect)
+            renderer.mark(self.hud.draw_score(self.screen, self.score))
         
         # Draw pause overlay
         if self.paused:
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            overlay.set_alpha(180)
-            overlay.fill((0, 0, 0))
-            self.screen.blit(overlay, (0, 0))
-            
-            pause_text = self.font.render("PAUSED", True, WHITE)
-            pause_rect = pause_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 30))
-            self.screen.blit(pause_text, pause_rect)
-            
-            continue_text = self.small_font.render("Press P to Continue", True, WHITE)
-            continue_rect = continue_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30))
-            self.screen.blit(continue_text, continue_rect)
+            renderer.mark(self.hud.draw_pause(self.screen))
         
         # Draw start message
         if not self.game_started:
-            if self.images and self.images.get('message'):
-                msg = self.images['message']
-                msg_rect = msg.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-                self.screen.blit(msg, msg_rect)
-            else:
-                start_text = self.small_font.render("Press SPACE to Start", True, WHITE)
-                start_rect = start_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-                self.screen.blit(start_text, start_rect)
+            renderer.mark(self.hud.draw_start(self.screen))
             
         # Draw game over screen
         if self.game_over:
-            # Draw semi-transparent overlay
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            overlay.set_alpha(128)
-            overlay.fill((0, 0, 0))
-            self.screen.blit(overlay, (0, 0))
-            
-            # Draw GAME OVER sprite or text
-            if self.images and self.images.get('gameover'):
-                gameover = self.images['gameover']
-                gameover_rect = gameover.get_rect(center=(SCREEN_WIDTH // 2, 100))
-                self.screen.blit(gameover, gameover_rect)
-            else:
-                game_over_text = self.font.render("GAME OVER", True, RED)
-                game_over_rect = game_over_text.get_rect(center=(SCREEN_WIDTH // 2, 100))
-                self.screen.blit(game_over_text, game_over_rect)
-            
-            # Draw score panel with rounded appearance
-            panel_width = 300
-            panel_height = 150
-            panel_x = (SCREEN_WIDTH - panel_width) // 2
-            panel_y = 180
-            
-            # Draw panel shadow
-            shadow_offset = 4
-            pygame.draw.rect(self.screen, (100, 95, 70), (panel_x + shadow_offset, panel_y + shadow_offset, panel_width, panel_height), border_radius=10)
-            
-            # Draw main panel
-            pygame.draw.rect(self.screen, (240, 230, 180), (panel_x, panel_y, panel_width, panel_height), border_radius=10)
-            pygame.draw.rect(self.screen, (200, 185, 130), (panel_x, panel_y, panel_width, panel_height), 5, border_radius=10)
-            
-            # Draw divider line
-            divider_y = panel_y + panel_height // 2
-            pygame.draw.line(self.screen, (200, 185, 130), (panel_x + 20, divider_y), (panel_x + panel_width - 20, divider_y), 2)
-            
-            # Draw scores with better styling
-            score_label = self.small_font.render("SCORE", True, (100, 90, 70))
-            self.screen.blit(score_label, (panel_x + 25, panel_y + 25))
-            score_value = self.font.render(str(self.score), True, (60, 55, 40))
-            score_value_rect = score_value.get_rect(right=panel_x + panel_width - 25, centery=panel_y + 42)
-            self.screen.blit(score_value, score_value_rect)
-            
-            best_label = self.small_font.render("BEST", True, (100, 90, 70))
-            self.screen.blit(best_label, (panel_x + 25, panel_y + 90))
-            best_value = self.font.render(str(self.high_score), True, (60, 55, 40))
-            best_value_rect = best_value.get_rect(right=panel_x + panel_width - 25, centery=panel_y + 107)
-            self.screen.blit(best_value, best_value_rect)
-            
-            # Draw restart instruction with styled background
-            restart_y = panel_y + panel_height + 30
-            
-            # First render text to get its size
-            restart_text = self.tiny_font.render("Press SPACE to Restart", True, WHITE)
-            text_width = restart_text.get_width()
-            
-            # Make button fit text with padding
-            restart_width = text_width + 20
-            restart_height = 35
-            restart_x = (SCREEN_WIDTH - restart_width) // 2
-            
-            # Draw button shadow
-            pygame.draw.rect(self.screen, (40, 40, 40), (restart_x + 3, restart_y + 3, restart_width, restart_height), border_radius=8)
-            
-            # Draw button
-            pygame.draw.rect(self.screen, (70, 70, 70), (restart_x, restart_y, restart_width, restart_height), border_radius=8)
-            pygame.draw.rect(self.screen, (120, 120, 120), (restart_x, restart_y, restart_width, restart_height), 3, border_radius=8)
-            
-            restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, restart_y + restart_height // 2))
-            self.screen.blit(restart_text, restart_rect)
-            
-            # Show bird color hint (smaller and closer)
-            color_hint = self.tiny_font.render("(New random color)", True, (180, 180, 180))
-            color_rect = color_hint.get_rect(center=(SCREEN_WIDTH // 2, restart_y + restart_height + 15))
-            self.screen.blit(color_hint, color_rect)
+            renderer.mark(self.hud.draw_game_over(self.screen, self.score, self.high_score))
         
         # Draw controls hint above the ground (when playing)
-        if self.game_started and not self.game_over and not self.paused:
-            controls_text = self.tiny_font.render("Press P to Pause", True, (150, 150, 150))
-            controls_rect = controls_text.get_rect(center=(SCREEN_WIDTH // 2, self.base_y - 20))
-            self.screen.blit(controls_text, controls_rect)
+        if running:
+            renderer.mark(self.hud.draw_controls_hint(self.screen, self.base_y))
+        
+        # Draw frame timing overlay
+        if profiler:
+            if self.show_profile:
+                renderer.mark(profiler.draw_overlay(self.screen, self.tiny_font,
+                                                    len(self.pipes), len(self.particles)))
+            profiler.lap('draw')
             
-        pygame.display.flip()
+        renderer.present()
+        if profiler:
+            profiler.lap('flip')
+        
+    def run(self, fast_forward=0, render=True, max_steps=None):
+        """Run the game loop with a fixed simulation timestep.
         
-    def run(self):
+        In real time the simulation steps at SIM_RATE however fast frames are
+        rendered, and drawing interpolates between the last two steps. With
+        fast_forward=K each frame runs K steps without waiting, and with
+        render=False nothing is drawn at all. Headless games have no input
+        and never wait, and nothing ends them but max_steps, which they
+        require. With a profiler, frame timings are written to
+        profile_path on exit, and with a memory profiler its report is
+        printed (and its frames written to memory_path). With a capture,
+        every drawn frame is handed to it and its output finished on exit.
+        Returns the number of steps run.
+        
+        Flap presses polled at the start of a frame are applied before its
+        first step, so catching up never holds them back. With late_input,
+        input is polled again before every step, and with vsync the loop sleeps after each flip until just
+        enough time is left to poll, update and draw before the next vblank.
+        """
+        if self.headless and max_steps is None:
+            raise ValueError('headless games have no input to end them; pass max_steps')
+        step_time = 1.0 / SIM_RATE
+        if not render or self.headless:
+            fast_forward = max(fast_forward, 1)
+        accumulator = 0.0
+        previous = time.perf_counter()
+        steps = 0
         running = True
+        # Refresh period and the frame's work before the flip, for late wake-ups
+        period = 1.0 / FPS
+        work = 0.0
+        frame_start = last_flip = previous
         while running:
-            running = self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(FPS)
+            if self.show_profile and not self.profiler:
+                self.profiler = FrameProfiler()
+            profiler = self.profiler
+            if profiler:
+                profiler.begin_frame()
+            if self.memory:
+                self.memory.begin_frame()
+            
+            if not self.headless:
+                running = self.handle_events()
+            if profiler:
+                profiler.lap('events')
+            
+            if fast_forward:
+                for _ in range(fast_forward):
+                    self.update()
+                steps += fast_forward
+                alpha = 1.0
+            else:
+                now = time.perf_counter()
+                accumulator += min(now - previous, MAX_FRAME_TIME)
+                previous = now
+                first = True
+                while accumulator >= step_time:
+                    accumulator -= step_time
+                    if self.late_input and not self.headless and not first:
+                        running = self.handle_events() and running
+                    first = False
+                    self.update()
+                    steps += 1
+                alpha = accumulator / step_time
+            if self.spectators:
+                self.spectators.publish(self.spectator_state())
+            if profiler:
+                profiler.lap('update')
+            
+            if render:
+                self.draw(alpha)
+                if self.capture:
+                    self.capture.capture()
+                if self.latency_log:
+                    self.latency_log.presented(self.renderer.flipped_at)
+            if profiler:
+                profiler.end_frame(len(self.pipes), len(self.particles))
+            if self.memory:
+                self.memory.end_frame()
+            # Roll the course ahead between frames so update() never has to
+            self.roll_ahead()
+            if max_steps is not None and steps >= max_steps:
+                break
+            if not fast_forward:
+                if self.vsync:
+                    # The flip waits for the vblank; the cap only guards drivers that ignore vsync
+                    self.clock.tick(VSYNC_MAX_FPS)
+                    if self.late_input:
+                        # Flips land a whole number of refreshes apart, so the
+                        # shortest recent interval is the refresh period
+                        renderer = self.renderer
+                        period = min(max(renderer.flipped_at - last_flip, 1.0 / VSYNC_MAX_FPS), period * 1.01)
+                        last_flip = renderer.flipped_at
+                        work = max(renderer.flip_started - frame_start, work * 0.95)
+                        delay = last_flip + period - work - LATE_INPUT_MARGIN - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+                        frame_start = time.perf_counter()
+                else:
+                    self.clock.tick(FPS)
             
+        if self.latency_log:
+            print(f'Input latency: {self.latency_log.summary()}')
+            self.latency_log.export(self.latency_path)
+        if self.profiler and self.profile_path:
+            self.profiler.export(self.profile_path)
+        if self.memory:
+            print('Memory profile:')
+            for line in self.memory.report():
+                print(f'  {line}')
+            if self.memory_path:
+                self.memory.export(self.memory_path)
+            self.memory.close()
+        if self.capture:
+            summary = self.capture.close()
+            if summary:
+                print(f'Capture: {summary}')
+        self.leaderboard.close()
+        if self.spectators:
+            self.spectators.close()
         pygame.quit()
+        return steps
+
+def seed_arg(text):
+    """argparse type for a game seed"""
+    try:
+        return core.check_seed(int(text))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def main():
+    parser = argparse.ArgumentParser(description='Flappy Bird')
+    parser.add_argument('--dirty-rects', action='store_true', default=DIRTY_RECTS,
+                        help='update only changed screen regions instead of flipping the full frame')
+    parser.add_argument('--fast-forward', type=int, default=0, metavar='K',
+                        help='run K simulation steps per rendered frame, uncapped')
+    parser.add_argument('--build-bundle', action='store_true',
+                        help='pack the sprites into a prescaled atlas for faster startup and exit')
+    parser.add_argument('--seed', type=seed_arg, default=None,
+                        help='seed for the first game (restarts pick new seeds)')
+    parser.add_argument('--pixel-collision', action='store_true', default=PIXEL_COLLISION,
+                        help="collide with the sprites' opaque pixels instead of their bounding boxes")
+    parser.add_argument('--player', default=None,
+                        help='name to record scores under (default: the logged-in user)')
+    parser.add_argument('--difficulty', choices=core.DIFFICULTIES, default='flat',
+                        help='difficulty curve of the pipe course')
+    parser.add_argument('--vsync', action='store_true', default=VSYNC,
+                        help='pace frames with the display refresh instead of a timer')
+    parser.add_argument('--late-input', action='store_true', default=LATE_INPUT,
+                        help='poll input before every simulation step and, with --vsync, just before each frame')
+    parser.add_argument('--latency-out', default=None, metavar='PATH',
+                        help='log press-to-flip latency of every flap and write it to PATH (CSV) on exit')
+    parser.add_argument('--spectate', default=None, metavar='ADDRESS',
+                        help='stream the game to spectators on HOST:PORT or a Unix socket path')
+    parser.add_argument('--ghosts', default=None, metavar='DIR',
+                        help='race the replays in DIR (see --record-replays) as ghost birds')
+    parser.add_argument('--ghost-limit', type=int, default=GHOST_LIMIT, metavar='N',
+                        help='most ghosts drawn per frame, nearest the bird first')
+    parser.add_argument('--audio-buffer', type=int, default=AUDIO_BUFFER, metavar='SAMPLES',
+                        help='mixer buffer size; smaller lowers sound latency but may crackle')
+    parser.add_argument('--profile', action='store_true',
+                        help='record frame timings from the start (F3 shows them)')
+    parser.add_argument('--profile-out', default=None, metavar='PATH',
+                        help='on exit, write frame timings to PATH (.csv, otherwise Chrome trace JSON)')
+    parser.add_argument('--memory-profile', action='store_true',
+                        help='track allocations and GC pauses per frame and print a report on exit')
+    parser.add_argument('--memory-out', default=None, metavar='PATH',
+                        help='on exit, write per-frame allocations and GC pauses to PATH (CSV)')
+    parser.add_argument('--capture', default=None, metavar='PATH',
+                        help='write every drawn frame to PATH: a video (with ffmpeg), a .rgb stream or a PNG directory')
+    parser.add_argument('--record-replays', default=None, metavar='DIR',
+                        help='save every finished run to DIR as a replay file')
+    args = parser.parse_args()
+    
+    if args.build_bundle:
+        assets_dir = download_assets()
+        index = build_asset_bundle(assets_dir)
+        print(f"Packed {len(index['sprites'])} sprites into a {index['size'][0]}x{index['size'][1]} atlas")
         sys.exit()
+    
+    ghosts = []
+    if args.ghosts:
+        from replay import Replay, replay_paths
+        for path in replay_paths([args.ghosts]):
+            try:
+                ghosts.append(Replay.load(path))
+            except (OSError, ValueError) as e:
+                print(f'Error loading ghost {path}: {e}')
+    
+    game = Game(dirty_rects=args.dirty_rects, seed=args.seed, replay_dir=args.record_replays,
+                profile=args.profile, profile_path=args.profile_out,
+                pixel_collision=args.pixel_collision, difficulty=args.difficulty,
+                audio_buffer=args.audio_buffer, vsync=args.vsync, late_input=args.late_input,
+                latency_path=args.latency_out, player=args.player, spectate=args.spectate,
+                ghosts=ghosts, ghost_limit=args.ghost_limit,
+                memory_profile=args.memory_profile, memory_path=args.memory_out,
+                capture_path=args.capture)
+    game.run(fast_forward=args.fast_forward)
+    sys.exit()
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    main()
@@ -0,0 +1,617 @@
+"""Display-free Flappy Bird rules: physics, pipes and scoring.
+
+Nothing here imports pygame, so bots, workers and tests can step the game
+without a window. flappy_bird.py adds sprites, sound and input on top.
+"""
+import operator
+import os
+import random
+import sys
+from array import array
+from collections import deque
+
+# Game Constants
+SCREEN_WIDTH = 400
+SCREEN_HEIGHT = 600
+FPS = 60
+SIM_RATE = 60  # fixed simulation steps per second
+
+# Bird Constants
+BIRD_WIDTH = 40
+BIRD_HEIGHT = 30
+BIRD_X = 100
+GRAVITY = 0.5
+JUMP_STRENGTH = -10
+
+# Pipe Constants
+PIPE_WIDTH = 70
+PIPE_GAP = 200
+PIPE_SPEED = 3
+PIPE_SPAWN_FREQUENCY = 90  # frames
+GAP_MIN = 150  # gap_y is rolled from GAP_MIN to base_y - GAP_MARGIN
+GAP_MARGIN = 250
+
+# Course Constants
+COURSE_CHUNK = 256  # pipes rolled at a time
+COURSE_FIELDS = 4  # gap_y, gap, speed and spawn interval per pipe
+COURSE_HEADER = 3  # seed, base_y and length at the start of a shared course
+COURSE_REFILL = 64  # pipes a game keeps rolled ahead of the next spawn
+SEED_LIMIT = 2 ** 63  # seeds are 63-bit, so replays and the leaderboard can store them
+
+# State Constants
+# A state buffer holds these fields, then PIPE_FIELDS per pipe on screen
+(STATE_FRAME, STATE_BIRD_Y, STATE_VELOCITY, STATE_SCORE, STATE_STARTED, STATE_GAME_OVER, STATE_PAUSED,
+ STATE_BASE_X, STATE_PIPE_INDEX, STATE_NEXT_SPAWN, STATE_SPEED, STATE_PIPE_COUNT, STATE_FLAPPED) = range(13)
+STATE_HEADER = 13
+PIPE_FIELDS = 4  # x, gap_y, gap, passed
+STATE_PIPES = 6  # room for pipes; at most three are ever on screen
+STATE_SIZE = STATE_HEADER + STATE_PIPES * PIPE_FIELDS
+
+def new_seed():
+    """A fresh 63-bit seed for a game"""
+    return int.from_bytes(os.urandom(8), 'little') >> 1
+
+def check_seed(seed):
+    """Return seed as an int, or raise ValueError unless 0 <= seed < SEED_LIMIT"""
+    try:
+        seed = operator.index(seed)
+    except TypeError:
+        raise ValueError(f'seed must be an integer, not {seed!r}') from None
+    if not 0 <= seed < SEED_LIMIT:
+        raise ValueError(f'seed must be from 0 to 2**63 - 1, not {seed}')
+    return seed
+
+def flat(index):
+    """The classic course: every pipe has the same gap, speed and spacing"""
+    return PIPE_GAP, PIPE_SPEED, PIPE_SPAWN_FREQUENCY
+
+def ramp(index):
+    """Gaps narrow, pipes speed up and spawn closer together over the first 60 pipes"""
+    progress = min(index, 60) / 60
+    return (int(PIPE_GAP - 60 * progress), PIPE_SPEED + min(index // 20, 2),
+            int(PIPE_SPAWN_FREQUENCY - 30 * progress))
+
+# Difficulty curves: pipe index -> (gap, speed, spawn interval)
+DIFFICULTIES = {'flat': flat, 'ramp': ramp}
+
+class Course:
+    """Pipe gaps and spacing for one seed, rolled ahead of play in chunks.
+    
+    Pipe k of a game uses entry k: its gap_y, its gap height, the speed all
+    pipes scroll at once it has spawned, and the frames between the previous
+    spawn (or the start) and its own. The difficulty curve maps k to the gap,
+    speed and interval; gap_y values come from random.Random(seed) in order,
+    so a flat course rolls the same gaps as Pipe always has.
+    
+    Entries are uint16s in one flat array, COURSE_FIELDS per pipe. share()
+    copies a course into shared memory and attach() maps it in another
+    process without copying.
+    """
+    def __init__(self, seed, base_y=None, difficulty=flat, length=COURSE_CHUNK):
+        self.seed = seed
+        self.base_y = int(base_y) if base_y else SCREEN_HEIGHT - 50
+        self.difficulty = DIFFICULTIES[difficulty] if isinstance(difficulty, str) else difficulty
+        self.rng = random.Random(seed)
+        self.data = array('H')
+        self.length = 0
+        self.shm = None
+        self.extend(length)
+        
+    def roll(self, rng, index):
+        gap, speed, interval = self.difficulty(index)
+        # Keep GAP_MARGIN - PIPE_GAP between the bottom pipe and the ground
+        gap_y = rng.randint(GAP_MIN, self.base_y - GAP_MARGIN + PIPE_GAP - gap)
+        return gap_y, gap, speed, interval
+        
+    def extend(self, count=COURSE_CHUNK):
+        """Roll count more pipes"""
+        if self.rng is None:
+            self.detach()
+        roll, rng, data = self.roll, self.rng, self.data
+        for index in range(self.length, self.length + count):
+            data.extend(roll(rng, index))
+        self.length += count
+        
+    def ensure(self, count):
+        """Roll whole chunks until at least count pipes exist"""
+        while count > self.length:
+            self.extend()
+    
+    def pipe(self, index):
+        """(gap_y, gap, speed, interval) of pipe index"""
+        self.ensure(index + 1)
+        i = index * COURSE_FIELDS
+        return tuple(self.data[i:i + COURSE_FIELDS])
+    
+    def lookahead(self, index, count):
+        """The entries of pipes index to index + count - 1"""
+        return [self.pipe(i) for i in range(index, index + count)]
+    
+    def gaps(self, count):
+        """gap_y of the first count pipes"""
+        self.ensure(count)
+        return list(self.data[0:count * COURSE_FIELDS:COURSE_FIELDS])
+        
+    def share(self):
+        """Copy the course into a new SharedMemory block and return it.
+        
+        Other processes attach() to it by its name; the creator should
+        close() and unlink() it once they are done.
+        """
+        from multiprocessing import shared_memory
+        header = array('q', (self.seed, self.base_y, self.length))
+        body = self.data.tobytes()
+        shm = shared_memory.SharedMemory(create=True, size=len(header) * header.itemsize + len(body))
+        shm.buf[:len(header) * header.itemsize] = header.tobytes()
+        shm.buf[len(header) * header.itemsize:len(header) * header.itemsize + len(body)] = body
+        return shm
+    
+    @classmethod
+    def attach(cls, name, difficulty=flat):
+        """Map a course another process shared, without copying it.
+        
+        Pass the difficulty it was made with; it is only needed if play runs
+        past the shared pipes and the course has to be extended.
+        """
+        shm = attach_shared_memory(name)
+        header = shm.buf[:COURSE_HEADER * 8].cast('q')
+        seed, base_y, length = header
+        header.release()
+        course = cls.__new__(cls)
+        course.seed = seed
+        course.base_y = base_y
+        course.difficulty = DIFFICULTIES[difficulty] if isinstance(difficulty, str) else difficulty
+        course.rng = None
+        course.length = length
+        course.data = shm.buf[COURSE_HEADER * 8:COURSE_HEADER * 8 + length * COURSE_FIELDS * 2].cast('H')
+        course.shm = shm
+        return course
+    
+    def detach(self):
+        """Copy an attached course into private memory so it can be extended"""
+        rng = random.Random(self.seed)
+        for index in range(self.length):
+            self.roll(rng, index)
+        data = array('H', self.data)
+        self.close()
+        self.rng = rng
+        self.data = data
+        
+    def close(self):
+        """Unmap an attached course"""
+        if self.shm is not None:
+            self.data.release()
+            self.shm.close()
+            self.shm = None
+
+def attach_shared_memory(name):
+    """Open another process's SharedMemory block without ever unlinking it.
+
+    The creator owns the block. Python 3.13 opens it untracked with
+    track=False. Older versions register every block with the process's
+    resource tracker, which unlinks it when the process exits. Pool workers
+    share the creator's tracker, where that does no harm. A process that
+    starts a tracker of its own has to take the block back off that
+    tracker's list. Telling the two apart needs the tracker's private _fd,
+    and unregistering needs the block's private _name.
+    """
+    from multiprocessing import shared_memory
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    from multiprocessing import resource_tracker
+    own_tracker = getattr(resource_tracker._resource_tracker, '_fd', None) is None
+    shm = shared_memory.SharedMemory(name=name)
+    if own_tracker:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+def course_gaps(seed, count, base_y=None):
+    """The first count gap_y values a Simulation seeded with seed will spawn"""
+    return Course(seed, base_y, length=count).gaps(count)
+
+def rects_collide(ax, ay, aw, ah, bx, by, bw, bh):
+    """pygame.Rect.colliderect without pygame.
+
+    Like pygame.Rect, coordinates are truncated to integers and rects
+    without area never collide.
+    """
+    ax, ay, aw, ah = int(ax), int(ay), int(aw), int(ah)
+    bx, by, bw, bh = int(bx), int(by), int(bw), int(bh)
+    if aw <= 0 or ah <= 0 or bw <= 0 or bh <= 0:
+        return False
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+class Bird:
+    __slots__ = ('x', 'y', 'prev_y', 'velocity', 'width', 'height')
+
+    def __init__(self, width=BIRD_WIDTH, height=BIRD_HEIGHT):
+        self.x = BIRD_X
+        self.y = SCREEN_HEIGHT // 2
+        self.prev_y = self.y
+        self.velocity = 0
+        self.width = width
+        self.height = height
+
+    def jump(self):
+        self.velocity = JUMP_STRENGTH
+
+    def update(self):
+        self.prev_y = self.y
+        self.velocity += GRAVITY
+        self.y += self.velocity
+
+    def span(self):
+        """Left and right edges of everything that can collide"""
+        return self.x, self.x + self.width
+
+class Pipe:
+    __slots__ = ('x', 'prev_x', 'base_y', 'width', 'gap', 'gap_y', 'passed')
+
+    def __init__(self, x, base_y=None, width=PIPE_WIDTH, rng=None, gap_y=None, gap=PIPE_GAP):
+        self.x = x
+        self.prev_x = x
+        self.base_y = base_y if base_y else SCREEN_HEIGHT - 50
+        self.width = width
+        self.gap = gap
+        if gap_y is None:
+            gap_y = (rng or random).randint(GAP_MIN, int(self.base_y) - GAP_MARGIN + PIPE_GAP - gap)
+        self.gap_y = gap_y
+        self.passed = False
+
+    def place(self, x, gap_y, gap):
+        """Reuse this pipe as a newly spawned one"""
+        self.x = x
+        self.prev_x = x
+        self.gap_y = gap_y
+        self.gap = gap
+        self.passed = False
+
+    def update(self, speed=PIPE_SPEED):
+        self.prev_x = self.x
+        self.x -= speed
+
+    def collides_with(self, bird):
+        # Top pipe collision
+        if rects_collide(bird.x, bird.y, bird.width, bird.height, self.x, 0, self.width, self.gap_y):
+            return True
+
+        # Bottom pipe collision - only up to ground level
+        bottom_pipe_y = self.gap_y + self.gap
+        bottom_pipe_height = self.base_y - bottom_pipe_y
+        return rects_collide(bird.x, bird.y, bird.width, bird.height,
+                             self.x, bottom_pipe_y, self.width, bottom_pipe_height)
+
+    def is_off_screen(self):
+        return self.x + self.width < 0
+
+class Simulation:
+    """Game state and rules for one bird, stepped once per simulation frame.
+
+    Pipes move at the same speed, so the pipes deque stays ordered by x:
+    new pipes are appended on the right and off-screen pipes popped from the
+    left, and only pipes overlapping the bird's column are collision tested.
+
+    Pipes follow a Course rolled from the game's seed along a difficulty
+    curve, so a seed and the frames on which the bird flapped reproduce a
+    run exactly. flap_log holds one byte per simulated frame: 1 if the bird
+    flapped before that frame. Games can also share one prebuilt course.
+
+    Pipes that leave the screen go back to pipe_pool and are placed again
+    as later pipes spawn, so a running game creates no new pipe objects.
+    Drivers call roll_ahead() between frames so the course is rolled
+    outside update().
+
+    Subclasses hook presentation in through make_bird, make_pipe, on_flap,
+    on_score and on_crash.
+
+    snapshot() packs the whole game state into one flat array of doubles,
+    and restore() puts a game back to it. A Stepper from stepper() plays on
+    such buffers directly, so a bot can branch by copying the buffer.
+    """
+    pipe_width = PIPE_WIDTH
+
+    def __init__(self, base_y=None, seed=None, difficulty=flat):
+        self.base_y = base_y if base_y else SCREEN_HEIGHT - 50
+        self.base_x = 0
+        self.prev_base_x = 0
+        self.difficulty = DIFFICULTIES[difficulty] if isinstance(difficulty, str) else difficulty
+        self.pipes = deque()
+        self.pipe_pool = []
+        self.reset(seed)
+
+    def reset(self, seed=None, course=None):
+        if seed is None:
+            seed = course.seed if course is not None else new_seed()
+        self.seed = check_seed(seed)
+        self.course = course if course is not None else Course(seed, self.base_y, self.difficulty)
+        self.pipe_index = 0
+        _, _, self.speed, self.next_spawn = self.course.pipe(0)
+        self.flap_log = bytearray()
+        self.flapped = 0
+        self.bird = self.make_bird()
+        self.pipe_pool.extend(self.pipes)
+        self.pipes.clear()
+        self.score = 0
+        self.frame_count = 0
+        self.game_over = False
+        self.game_started = False
+        self.paused = False
+
+    def make_bird(self):
+        return Bird()
+
+    @property
+    def geometry(self):
+        """Ground height and the bird and pipe sizes collisions use, as in Replay.geometry"""
+        return self.base_y, self.bird.width, self.bird.height, self.pipe_width
+
+    def snapshot(self, state=None):
+        """The game state as an array('d') of STATE_SIZE, written into state if given.
+
+        Only the bird and the pipes on screen are stored; the course holds
+        everything random, so pipe_index stands in for the RNG's state.
+        """
+        pipes = self.pipes
+        if len(pipes) > STATE_PIPES:
+            raise ValueError(f'{len(pipes)} pipes on screen, a state holds {STATE_PIPES}')
+        if state is None:
+            state = array('d', bytes(STATE_SIZE * 8))
+        bird = self.bird
+        state[:STATE_HEADER] = array('d', (
+            self.frame_count, bird.y, bird.velocity, self.score, self.game_started, self.game_over,
+            self.paused, self.base_x, self.pipe_index, self.next_spawn, self.speed, len(pipes),
+            self.flapped))
+        i = STATE_HEADER
+        for pipe in pipes:
+            state[i] = pipe.x
+            state[i + 1] = pipe.gap_y
+            state[i + 2] = pipe.gap
+            state[i + 3] = pipe.passed
+            i += PIPE_FIELDS
+        return state
+
+    def restore(self, state):
+        """Put the game back to a snapshot(), truncating flap_log to its frame"""
+        frame = self.frame_count = int(state[STATE_FRAME])
+        del self.flap_log[frame:]
+        self.flapped = int(state[STATE_FLAPPED])
+        bird = self.bird
+        bird.y = bird.prev_y = state[STATE_BIRD_Y]
+        bird.velocity = state[STATE_VELOCITY]
+        self.score = int(state[STATE_SCORE])
+        self.game_started = bool(state[STATE_STARTED])
+        self.game_over = bool(state[STATE_GAME_OVER])
+        self.paused = bool(state[STATE_PAUSED])
+        self.base_x = self.prev_base_x = int(state[STATE_BASE_X])
+        self.pipe_index = int(state[STATE_PIPE_INDEX])
+        self.next_spawn = int(state[STATE_NEXT_SPAWN])
+        self.speed = int(state[STATE_SPEED])
+        pipes = self.pipes
+        self.pipe_pool.extend(pipes)
+        pipes.clear()
+        end = STATE_HEADER + int(state[STATE_PIPE_COUNT]) * PIPE_FIELDS
+        for i in range(STATE_HEADER, end, PIPE_FIELDS):
+            pipe = self.spawn_pipe(int(state[i]), int(state[i + 1]), int(state[i + 2]))
+            pipe.passed = bool(state[i + 3])
+            pipes.append(pipe)
+
+    def stepper(self):
+        """A Stepper with this game's course and collision sizes"""
+        return Stepper(self.course, self.base_y, self.bird.width, self.bird.height, self.pipe_width)
+
+    def make_pipe(self, x, gap_y=None, gap=PIPE_GAP):
+        return Pipe(x, self.base_y, self.pipe_width, gap_y=gap_y, gap=gap)
+
+    def spawn_pipe(self, x, gap_y, gap):
+        """A pipe from the pool, or a new one from make_pipe if it is empty"""
+        if self.pipe_pool:
+            pipe = self.pipe_pool.pop()
+            pipe.place(x, gap_y, gap)
+            return pipe
+        return self.make_pipe(x, gap_y, gap)
+
+    def roll_ahead(self):
+        """Roll the course COURSE_REFILL pipes past the next spawn, between frames"""
+        self.course.ensure(self.pipe_index + COURSE_REFILL)
+
+    def upcoming(self, count):
+        """Course entries of the next count pipes to spawn"""
+        return self.course.lookahead(self.pipe_index, count)
+
+    def flap(self):
+        """Start the game or jump; returns True if the bird jumped"""
+        if self.game_over:
+            return False
+        if not self.game_started:
+            self.game_started = True
+        elif self.paused:
+            return False
+        self.bird.jump()
+        self.flapped = 1
+        self.on_flap()
+        return True
+
+    def toggle_pause(self):
+        if self.game_started and not self.game_over:
+            self.paused = not self.paused
+
+    def on_flap(self):
+        pass
+
+    def on_score(self):
+        pass
+
+    def on_crash(self, cause):
+        """Called once when the game ends; cause is 'die' (ground or ceiling) or 'hit' (pipe)"""
+        pass
+
+    def crash(self, cause):
+        if not self.game_over:
+            self.on_crash(cause)
+        self.game_over = True
+
+    def update(self):
+        self.prev_base_x = self.base_x
+        if not self.game_started or self.game_over or self.paused:
+            return
+
+        # Record whether the bird flapped before this frame
+        self.flap_log.append(self.flapped)
+        self.flapped = 0
+
+        # Scroll base (ground) with the pipes
+        self.base_x -= self.speed
+        if self.base_x <= -SCREEN_WIDTH:
+            self.base_x = 0
+
+        # Update bird
+        self.bird.update()
+
+        # Check if bird hit ground or ceiling
+        if self.bird.y + self.bird.height >= self.base_y or self.bird.y < 0:
+            self.crash('die')
+
+        # Update pipes
+        self.frame_count += 1
+        if self.frame_count == self.next_spawn:
+            course = self.course
+            gap_y, gap, self.speed, _ = course.pipe(self.pipe_index)
+            self.pipes.append(self.spawn_pipe(SCREEN_WIDTH, gap_y, gap))
+            self.pipe_index += 1
+            self.next_spawn += course.pipe(self.pipe_index)[3]
+
+        pipes = self.pipes
+        speed = self.speed
+        for pipe in pipes:
+            pipe.update(speed)
+
+        bird = self.bird
+        left, right = bird.span()
+        for pipe in pipes:
+            # This pipe and every one after it are still ahead of the bird
+            if pipe.x >= right:
+                break
+
+            # Check collision
+            if pipe.x + pipe.width > left and pipe.collides_with(bird):
+                self.crash('hit')
+
+            # Check if bird passed pipe
+            if not pipe.passed and pipe.x + pipe.width < bird.x:
+                pipe.passed = True
+                self.score += 1
+                self.on_score()
+
+        # Remove off-screen pipes
+        while pipes and pipes[0].is_off_screen():
+            self.pipe_pool.append(pipes.popleft())
+
+
+class Stepper:
+    """Simulation.update for snapshot() buffers, with no objects and no hooks.
+
+    step() follows the same rules frame for frame (bounding-box collisions
+    only), so a bot can copy a buffer, step the copy through a plan and
+    throw it away:
+        trial = array('d', state)
+        for flap in plan:
+            if stepper.step(trial, flap):
+                break
+
+    It saves building objects, not interpreting: a step costs about what
+    Simulation.update does (2-3us in CPython, and snapshot and restore as
+    much again), so scalar search runs at a few hundred thousand steps a
+    second. BatchSimulator.load_state steps thousands of plans at millions.
+    """
+    def __init__(self, course, base_y=None, bird_width=BIRD_WIDTH, bird_height=BIRD_HEIGHT,
+                 pipe_width=PIPE_WIDTH):
+        self.course = course
+        self.base_y = base_y if base_y else SCREEN_HEIGHT - 50
+        self.bird_width = bird_width
+        self.bird_height = bird_height
+        self.pipe_width = pipe_width
+
+    def roll_ahead(self, state):
+        """Simulation.roll_ahead for a state buffer"""
+        self.course.ensure(int(state[STATE_PIPE_INDEX]) + COURSE_REFILL)
+
+    def step(self, state, flap=False):
+        """Flap if asked, then advance state one frame; returns True once the game is over"""
+        if state[STATE_GAME_OVER]:
+            return True
+        if flap:
+            if not state[STATE_STARTED]:
+                state[STATE_STARTED] = 1
+                state[STATE_VELOCITY] = JUMP_STRENGTH
+                state[STATE_FLAPPED] = 1
+            elif not state[STATE_PAUSED]:
+                state[STATE_VELOCITY] = JUMP_STRENGTH
+                state[STATE_FLAPPED] = 1
+        if not state[STATE_STARTED] or state[STATE_PAUSED]:
+            return False
+        state[STATE_FLAPPED] = 0
+
+        # The ground scrolls at the speed from before this frame's spawn
+        speed = state[STATE_SPEED]
+        base_x = state[STATE_BASE_X] - speed
+        state[STATE_BASE_X] = 0 if base_x <= -SCREEN_WIDTH else base_x
+
+        velocity = state[STATE_VELOCITY] + GRAVITY
+        y = state[STATE_BIRD_Y] + velocity
+        state[STATE_VELOCITY] = velocity
+        state[STATE_BIRD_Y] = y
+        bird_height = self.bird_height
+        over = y + bird_height >= self.base_y or y < 0
+
+        frame = state[STATE_FRAME] + 1
+        state[STATE_FRAME] = frame
+        count = int(state[STATE_PIPE_COUNT])
+        if frame == state[STATE_NEXT_SPAWN]:
+            course = self.course
+            index = int(state[STATE_PIPE_INDEX])
+            gap_y, gap, speed, _ = course.pipe(index)
+            i = STATE_HEADER + count * PIPE_FIELDS
+            state[i] = SCREEN_WIDTH
+            state[i + 1] = gap_y
+            state[i + 2] = gap
+            state[i + 3] = 0
+            count += 1
+            state[STATE_PIPE_COUNT] = count
+            state[STATE_SPEED] = speed
+            state[STATE_PIPE_INDEX] = index + 1
+            state[STATE_NEXT_SPAWN] = frame + course.pipe(index + 1)[3]
+
+        end = STATE_HEADER + count * PIPE_FIELDS
+        for i in range(STATE_HEADER, end, PIPE_FIELDS):
+            state[i] -= speed
+
+        # As Pipe.collides_with and rects_collide, on whole pixels
+        width = self.pipe_width
+        left = BIRD_X
+        right = left + self.bird_width
+        top = int(y)
+        bottom = top + bird_height
+        for i in range(STATE_HEADER, end, PIPE_FIELDS):
+            x = state[i]
+            if x >= right:
+                break
+            if x + width > left:
+                gap_y = state[i + 1]
+                bottom_pipe_y = gap_y + state[i + 2]
+                if (0 < bottom and top < gap_y or
+                        bottom_pipe_y < bottom and top < bottom_pipe_y + int(self.base_y - bottom_pipe_y)):
+                    over = True
+            if not state[i + 3] and x + width < left:
+                state[i + 3] = 1
+                state[STATE_SCORE] += 1
+
+        # Drop pipes that left the screen
+        while count and state[STATE_HEADER] + width < 0:
+            count -= 1
+            state[STATE_HEADER:end - PIPE_FIELDS] = state[STATE_HEADER + PIPE_FIELDS:end]
+            end -= PIPE_FIELDS
+        state[STATE_PIPE_COUNT] = count
+
+        if over:
+            state[STATE_GAME_OVER] = 1
+        return over
@@ -0,0 +1,167 @@
+"""Gym-style reset()/step() environment around a headless Game.
+
+Stepping needs no window and no event loop. Observations are one of:
+
+- 'features': float32 [bird y, bird velocity, next pipe distance, next gap_y]
+- 'rgb': the (600, 400, 3) uint8 screen, a view of the pixels Game draws into
+- 'grayscale': the last `stack` frames, downscaled to `size` and grayscale,
+  as a (stack, height, width) uint8 view of a preallocated ring buffer
+
+Pixel observations are views without a copy, valid until the next step or
+reset; copy them to keep them.
+"""
+import random
+
+import numpy as np
+import pygame
+
+import flappy_bird as fb
+import flappy_core as core
+
+OBSERVATIONS = ('features', 'rgb', 'grayscale')
+FRAME_SIZE = (84, 84)  # grayscale observation width and height
+FRAME_STACK = 4
+
+# Rewards
+REWARD_ALIVE = 0.1  # per simulated frame survived
+REWARD_PIPE = 1.0
+REWARD_DEATH = -1.0
+
+
+class FlappyEnv:
+    """Reinforcement learning environment with Gymnasium's reset/step signatures.
+
+    step(action) flaps when action is truthy, then runs frame_skip simulation
+    steps and returns (observation, reward, terminated, truncated, info).
+    Episodes are truncated after max_steps simulation steps if set. The
+    leaderboard is never touched. reset() can take a core.Course, for
+    instance one attached from shared memory, to play a prebuilt course.
+    """
+
+    def __init__(self, observation='features', frame_skip=1, size=FRAME_SIZE,
+                 stack=FRAME_STACK, seed=None, max_steps=None, pixel_collision=False,
+                 difficulty='flat'):
+        if observation not in OBSERVATIONS:
+            raise ValueError(f'observation must be one of {OBSERVATIONS}, not {observation!r}')
+        self.observation = observation
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.rng = random.Random(seed)
+        self.first_seed = seed
+
+        # The game draws straight into this buffer. Surfarray's pixels3d views
+        # lock the surface and blits fail while one is alive, so the screen
+        # surface is built over memory NumPy owns instead.
+        self.screen_buffer = np.zeros((core.SCREEN_HEIGHT, core.SCREEN_WIDTH, 4), dtype=np.uint8)
+        screen = pygame.image.frombuffer(self.screen_buffer, (core.SCREEN_WIDTH, core.SCREEN_HEIGHT), 'RGBX')
+        self.pixels = self.screen_buffer[:, :, :3]
+        self.game = fb.Game(headless=True, leaderboard_path=None, screen=screen,
+                            pixel_collision=pixel_collision, difficulty=difficulty)
+
+        # Grayscale frames: scaled copy, its grayscale, and a ring holding each
+        # frame twice so the newest `stack` frames are always contiguous
+        self.size = size
+        self.stack = stack
+        if observation == 'grayscale':
+            width, height = size
+            self.small = pygame.Surface(size, 0, screen)
+            self.small_gray = pygame.Surface(size, 0, screen)
+            self.frames = np.zeros((2 * stack, height, width), dtype=np.uint8)
+            self.position = 0
+        self.features = np.zeros(4, dtype=np.float32)
+
+    @property
+    def observation_shape(self):
+        if self.observation == 'features':
+            return self.features.shape
+        if self.observation == 'rgb':
+            return self.pixels.shape
+        return (self.stack, self.size[1], self.size[0])
+
+    def reset(self, seed=None, course=None):
+        """Start a new episode; the first flap starts the game as SPACE would"""
+        if seed is None and course is None:
+            seed = self.first_seed if self.first_seed is not None else self.rng.getrandbits(63)
+            self.first_seed = None
+        game = self.game
+        game.reset(seed, course)
+        game.flap()
+        if self.observation == 'grayscale':
+            # Fill the stack with the first frame
+            self.render_frame()
+            for _ in range(self.stack - 1):
+                self.push_frame()
+        return self.observe(render=self.observation != 'grayscale'), self.info()
+
+    def step(self, action):
+        game = self.game
+        if action:
+            game.flap()
+        score = game.score
+        reward = 0.0
+        for _ in range(self.frame_skip):
+            game.update()
+            if game.game_over:
+                break
+            reward += REWARD_ALIVE
+        game.roll_ahead()
+        reward += REWARD_PIPE * (game.score - score)
+        terminated = game.game_over
+        if terminated:
+            reward += REWARD_DEATH
+        truncated = not terminated and self.max_steps is not None and game.frame_count >= self.max_steps
+        return self.observe(), reward, terminated, truncated, self.info()
+
+    def info(self):
+        game = self.game
+        return {'score': game.score, 'frames': game.frame_count, 'seed': game.seed}
+
+    def observe(self, render=True):
+        if self.observation == 'features':
+            return self.observe_features()
+        if self.observation == 'rgb':
+            self.game.draw()
+            return self.pixels
+        if render:
+            self.render_frame()
+        start = self.position + 1
+        return self.frames[start:start + self.stack]
+
+    def observe_features(self):
+        game = self.game
+        bird = game.bird
+        features = self.features
+        features[0] = bird.y
+        features[1] = bird.velocity
+        for pipe in game.pipes:
+            if pipe.x + pipe.width >= bird.x:
+                features[2] = pipe.x - bird.x
+                features[3] = pipe.gap_y
+                break
+        else:
+            # No pipe ahead yet; the next one spawns at the right edge
+            features[2] = core.SCREEN_WIDTH - bird.x
+            features[3] = game.upcoming(1)[0][0]
+        return features.copy()
+
+    def render_frame(self):
+        """Draw, downscale and grayscale the screen into the next ring slot"""
+        self.game.draw()
+        pygame.transform.smoothscale(self.game.screen, self.size, self.small)
+        pygame.transform.grayscale(self.small, self.small_gray)
+        self.push_frame()
+
+    def push_frame(self):
+        self.position = (self.position + 1) % self.stack
+        gray = pygame.surfarray.pixels_red(self.small_gray).T
+        self.frames[self.position] = gray
+        self.frames[self.position + self.stack] = gray
+        del gray
+
+    def render(self):
+        """The current screen as an (height, width, 3) RGB view"""
+        self.game.draw()
+        return self.pixels
+
+    def close(self):
+        pass
@@ -0,0 +1,216 @@
+"""Score history in SQLite, written off the frame loop by a background thread.
+
+Every finished run is kept as a row (player, seed, score, frames, difficulty,
+time). The database runs in WAL mode, so any number of game instances on one
+host can record scores at once. Each one only appends rows, so no instance
+can overwrite another's best score, as rewriting highscore.txt could.
+
+Show the top scores, or compact the history, from the command line:
+    python leaderboard.py [--player NAME] [--seed S] [--compact]
+"""
+import argparse
+import atexit
+import getpass
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+LEADERBOARD_FILE = 'leaderboard.db'
+TOP_K = 10  # scores kept per player and seed by compact()
+WRITE_BATCH = 256  # queued scores written per transaction
+BUSY_TIMEOUT_MS = 10000  # how long a writer waits for another process's lock
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    seed INTEGER,
+    score INTEGER NOT NULL,
+    frames INTEGER NOT NULL,
+    difficulty TEXT NOT NULL,
+    recorded REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_player_seed ON scores (player, seed, score DESC);
+CREATE INDEX IF NOT EXISTS scores_by_player ON scores (player, score DESC);
+'''
+
+
+def default_player():
+    """The logged-in user's name, which scores are filed under by default"""
+    try:
+        return getpass.getuser()
+    except Exception:
+        return 'player'
+
+
+def connect(path):
+    connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    return connection
+
+
+class Leaderboard:
+    """A score database plus the thread that writes to it.
+
+    submit() queues a score and returns at once; the writer thread inserts
+    queued scores in batches. best() answers from memory: every player's
+    best score is loaded when the store opens and updated on submit. top()
+    reads the (player, seed) index, which holds the highest scores first.
+    With path=None nothing touches the disk and only best() is kept.
+    """
+
+    def __init__(self, path=LEADERBOARD_FILE):
+        self.path = path
+        self.bests = {}
+        self.queue = queue.Queue()
+        self.thread = None
+        self.connection = None
+        if not path:
+            return
+        try:
+            self.connection = connect(path)
+            self.connection.executescript(SCHEMA)
+            self.bests = dict(self.connection.execute(
+                'SELECT player, MAX(score) FROM scores GROUP BY player'))
+        except sqlite3.Error as e:
+            print(f'Error opening leaderboard: {e}')
+            self.connection = None
+            return
+        self.thread = threading.Thread(target=self._write_loop, name='leaderboard-writer', daemon=True)
+        self.thread.start()
+        # Queued scores still reach the disk if the game exits without close()
+        atexit.register(self.close)
+
+    def best(self, player):
+        return self.bests.get(player, 0)
+
+    def submit(self, player, seed, score, frames=0, difficulty='flat'):
+        """Record one finished run without blocking"""
+        if score > self.best(player):
+            self.bests[player] = score
+        if self.thread:
+            self.queue.put((player, seed, score, frames, difficulty, time.time()))
+
+    def top(self, player=None, seed=None, k=TOP_K):
+        """The k best (player, seed, score, frames, difficulty) rows, optionally for one player and seed"""
+        if not self.connection:
+            return []
+        query = 'SELECT player, seed, score, frames, difficulty FROM scores'
+        conditions, params = [], []
+        if player is not None:
+            conditions.append('player = ?')
+            params.append(player)
+        if seed is not None:
+            conditions.append('seed = ?')
+            params.append(seed)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        return self.connection.execute(query + ' ORDER BY score DESC, id LIMIT ?', params + [k]).fetchall()
+
+    def flush(self):
+        """Wait until every submitted score is in the database"""
+        if self.thread:
+            self.queue.join()
+
+    def _write_loop(self):
+        # SQLite connections belong to the thread that made them
+        try:
+            connection = connect(self.path)
+        except sqlite3.Error as e:
+            # Keep draining, dropping the scores, so flush() and close() still return
+            print(f'Error opening leaderboard for writing: {e}')
+            connection = None
+        while True:
+            rows = [self.queue.get()]
+            while len(rows) < WRITE_BATCH:
+                try:
+                    rows.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            closing = rows[-1] is None
+            if closing:
+                rows.pop()
+            try:
+                if rows and connection:
+                    with connection:
+                        connection.executemany(
+                            'INSERT INTO scores (player, seed, score, frames, difficulty, recorded) '
+                            'VALUES (?, ?, ?, ?, ?, ?)', rows)
+            except sqlite3.Error as e:
+                print(f'Error saving scores: {e}')
+            for _ in range(len(rows) + closing):
+                self.queue.task_done()
+            if closing:
+                break
+        if connection:
+            connection.close()
+
+    def compact(self, keep=TOP_K):
+        """Keep only the best `keep` scores per player and seed; returns the rows removed"""
+        if not self.connection:
+            return 0
+        self.flush()
+        with self.connection:
+            removed = self.connection.execute('''
+                DELETE FROM scores WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY player, seed ORDER BY score DESC, id) AS rank
+                        FROM scores)
+                    WHERE rank > ?)''', (keep,)).rowcount
+        self.connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.connection.execute('VACUUM')
+        return removed
+
+    def import_high_score(self, path, player):
+        """Carry a legacy highscore.txt best over as a seedless row, once"""
+        if not self.connection or player in self.bests:
+            return
+        try:
+            with open(path) as f:
+                score = int(f.read())
+        except (OSError, ValueError):
+            return
+        if score > 0:
+            self.submit(player, None, score)
+
+    def close(self):
+        """Write out queued scores and stop the writer thread"""
+        if self.thread:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--path', default=LEADERBOARD_FILE)
+    parser.add_argument('--player', default=None, help='only this player')
+    parser.add_argument('--seed', type=int, default=None, help='only this seed')
+    parser.add_argument('-k', type=int, default=TOP_K, help='scores to show')
+    parser.add_argument('--compact', action='store_true',
+                        help=f'drop all but the best {TOP_K} scores per player and seed')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        parser.exit(1, f'{args.path} does not exist\n')
+    leaderboard = Leaderboard(args.path)
+    try:
+        if args.compact:
+            print(f'removed {leaderboard.compact()} scores')
+        for rank, (player, seed, score, frames, difficulty) in enumerate(
+                leaderboard.top(args.player, args.seed, args.k), 1):
+            seed = '-' if seed is None else seed
+            print(f'{rank:>3}. {score:>5}  {player:<16} seed {seed:<20} {frames:>7} frames  {difficulty}')
+    finally:
+        leaderboard.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,418 @@
+"""Stream live games to spectators over a local socket, and watch them.
+
+A game's visible state is tiny: the frame, the bird's y and velocity, the
+ground offset, score, flags, bird color and each pipe's x, gap_y and gap.
+A spectator first gets a snapshot of all of it, then one delta per frame:
+the bird and counters plus how far the pipes scrolled, how many left the
+screen and the pipes that spawned. Every message is a uint16 length, a type
+byte and a little-endian body; a delta is usually 25 bytes.
+
+The server runs an asyncio loop on its own thread. Game.run only hands it
+the latest state. A spectator whose unsent backlog passes MAX_BACKLOG
+bytes skips frames until it drains, then gets a fresh snapshot, so a slow
+screen shows the current frame rather than a queue of old ones.
+
+Watch a game started with --spectate ADDRESS:
+    python spectator.py [ADDRESS]
+ADDRESS is HOST:PORT, or a Unix socket path.
+"""
+import argparse
+import asyncio
+import errno
+import os
+import socket
+import stat
+import struct
+import sys
+import threading
+
+SPECTATOR_ADDRESS = '127.0.0.1:7777'
+MAX_BACKLOG = 1024  # unsent bytes (about 40 deltas) after which a spectator's frames are dropped
+SEND_BUFFER = 4096  # kernel send buffer per spectator, so stale frames can't pile up there
+KEYFRAME_INTERVAL = 600  # deltas between snapshots sent to every spectator
+LISTEN_BACKLOG = 1024
+
+# Messages: length of what follows, type, body
+HEADER = struct.Struct('<HB')
+SNAPSHOT = 1
+DELTA = 2
+# frame, bird y, velocity, ground offset, score, flags, bird color, pipe count
+SNAPSHOT_STATE = struct.Struct('<IffhIBBB')
+# frame, bird y, velocity, ground offset, score, flags, pipe scroll, pipes removed, pipes added
+DELTA_STATE = struct.Struct('<IffhIBbBB')
+PIPE_STATE = struct.Struct('<hHH')  # x, gap_y, gap
+
+# Flags
+STARTED = 1
+GAME_OVER = 2
+PAUSED = 4
+
+
+def parse_address(address):
+    """('unix', path) for paths, otherwise ('tcp', host, port)"""
+    if address.startswith('unix:'):
+        return 'unix', address[5:]
+    if os.sep in address:
+        return 'unix', address
+    host, _, port = address.rpartition(':')
+    return 'tcp', host or '127.0.0.1', int(port)
+
+
+def message(kind, body):
+    return HEADER.pack(len(body) + 1, kind) + body
+
+
+def encode_snapshot(state):
+    frame, _, y, velocity, base_x, score, flags, color, _, pipes = state
+    body = SNAPSHOT_STATE.pack(frame, y, velocity, base_x, score, flags, color, len(pipes))
+    return message(SNAPSHOT, body + b''.join(PIPE_STATE.pack(*pipe) for pipe in pipes))
+
+
+def encode_delta(previous, state):
+    """The delta from one state to the next, or None if only a snapshot can describe it.
+
+    States are Game.spectator_state() tuples. Pipes are matched by their
+    index in the course, so the delta holds one scroll distance shared by
+    all remaining pipes and just the pipes spawned since.
+    """
+    frame, seed, y, velocity, base_x, score, flags, _, spawned, pipes = state
+    _, last_seed, _, _, _, _, _, _, last_spawned, last_pipes = previous
+    if seed != last_seed:
+        return None
+    added = spawned - last_spawned
+    removed = (spawned - len(pipes)) - (last_spawned - len(last_pipes))
+    kept = len(last_pipes) - removed
+    if added < 0 or removed < 0 or kept < 0 or added > 255 or removed > 255 or kept + added != len(pipes):
+        return None
+    scroll = last_pipes[removed][0] - pipes[0][0] if kept else 0
+    if not -128 <= scroll <= 127:
+        return None
+    for (last_x, last_gap_y, last_gap), (x, gap_y, gap) in zip(last_pipes[removed:], pipes):
+        if last_x - x != scroll or last_gap_y != gap_y or last_gap != gap:
+            return None
+    body = DELTA_STATE.pack(frame, y, velocity, base_x, score, flags, scroll, removed, added)
+    return message(DELTA, body + b''.join(PIPE_STATE.pack(*pipe) for pipe in pipes[kept:]))
+
+
+class SpectatorState:
+    """A spectator's copy of the game, rebuilt from the message stream"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.synced = False
+        self.frame = 0
+        self.bird_y = 0.0
+        self.velocity = 0.0
+        self.base_x = 0
+        self.score = 0
+        self.flags = 0
+        self.color = 0
+        self.pipes = []
+        self.snapshots = 0
+        self.deltas = 0
+
+    def feed(self, data):
+        """Apply every complete message in data (plus any partial one before it)"""
+        buffer = self.buffer
+        buffer += data
+        start = 0
+        while len(buffer) - start >= HEADER.size:
+            length, kind = HEADER.unpack_from(buffer, start)
+            end = start + 2 + length
+            if end > len(buffer):
+                break
+            self.apply(kind, memoryview(buffer)[start + HEADER.size:end])
+            start = end
+        del buffer[:start]
+
+    def apply(self, kind, body):
+        if kind == SNAPSHOT:
+            (self.frame, self.bird_y, self.velocity, self.base_x, self.score, self.flags,
+             self.color, count) = SNAPSHOT_STATE.unpack_from(body)
+            self.pipes = [list(PIPE_STATE.unpack_from(body, SNAPSHOT_STATE.size + i * PIPE_STATE.size))
+                          for i in range(count)]
+            self.synced = True
+            self.snapshots += 1
+        elif kind == DELTA and self.synced:
+            (self.frame, self.bird_y, self.velocity, self.base_x, self.score, self.flags,
+             scroll, removed, added) = DELTA_STATE.unpack_from(body)
+            pipes = self.pipes
+            del pipes[:removed]
+            for pipe in pipes:
+                pipe[0] -= scroll
+            for i in range(added):
+                pipes.append(list(PIPE_STATE.unpack_from(body, DELTA_STATE.size + i * PIPE_STATE.size)))
+            self.deltas += 1
+
+
+class _Spectator(asyncio.Protocol):
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.needs_snapshot = True
+
+    def connection_made(self, transport):
+        self.transport = transport
+        sock = transport.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        self.server.clients.add(self)
+        if self.server.previous is not None:
+            transport.write(encode_snapshot(self.server.previous))
+            self.needs_snapshot = False
+
+    def connection_lost(self, exc):
+        self.server.clients.discard(self)
+
+    def data_received(self, data):
+        # Spectators only listen
+        pass
+
+
+class SpectatorServer:
+    """Broadcasts game states to local spectators from a background thread.
+
+    publish() may be called from the game loop every frame: it stores the
+    state and, if the server thread isn't already due to send one, wakes it.
+    States the thread never got to are skipped, since a delta can span any
+    number of frames. If the socket can't be opened the server prints why
+    and publish() does nothing.
+    """
+
+    def __init__(self, address=SPECTATOR_ADDRESS):
+        self.address = address
+        self.clients = set()
+        self.previous = None
+        self.pending = None
+        self.published = None
+        self.scheduled = False
+        self.since_keyframe = 0
+        self.sent = 0
+        self.dropped = 0
+        self.loop = asyncio.new_event_loop()
+        self.server = None
+        self.started = threading.Event()
+        self.thread = threading.Thread(target=self._serve, name='spectator-server', daemon=True)
+        self.thread.start()
+        self.started.wait()
+        if self.server is None:
+            self.thread.join()
+            self.loop = None
+
+    def _serve(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            kind, *where = parse_address(self.address)
+            if kind == 'unix':
+                # Replace a stale socket from an earlier game, but nothing else
+                if os.path.exists(where[0]):
+                    if not stat.S_ISSOCK(os.stat(where[0]).st_mode):
+                        raise FileExistsError(errno.EEXIST, 'exists and is not a socket', where[0])
+                    os.unlink(where[0])
+                start = self.loop.create_unix_server(lambda: _Spectator(self), where[0],
+                                                     backlog=LISTEN_BACKLOG)
+            else:
+                start = self.loop.create_server(lambda: _Spectator(self), *where,
+                                                backlog=LISTEN_BACKLOG, reuse_address=True)
+            self.server = self.loop.run_until_complete(start)
+        except (OSError, ValueError) as e:
+            print(f'Error starting spectator server on {self.address}: {e}')
+            self.loop.close()
+            self.started.set()
+            return
+        self.started.set()
+        self.loop.run_forever()
+        self.server.close()
+        for client in list(self.clients):
+            client.transport.abort()
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.loop.close()
+
+    def publish(self, state):
+        """Queue a Game.spectator_state() for broadcast; never blocks"""
+        if self.loop is None or state == self.published:
+            return
+        self.published = state
+        self.pending = state
+        if not self.scheduled:
+            self.scheduled = True
+            self.loop.call_soon_threadsafe(self._broadcast)
+
+    def _broadcast(self):
+        # Clear the flag before taking the state so a newer one is never missed
+        self.scheduled = False
+        state = self.pending
+        previous = self.previous
+        self.previous = state
+        delta = None
+        if previous is not None and self.since_keyframe < KEYFRAME_INTERVAL:
+            delta = encode_delta(previous, state)
+        self.since_keyframe = self.since_keyframe + 1 if delta else 0
+        snapshot = None
+        for client in self.clients:
+            transport = client.transport
+            if transport.get_write_buffer_size() > MAX_BACKLOG:
+                # Too far behind: skip frames until it catches up, then resync
+                client.needs_snapshot = True
+                self.dropped += 1
+                continue
+            if delta is None or client.needs_snapshot:
+                if snapshot is None:
+                    snapshot = encode_snapshot(state)
+                transport.write(snapshot)
+                client.needs_snapshot = False
+            else:
+                transport.write(delta)
+            self.sent += 1
+
+    @property
+    def spectators(self):
+        return len(self.clients)
+
+    def close(self):
+        if self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop = None
+        kind, *where = parse_address(self.address)
+        if kind == 'unix' and os.path.exists(where[0]):
+            os.unlink(where[0])
+
+
+def connect(address):
+    kind, *where = parse_address(address)
+    if kind == 'unix':
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(where[0])
+    else:
+        sock = socket.create_connection(tuple(where))
+    return sock
+
+
+class Viewer:
+    """Draws spectator states with the game's sprites, HUD and Renderer, and nothing else.
+
+    There is no Game behind it: no simulation, sounds, leaderboard or
+    particles. A state is drawn as it arrives, with one bird per color and
+    pipes from a pool placed where the state says.
+    """
+
+    def __init__(self, screen, dirty_rects=False, display=True):
+        import flappy_bird as fb
+
+        self.screen = screen
+        self.images = images = fb.load_assets(fb.download_assets())
+        self.base_y = fb.fit_scenery(images)
+        self.hud = fb.Hud(*fb.load_fonts(images), images)
+        self.renderer = fb.Renderer(screen, fb.background_layer(screen, images), dirty_rects, display)
+        self.birds = {}
+        self.pipes = []
+        self.high_score = 0
+
+    def bird(self, color):
+        """The bird sprite for a color index, made on first use"""
+        import flappy_bird as fb
+
+        bird = self.birds.get(color)
+        if bird is None:
+            frames = self.images['bird_frames'][fb.BIRD_COLORS[color]] if self.images else None
+            bird = self.birds[color] = fb.Bird(frames)
+        return bird
+
+    def draw(self, state):
+        """Draw and present one synced SpectatorState"""
+        import flappy_bird as fb
+
+        screen, renderer, hud = self.screen, self.renderer, self.hud
+        started = bool(state.flags & STARTED)
+        over = bool(state.flags & GAME_OVER)
+        paused = bool(state.flags & PAUSED)
+        self.high_score = max(self.high_score, state.score)
+        renderer.begin()
+        if self.images and self.images.get('base'):
+            base = self.images['base']
+            ground = screen.blit(base, (state.base_x, self.base_y))
+            renderer.mark(ground.union(screen.blit(base, (state.base_x + fb.SCREEN_WIDTH, self.base_y))))
+
+        bird = self.bird(state.color)
+        bird.y = bird.prev_y = state.bird_y
+        bird.velocity = state.velocity
+        # States can be skipped, so the wing frame follows the frame number
+        # rather than counting the states seen
+        if not over and bird.frames:
+            bird.frame_index = state.frame // fb.BIRD_ANIM_STEPS % len(bird.frames)
+        renderer.mark(bird.draw(screen))
+
+        pipes = self.pipes
+        pipe_image = self.images.get('pipe') if self.images else None
+        while len(pipes) < len(state.pipes):
+            pipes.append(fb.Pipe(0, pipe_image, self.base_y))
+        for pipe, (x, gap_y, gap) in zip(pipes, state.pipes):
+            pipe.place(x, gap_y, gap)
+            renderer.mark(pipe.draw(screen))
+
+        if started and not over:
+            renderer.mark(hud.draw_score(screen, state.score))
+        if paused:
+            renderer.mark(hud.draw_pause(screen))
+        if not started:
+            renderer.mark(hud.draw_start(screen))
+        if over:
+            renderer.mark(hud.draw_game_over(screen, state.score, self.high_score))
+        if started and not over and not paused:
+            renderer.mark(hud.draw_controls_hint(screen, self.base_y))
+        renderer.present()
+
+
+def watch(address):
+    """Show a streamed game in a window until it ends or the window is closed"""
+    import pygame
+    import flappy_bird as fb
+
+    try:
+        sock = connect(address)
+    except (OSError, ValueError) as e:
+        sys.exit(f'Error connecting to {address}: {e}')
+    sock.setblocking(False)
+    pygame.display.init()
+    screen = pygame.display.set_mode((fb.SCREEN_WIDTH, fb.SCREEN_HEIGHT))
+    pygame.display.set_caption(f'Flappy Bird - watching {address}')
+    viewer = Viewer(screen)
+    clock = pygame.time.Clock()
+    state = SpectatorState()
+    frame = None
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                running = False
+        try:
+            while True:
+                data = sock.recv(65536)
+                if not data:
+                    running = False
+                    break
+                state.feed(data)
+        except BlockingIOError:
+            pass
+        except OSError:
+            running = False
+        if state.synced and state.frame != frame:
+            frame = state.frame
+            viewer.draw(state)
+        clock.tick(fb.FPS)
+    sock.close()
+    pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('address', nargs='?', default=SPECTATOR_ADDRESS,
+                        help='HOST:PORT or Unix socket path the game streams to')
+    args = parser.parse_args()
+    watch(args.address)
+
+
+if __name__ == '__main__':
+    main()
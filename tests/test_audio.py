@@ -0,0 +1,70 @@
+"""AudioPlayer channel choice on the mixer, under SDL's dummy audio driver.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame
+import flappy_bird as fb
+
+
+@pytest.fixture
+def player():
+    player = fb.AudioPlayer(os.path.join(ROOT, 'assets'), log=True)
+    if not player.enabled:
+        pytest.skip('no mixer')
+    yield player
+    pygame.mixer.quit()
+
+
+def play(player, name):
+    """Play name at once, however recently it last played"""
+    player.last_played[name] = float('-inf')
+    player.play(name)
+
+
+def test_busy_category_steals_its_oldest_channel(player):
+    # The point sound lasts a second, so nothing ends on its own here
+    channels = player.channels['point']
+    started = player.started['point']
+    play(player, 'point')
+    play(player, 'point')
+    assert all(channel.get_busy() for channel in channels)
+    # A free channel is reused out of turn, leaving the other one the oldest
+    channels[0].stop()
+    play(player, 'point')
+    assert started[0] > started[1]
+    play(player, 'point')
+    assert started[1] > started[0]
+    play(player, 'point')
+    assert started[0] > started[1]
+    assert all(channel.get_busy() for channel in channels)
+
+
+def test_categories_keep_their_own_channels(player):
+    for _ in range(len(player.channels['point'])):
+        play(player, 'point')
+    points = list(player.started['point'])
+    for _ in range(5):
+        play(player, 'wing')
+        play(player, 'hit')
+    assert player.started['point'] == points
+    assert all(channel.get_busy() for channel in player.channels['point'])
+    reserved = {channel for channels in player.channels.values() for channel in channels}
+    assert pygame.mixer.find_channel() not in reserved
+
+
+def test_quick_repeats_are_dropped(player):
+    player.play('wing')
+    player.play('wing')
+    player.play('point')
+    assert [name for name, _ in player.log] == ['wing', 'point']
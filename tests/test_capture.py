@@ -0,0 +1,91 @@
+"""FrameCapture output against the frames it was given.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import flappy_bird as fb
+from capture import FrameCapture, render_replay
+from replay import Replay
+
+SIZE = (64, 48)
+
+
+def frames(screen, count, seed=0):
+    """Draw count frames of noise on screen, yielding each frame's RGB bytes"""
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        pygame.surfarray.blit_array(screen, rng.integers(0, 2 ** 24, SIZE).astype(np.uint32))
+        yield pygame.image.tobytes(screen, 'RGB')
+
+
+@pytest.mark.parametrize('masks', [None, (0xFF, 0xFF00, 0xFF0000, 0)])
+def test_raw_stream_holds_every_frame(tmp_path, masks):
+    # The writer reorders whatever channel order the screen has
+    screen = pygame.Surface(SIZE, 0, 32, masks) if masks else pygame.Surface(SIZE)
+    path = str(tmp_path / 'frames.rgb')
+    capture = FrameCapture(path, screen, slots=2)
+    expected = []
+    for data in frames(screen, 40):
+        expected.append(data)
+        capture.capture()
+    assert capture.close().startswith(f'captured 40/40 frames to {path} (raw)')
+    with open(path, 'rb') as f:
+        assert f.read() == b''.join(expected)
+
+
+def test_png_directory_holds_every_frame(tmp_path):
+    screen = pygame.Surface(SIZE)
+    path = str(tmp_path / 'frames')
+    capture = FrameCapture(path, screen)
+    expected = []
+    for data in frames(screen, 5, 1):
+        expected.append(data)
+        capture.capture()
+    capture.close()
+    assert sorted(os.listdir(path)) == [f'frame_{i:06d}.png' for i in range(5)]
+    for i, data in enumerate(expected):
+        image = pygame.image.load(os.path.join(path, f'frame_{i:06d}.png'))
+        assert pygame.image.tobytes(image, 'RGB') == data
+
+
+def test_video_without_an_encoder_falls_back_to_raw(tmp_path):
+    screen = pygame.Surface(SIZE)
+    capture = FrameCapture(str(tmp_path / 'clip.mp4'), screen, encoder='no-such-encoder')
+    data = next(frames(screen, 1))
+    capture.capture()
+    capture.close()
+    assert os.listdir(tmp_path) == ['clip.rgb']
+    with open(tmp_path / 'clip.rgb', 'rb') as f:
+        assert f.read() == data
+
+
+def test_rendered_replay_ends_on_its_score(tmp_path):
+    game = fb.Game(headless=True, seed=6, leaderboard_path=None)
+    game.flap()
+    while not game.game_over:
+        if game.bird.y > 300 and game.bird.velocity >= 0:
+            game.flap()
+        game.update()
+        game.roll_ahead()
+    replay = Replay.from_simulation(game)
+    path = str(tmp_path / 'run.rgb')
+    rendered, summary = render_replay(replay, path, lead_in=3, hold=2)
+    frames = 3 + replay.frames + 2
+    assert summary.startswith(f'captured {frames}/{frames} frames')
+    assert (rendered.score, rendered.frame_count) == (replay.score, replay.frames)
+    frame_size = fb.SCREEN_WIDTH * fb.SCREEN_HEIGHT * 3
+    assert os.path.getsize(path) == frames * frame_size
+    with open(path, 'rb') as f:
+        f.seek(-frame_size, os.SEEK_END)
+        assert f.read() == pygame.image.tobytes(rendered.screen, 'RGB')
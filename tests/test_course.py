@@ -0,0 +1,76 @@
+"""Courses against the per-game gap rolls they replaced, privately and shared.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import multiprocessing
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flappy_core as core
+
+BASE_Y = 488
+
+
+def read_attached(args):
+    """Attach to a shared course in a worker and return its pipes, extending past the shared part"""
+    name, difficulty, count = args
+    course = core.Course.attach(name, difficulty)
+    pipes = course.lookahead(0, count)
+    course.close()
+    return pipes
+
+
+@pytest.mark.parametrize('seed', [0, 12345, core.SEED_LIMIT - 1])
+def test_flat_course_rolls_the_old_gaps(seed):
+    rng = random.Random(seed)
+    old = [rng.randint(150, BASE_Y - 250) for _ in range(600)]
+    course = core.Course(seed, BASE_Y)
+    assert course.gaps(600) == old
+    assert course.pipe(599) == (old[599], core.PIPE_GAP, core.PIPE_SPEED, core.PIPE_SPAWN_FREQUENCY)
+    assert core.course_gaps(seed, 600, BASE_Y) == old
+
+
+@pytest.mark.parametrize('difficulty', ['flat', 'ramp'])
+def test_attached_courses_match_private_ones(difficulty):
+    course = core.Course(7, BASE_Y, difficulty)
+    count = course.length + 100
+    expected = core.Course(7, BASE_Y, difficulty).lookahead(0, count)
+    shm = course.share()
+    try:
+        with multiprocessing.Pool(1) as pool:
+            assert pool.map(read_attached, [(shm.name, difficulty, count)] * 2) == [expected] * 2
+        # Workers leave the block for its creator to unlink
+        attached = core.Course.attach(shm.name, difficulty)
+        assert (attached.seed, attached.base_y, attached.length) == (7, BASE_Y, course.length)
+        assert attached.lookahead(0, course.length) == expected[:course.length]
+        attached.close()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_games_on_an_attached_course_play_the_same():
+    shm = core.Course(3, BASE_Y, 'ramp').share()
+    try:
+        games = [core.Simulation(BASE_Y, 3, 'ramp'), core.Simulation(BASE_Y, difficulty='ramp')]
+        course = core.Course.attach(shm.name, 'ramp')
+        games[1].reset(course=course)
+        for game in games:
+            game.flap()
+        while not games[0].game_over:
+            for game in games:
+                if game.bird.y > 300:
+                    game.flap()
+                game.update()
+                game.roll_ahead()
+            assert games[0].snapshot() == games[1].snapshot()
+        course.close()
+    finally:
+        shm.close()
+        shm.unlink()
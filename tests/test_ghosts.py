@@ -0,0 +1,111 @@
+"""GhostLayer's batched blit against drawing one translucent Bird per ghost.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame
+import flappy_bird as fb
+import flappy_core as core
+from replay import Replay
+
+
+@pytest.fixture(scope='module')
+def images():
+    images = fb.load_assets(os.path.join(ROOT, 'assets'))
+    fb.bird_rotation_atlas.prebuild(images['bird_frames'])
+    return images
+
+
+def play(seed):
+    """A bot's run, and the bird's y and velocity before its first frame and after each one"""
+    sim = core.Simulation(seed=seed)
+    rng = random.Random(seed)
+    ys, velocities = [sim.bird.y], [sim.bird.velocity]
+    sim.flap()
+    while not sim.game_over:
+        if sim.bird.y > 280 + rng.randint(-80, 80) and sim.bird.velocity >= 0:
+            sim.flap()
+        sim.update()
+        sim.roll_ahead()
+        ys.append(sim.bird.y)
+        velocities.append(sim.bird.velocity)
+    return sim, ys, velocities
+
+
+def draw_birds(screen, images, trajectories, frame, alpha):
+    """One Bird per ghost, drawn with a translucent copy of its atlas sprite"""
+    for ghost, (ys, velocities, color) in enumerate(trajectories):
+        if frame >= len(ys):
+            continue
+        frames = images['bird_frames'][color]
+        bird = fb.Bird(frames)
+        bird.prev_y = ys[frame - 1] if frame else ys[0]
+        bird.y = ys[frame]
+        bird.velocity = velocities[frame]
+        # Ghosts flap out of step with each other
+        bird.frame_index = (frame // fb.BIRD_ANIM_STEPS + ghost) % len(frames)
+        rotated, offset_x, offset_y = fb.bird_rotation_atlas.get(frames[bird.frame_index], bird.angle())
+        ghost_image = rotated.copy()
+        ghost_image.fill((255, 255, 255, fb.GHOST_ALPHA), special_flags=pygame.BLEND_RGBA_MULT)
+        center_x, center_y = bird.center(fb.lerp(bird.prev_y, bird.y, alpha))
+        screen.blit(ghost_image, (center_x - offset_x, center_y - offset_y))
+
+
+def test_trajectories_follow_the_replayed_bird():
+    for seed in range(4):
+        sim, ys, velocities = play(seed)
+        trajectory = Replay.from_simulation(sim).trajectory()
+        assert list(trajectory[0]) == list(np.float32(ys))
+        assert list(trajectory[1]) == list(np.float32(velocities))
+
+
+@pytest.mark.parametrize('alpha', [1.0, 0.3])
+def test_layer_draws_like_single_birds(images, alpha):
+    trajectories = []
+    for seed in range(12):
+        _, ys, velocities = play(seed)
+        color = fb.BIRD_COLORS[seed % len(fb.BIRD_COLORS)]
+        trajectories.append((np.float32(ys), np.float32(velocities), color))
+    layer = fb.GhostLayer(images['bird_frames'])
+    layer.load(trajectories)
+    background = pygame.Surface((fb.SCREEN_WIDTH, fb.SCREEN_HEIGHT))
+    background.blit(images['background'], (0, 0))
+    expected = background.copy()
+    actual = background.copy()
+    longest = max(len(ys) for ys, _, _ in trajectories)
+    for frame in range(0, longest + 10, 7):
+        expected.blit(background, (0, 0))
+        actual.blit(background, (0, 0))
+        draw_birds(expected, images, trajectories, frame, alpha)
+        rect = layer.draw(actual, frame, alpha)
+        assert actual.get_view('2').raw == expected.get_view('2').raw, f'frame {frame}'
+        assert layer.drawn == layer.visible == sum(frame < len(ys) for ys, _, _ in trajectories)
+        if rect:
+            outside = actual.copy()
+            outside.blit(background, rect, rect)
+            assert outside.get_view('2').raw == background.get_view('2').raw
+
+
+def test_limit_keeps_the_ghosts_nearest_the_player(images):
+    heights = [50, 120, 200, 260, 300, 340, 420]
+    layer = fb.GhostLayer(images['bird_frames'], limit=3)
+    layer.load(([y, y], [0, 0], 'red') for y in heights)
+    screen = pygame.Surface((fb.SCREEN_WIDTH, fb.SCREEN_HEIGHT))
+    rect = layer.draw(screen, 1, near_y=250)
+    assert layer.visible == layer.drawn == 3
+    # Level birds at 200, 260 and 300
+    assert 120 + layer.height < rect.top <= 200 and 300 + layer.height <= rect.bottom < 340
+    # Finished runs are culled
+    assert layer.draw(screen, 2) is None and layer.visible == 0
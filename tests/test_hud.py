@@ -0,0 +1,145 @@
+"""Hud and its TextCache against the per-frame HUD drawing they replaced.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame
+import flappy_bird as fb
+from flappy_bird import SCREEN_WIDTH, SCREEN_HEIGHT, WHITE, BLACK, RED
+
+
+def draw_score(screen, fonts, score):
+    """The old score drawing: render the outline and the text again every frame"""
+    font = fonts[0]
+    score_str = str(score)
+    for dx, dy in fb.SCORE_OUTLINE_OFFSETS:
+        outline_text = font.render(score_str, True, BLACK)
+        screen.blit(outline_text, outline_text.get_rect(center=(SCREEN_WIDTH // 2 + dx, 55 + dy)))
+    score_text = font.render(score_str, True, WHITE)
+    screen.blit(score_text, score_text.get_rect(center=(SCREEN_WIDTH // 2, 55)))
+
+
+def draw_pause(screen, fonts):
+    """The old pause overlay"""
+    font, small_font, _ = fonts
+    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    overlay.set_alpha(180)
+    overlay.fill((0, 0, 0))
+    screen.blit(overlay, (0, 0))
+    pause_text = font.render("PAUSED", True, WHITE)
+    screen.blit(pause_text, pause_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 30)))
+    continue_text = small_font.render("Press P to Continue", True, WHITE)
+    screen.blit(continue_text, continue_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30)))
+
+
+def draw_game_over(screen, fonts, images, score, high_score):
+    """The old game over overlay, score panel and restart button"""
+    font, small_font, tiny_font = fonts
+    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    overlay.set_alpha(128)
+    overlay.fill((0, 0, 0))
+    screen.blit(overlay, (0, 0))
+    if images and images.get('gameover'):
+        gameover = images['gameover']
+        screen.blit(gameover, gameover.get_rect(center=(SCREEN_WIDTH // 2, 100)))
+    else:
+        game_over_text = font.render("GAME OVER", True, RED)
+        screen.blit(game_over_text, game_over_text.get_rect(center=(SCREEN_WIDTH // 2, 100)))
+
+    panel_width, panel_height = 300, 150
+    panel_x = (SCREEN_WIDTH - panel_width) // 2
+    panel_y = 180
+    pygame.draw.rect(screen, (100, 95, 70), (panel_x + 4, panel_y + 4, panel_width, panel_height), border_radius=10)
+    pygame.draw.rect(screen, (240, 230, 180), (panel_x, panel_y, panel_width, panel_height), border_radius=10)
+    pygame.draw.rect(screen, (200, 185, 130), (panel_x, panel_y, panel_width, panel_height), 5, border_radius=10)
+    divider_y = panel_y + panel_height // 2
+    pygame.draw.line(screen, (200, 185, 130), (panel_x + 20, divider_y), (panel_x + panel_width - 20, divider_y), 2)
+    screen.blit(small_font.render("SCORE", True, (100, 90, 70)), (panel_x + 25, panel_y + 25))
+    value = font.render(str(score), True, (60, 55, 40))
+    screen.blit(value, value.get_rect(right=panel_x + panel_width - 25, centery=panel_y + 42))
+    screen.blit(small_font.render("BEST", True, (100, 90, 70)), (panel_x + 25, panel_y + 90))
+    value = font.render(str(high_score), True, (60, 55, 40))
+    screen.blit(value, value.get_rect(right=panel_x + panel_width - 25, centery=panel_y + 107))
+
+    restart_y = panel_y + panel_height + 30
+    restart_text = tiny_font.render("Press SPACE to Restart", True, WHITE)
+    restart_width = restart_text.get_width() + 20
+    restart_height = 35
+    restart_x = (SCREEN_WIDTH - restart_width) // 2
+    pygame.draw.rect(screen, (40, 40, 40), (restart_x + 3, restart_y + 3, restart_width, restart_height), border_radius=8)
+    pygame.draw.rect(screen, (70, 70, 70), (restart_x, restart_y, restart_width, restart_height), border_radius=8)
+    pygame.draw.rect(screen, (120, 120, 120), (restart_x, restart_y, restart_width, restart_height), 3, border_radius=8)
+    screen.blit(restart_text, restart_text.get_rect(center=(SCREEN_WIDTH // 2, restart_y + restart_height // 2)))
+    hint = tiny_font.render("(New random color)", True, (180, 180, 180))
+    screen.blit(hint, hint.get_rect(center=(SCREEN_WIDTH // 2, restart_y + restart_height + 15)))
+
+
+@pytest.fixture(scope='module')
+def images():
+    return fb.load_assets(os.path.join(ROOT, 'assets'))
+
+
+@pytest.fixture(scope='module')
+def fonts(images):
+    return fb.load_fonts(images)
+
+
+@pytest.fixture(scope='module')
+def background():
+    # Noise shows any difference in how the overlays blend
+    rng = np.random.default_rng(0)
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.surfarray.blit_array(surface, rng.integers(0, 2 ** 24, (SCREEN_WIDTH, SCREEN_HEIGHT)).astype(np.uint32))
+    return surface
+
+
+def assert_same_pixels(background, old, new):
+    expected = background.copy()
+    old(expected)
+    actual = background.copy()
+    # Twice, so the second frame draws from the cache
+    for _ in range(2):
+        actual.blit(background, (0, 0))
+        new(actual)
+    assert actual.get_view('2').raw == expected.get_view('2').raw
+
+
+@pytest.mark.parametrize('score', [0, 7, 42, 123])
+def test_score_draws_like_before(background, fonts, images, score):
+    hud = fb.Hud(*fonts, images)
+    assert_same_pixels(background, lambda s: draw_score(s, fonts, score), lambda s: hud.draw_score(s, score))
+
+
+def test_pause_draws_like_before(background, fonts, images):
+    hud = fb.Hud(*fonts, images)
+    assert_same_pixels(background, lambda s: draw_pause(s, fonts), hud.draw_pause)
+
+
+@pytest.mark.parametrize('sprites', [True, False])
+def test_game_over_draws_like_before(background, fonts, images, sprites):
+    images = images if sprites else None
+    hud = fb.Hud(*fonts, images)
+    assert_same_pixels(background, lambda s: draw_game_over(s, fonts, images, 12, 30),
+                       lambda s: hud.draw_game_over(s, 12, 30))
+
+
+def test_text_cache_is_bounded(fonts):
+    cache = fb.TextCache(max_size=3)
+    font = fonts[2]
+    first = cache.render(font, '0', WHITE)
+    assert cache.render(font, '0', WHITE) is first
+    for score in range(1, 4):
+        cache.render(font, str(score), WHITE)
+    assert len(cache.surfaces) == 3
+    assert cache.render(font, '0', WHITE) is not first
@@ -0,0 +1,93 @@
+"""Leaderboard bests, top scores, compaction and the highscore.txt import.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leaderboard import Leaderboard
+
+
+def runs(count, seed=0):
+    rng = random.Random(seed)
+    return [(rng.choice('abc'), rng.choice([1, 2, None]), rng.randrange(40)) for _ in range(count)]
+
+
+def test_bests_match_the_database(tmp_path):
+    path = str(tmp_path / 'scores.db')
+    # Two games on one file each append their own rows
+    boards = [Leaderboard(path), Leaderboard(path)]
+    rows = runs(500)
+    for i, (player, seed, score) in enumerate(rows):
+        boards[i % 2].submit(player, seed, score, frames=score * 90)
+    for board in boards:
+        board.close()
+    expected = {}
+    for player, _, score in rows:
+        expected[player] = max(expected.get(player, 0), score)
+    board = Leaderboard(path)
+    assert board.bests == expected
+    assert all(board.best(player) == score for player, score in expected.items())
+    assert board.best('nobody') == 0
+    assert len(board.top(k=1000)) == len(rows)
+    board.close()
+
+
+def test_top_orders_by_score_then_age(tmp_path):
+    board = Leaderboard(str(tmp_path / 'scores.db'))
+    rows = runs(300, 1)
+    for player, seed, score in rows:
+        board.submit(player, seed, score)
+    board.flush()
+    for player, seed in [(None, None), ('a', None), ('b', 2), (None, 1)]:
+        matching = [row for row in rows if player in (None, row[0]) and seed in (None, row[1])]
+        expected = sorted(matching, key=lambda row: -row[2])[:10]
+        assert [(p, s, score) for p, s, score, _, _ in board.top(player, seed)] == expected
+    board.close()
+
+
+def test_compact_keeps_the_best_per_player_and_seed(tmp_path):
+    board = Leaderboard(str(tmp_path / 'scores.db'))
+    rows = runs(400, 2)
+    for player, seed, score in rows:
+        board.submit(player, seed, score)
+    expected = {}
+    for player, seed, score in rows:
+        expected.setdefault((player, seed), []).append(score)
+    kept = sum(min(len(scores), 3) for scores in expected.values())
+    assert board.compact(keep=3) == len(rows) - kept
+    for (player, seed), scores in expected.items():
+        if seed is None:
+            continue
+        assert [row[2] for row in board.top(player, seed)] == sorted(scores, reverse=True)[:3]
+    assert len(board.top(k=1000)) == kept
+    board.close()
+
+
+def test_high_score_file_is_imported_once(tmp_path):
+    high_score = tmp_path / 'highscore.txt'
+    high_score.write_text('17')
+    path = str(tmp_path / 'scores.db')
+    board = Leaderboard(path)
+    board.import_high_score(str(high_score), 'a')
+    board.close()
+    board = Leaderboard(path)
+    assert board.best('a') == 17
+    board.import_high_score(str(high_score), 'a')
+    board.flush()
+    assert board.top('a') == [('a', None, 17, 0, 'flat')]
+    board.close()
+
+
+def test_memory_only_board_keeps_bests():
+    board = Leaderboard(None)
+    board.submit('a', 1, 5)
+    board.submit('a', 1, 3)
+    board.flush()
+    assert board.best('a') == 5
+    assert board.top() == [] and board.compact() == 0
+    board.close()
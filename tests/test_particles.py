@@ -0,0 +1,91 @@
+"""ParticleSystem against the Particle objects it replaced.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import flappy_bird as fb
+
+
+class Particle:
+    """The old per-particle object, started from a pooled particle's rolls"""
+
+    def __init__(self, system, slot):
+        self.x = system.x[slot]
+        self.y = system.y[slot]
+        self.vx = system.vx[slot]
+        self.vy = system.vy[slot]
+        self.lifetime = system.lifetime[slot]
+        self.age = 0
+
+    def update(self):
+        self.x += self.vx
+        self.y += self.vy
+        self.vy += 0.2  # gravity
+        self.age += 1
+
+    def is_dead(self):
+        return self.age >= self.lifetime
+
+
+def live_slots(system):
+    return [int(slot) for slot in np.flatnonzero(system.alive)]
+
+
+def test_particles_move_and_die_like_particle_objects():
+    system = fb.ParticleSystem(capacity=4)
+    system.rng = np.random.default_rng(0)
+    particles = {}
+    for frame in range(120):
+        if frame % 10 == 0:
+            before = set(live_slots(system))
+            system.emit(200, 300, fb.WHITE, 8)
+            for slot in set(live_slots(system)) - before:
+                particles[slot] = Particle(system, slot)
+        system.update()
+        for particle in particles.values():
+            particle.update()
+        particles = {slot: p for slot, p in particles.items() if not p.is_dead()}
+        assert sorted(particles) == live_slots(system)
+        assert len(system) == len(particles)
+        for slot, particle in particles.items():
+            assert (system.x[slot], system.y[slot], system.vy[slot]) == (particle.x, particle.y, particle.vy)
+    # Slots are reused rather than the pool growing with every burst
+    assert system.capacity <= 64
+
+
+def test_rolls_stay_in_the_old_ranges():
+    system = fb.ParticleSystem()
+    system.rng = np.random.default_rng(1)
+    system.emit(0, 0, fb.WHITE, 500)
+    live = np.flatnonzero(system.alive)
+    assert ((-2 <= system.vx[live]) & (system.vx[live] <= 2)).all()
+    assert ((-4 <= system.vy[live]) & (system.vy[live] <= -1)).all()
+    assert set(system.size[live]) == set(range(fb.PARTICLE_MIN_SIZE, fb.PARTICLE_MAX_SIZE + 1))
+    assert set(system.lifetime[live]) == set(range(20, 41))
+
+
+@pytest.mark.parametrize('frames', [0, 5, 19])
+def test_draw_stays_inside_its_rect(frames):
+    system = fb.ParticleSystem()
+    system.rng = np.random.default_rng(2)
+    system.emit(200, 300, fb.WHITE, 30)
+    system.emit(100, 50, (255, 0, 0), 30)
+    for _ in range(frames):
+        system.update()
+    screen = pygame.Surface((fb.SCREEN_WIDTH, fb.SCREEN_HEIGHT))
+    rect = system.draw(screen)
+    drawn = pygame.mask.from_threshold(screen, (0, 0, 0), (1, 1, 1, 255))
+    drawn.invert()
+    bounds = drawn.get_bounding_rects()
+    assert bounds and rect.contains(bounds[0].unionall(bounds))
@@ -0,0 +1,79 @@
+"""Cached pipe columns against the tile-by-tile drawing they replaced.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame
+import flappy_bird as fb
+
+BASE_Y = 488
+
+
+def draw_tiles(screen, image, x, gap_y, base_y, gap):
+    """The old Pipe.draw: flip and blit every tile, cropping the last one into a new surface"""
+    top_pipe = pygame.transform.flip(image, False, True)
+    for y in range(0, gap_y, image.get_height()):
+        if y + image.get_height() > gap_y:
+            crop_height = gap_y - y
+            cropped = pygame.Surface((image.get_width(), crop_height), pygame.SRCALPHA)
+            cropped.blit(top_pipe, (0, 0), (0, image.get_height() - crop_height, image.get_width(), crop_height))
+            screen.blit(cropped, (x, y))
+        else:
+            screen.blit(top_pipe, (x, y))
+    bottom_pipe_y = gap_y + gap
+    for y in range(bottom_pipe_y, int(base_y), image.get_height()):
+        if y + image.get_height() > base_y:
+            crop_height = int(base_y - y)
+            if crop_height > 0:
+                cropped = pygame.Surface((image.get_width(), crop_height), pygame.SRCALPHA)
+                cropped.blit(image, (0, 0), (0, 0, image.get_width(), crop_height))
+                screen.blit(cropped, (x, y))
+        else:
+            screen.blit(image, (x, y))
+
+
+@pytest.fixture(scope='module')
+def images():
+    return fb.load_assets(os.path.join(ROOT, 'assets'))
+
+
+@pytest.mark.parametrize('gap', [fb.PIPE_GAP, 140])
+@pytest.mark.parametrize('gap_y', [fb.core.GAP_MIN, 200, 237, 320, 321, BASE_Y - fb.core.GAP_MARGIN])
+def test_cached_columns_draw_like_tiles(images, gap_y, gap):
+    image = images['pipe']
+    expected = pygame.Surface((fb.SCREEN_WIDTH, fb.SCREEN_HEIGHT))
+    actual = pygame.Surface((fb.SCREEN_WIDTH, fb.SCREEN_HEIGHT))
+    background = pygame.Surface((fb.SCREEN_WIDTH, fb.SCREEN_HEIGHT))
+    background.blit(images['background'], (0, 0))
+    for x in (-30, 0, 173, fb.SCREEN_WIDTH - 10):
+        expected.blit(images['background'], (0, 0))
+        actual.blit(images['background'], (0, 0))
+        draw_tiles(expected, image, x, gap_y, BASE_Y, gap)
+        pipe = fb.Pipe(x, image, BASE_Y, gap_y=gap_y, gap=gap)
+        rect = pipe.draw(actual)
+        assert actual.get_view('2').raw == expected.get_view('2').raw
+        # The returned rect covers everything drawn, for the dirty-rect renderer
+        outside = actual.copy()
+        outside.blit(images['background'], rect, rect)
+        assert outside.get_view('2').raw == background.get_view('2').raw
+
+
+def test_columns_are_shared_and_bounded(images):
+    image = images['pipe']
+    cache = fb.PipeColumnCache(max_size=4)
+    first = cache.get(image, 200, BASE_Y)
+    assert cache.get(image, 200, BASE_Y) is first
+    for gap_y in range(201, 206):
+        cache.get(image, gap_y, BASE_Y)
+    assert len(cache.columns) == 4
+    assert cache.get(image, 200, BASE_Y) is not first
@@ -0,0 +1,50 @@
+"""Dirty-rect rendering against full redraws of the same game.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flappy_bird as fb
+
+
+def wants_flap(game):
+    """Flap while falling past the bottom of the next gap"""
+    target = game.base_y // 2
+    for pipe in game.pipes:
+        if pipe.x + pipe.width >= game.bird.x:
+            target = pipe.gap_y + pipe.gap - 40
+            break
+    return game.bird.velocity >= 0 and game.bird.y + game.bird.height > target
+
+
+@pytest.mark.parametrize('seed', [1, 7])
+def test_dirty_rects_draw_like_full_frames(seed):
+    games = [fb.Game(dirty_rects=dirty_rects, headless=True, seed=seed, leaderboard_path=None)
+             for dirty_rects in (False, True)]
+    restarts = best = 0
+    for frame in range(1500):
+        for game in games:
+            if game.game_over and frame % 40 == 0:
+                # A new course from the game's next seed, as after SPACE
+                game.reset(game.seed + 1)
+            elif frame % 400 in (150, 170):
+                game.toggle_pause()
+            elif frame % 400 > 20 and (not game.game_started or frame % 400 < 250 and wants_flap(game)):
+                game.pending_flaps.append(0)
+            game.update()
+            # Interpolated frames move everything by fractions of a step
+            game.draw(alpha=0.5 if frame % 3 else 1.0)
+        full, dirty = games
+        assert (full.frame_count, full.score, full.game_over) == (dirty.frame_count, dirty.score, dirty.game_over)
+        assert dirty.screen.get_view('2').raw == full.screen.get_view('2').raw, f'frame {frame}'
+        restarts += full.game_over
+        best = max(best, full.score)
+    assert restarts and best
@@ -0,0 +1,113 @@
+"""Spectator snapshots and deltas rebuild the game's state, sent directly and over a socket.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+import random
+import struct
+import sys
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flappy_bird as fb
+import spectator
+from spectator import SpectatorServer, SpectatorState, encode_delta, encode_snapshot
+
+
+def f32(value):
+    return struct.unpack('<f', struct.pack('<f', value))[0]
+
+
+def states(seed, frames):
+    """Game.spectator_state() after every frame of a bot that pauses, dies and restarts"""
+    game = fb.Game(headless=True, seed=seed, leaderboard_path=None)
+    for frame in range(frames):
+        if game.game_over and frame % 30 == 0:
+            game.reset(game.seed + 1)
+        elif frame % 400 in (150, 160):
+            game.toggle_pause()
+        elif frame % 400 > 10 and (not game.game_started or frame % 400 < 300 and game.bird.y > 280):
+            game.flap()
+        game.update()
+        game.roll_ahead()
+        yield game.spectator_state()
+
+
+def assert_synced(watcher, state):
+    frame, _, y, velocity, base_x, score, flags, color, _, pipes = state
+    assert watcher.synced
+    assert (watcher.frame, watcher.bird_y, watcher.velocity, watcher.base_x) == (frame, f32(y), f32(velocity), base_x)
+    assert (watcher.score, watcher.flags, watcher.color) == (score, flags, color)
+    assert watcher.pipes == [list(pipe) for pipe in pipes]
+
+
+@pytest.mark.parametrize('seed', [2, 9])
+def test_deltas_rebuild_every_state(seed):
+    rng = random.Random(seed)
+    watcher = SpectatorState()
+    previous = None
+    sizes = []
+    pending = b''
+    for state in states(seed, 1500):
+        # Some states are never sent, so deltas span several frames
+        if previous is not None and rng.random() < 0.3:
+            continue
+        data = encode_delta(previous, state) if previous is not None else None
+        if data is None:
+            data = encode_snapshot(state)
+        else:
+            sizes.append(len(data))
+        previous = state
+        # Messages arrive split at arbitrary points
+        pending += data
+        cut = rng.randrange(len(pending) + 1)
+        watcher.feed(pending[:cut])
+        watcher.feed(pending[cut:])
+        pending = b''
+        assert_synced(watcher, state)
+    assert watcher.snapshots > 1 and watcher.deltas > 10 * watcher.snapshots
+    assert max(set(sizes), key=sizes.count) == 25
+
+
+def test_deltas_need_the_same_game():
+    first, *rest = states(4, 40)
+    assert encode_delta(first, rest[-1]) is not None
+    restarted = (first[0], first[1] + 1) + first[2:]
+    assert encode_delta(first, restarted) is None
+
+
+def test_server_streams_to_a_socket(tmp_path):
+    address = str(tmp_path / 'game.sock')
+    server = SpectatorServer(address)
+    published = list(states(5, 300))
+    try:
+        server.publish(published[0])
+        sock = spectator.connect(address)
+        sock.settimeout(5)
+        watcher = SpectatorState()
+        for state in published[1:]:
+            server.publish(state)
+            # A spectator that stops reading is skipped until it catches up
+            while not watcher.synced or (watcher.frame, watcher.flags) != (state[0], state[6]):
+                watcher.feed(sock.recv(65536))
+            assert_synced(watcher, state)
+        assert watcher.deltas > 100
+        assert server.spectators == 1
+        sock.close()
+    finally:
+        server.close()
+    assert not os.path.exists(address)
+
+
+def test_server_keeps_files_that_are_not_sockets(tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_text('mine')
+    server = SpectatorServer(str(path))
+    server.publish(next(states(1, 1)))
+    assert server.loop is None
+    assert path.read_text() == 'mine'
@@ -0,0 +1,168 @@
+"""Stepper and replays against Simulation, frame for frame.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+from array import array
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flappy_core as core
+from batch_sim import BatchSimulator
+from replay import Replay, decode_runs, encode_runs, verify_replays
+
+SEEDS = range(8)
+MAX_FRAMES = 5000
+
+
+def bot_flap(sim, rng, jitter=20):
+    """Flap while falling near the bottom of the next gap, jittered so games differ"""
+    target = core.SCREEN_HEIGHT // 2
+    for pipe in sim.pipes:
+        if pipe.x + pipe.width >= sim.bird.x:
+            target = pipe.gap_y + pipe.gap - 50
+            break
+    return sim.bird.velocity >= 0 and sim.bird.y + sim.bird.height > target + rng.randint(-jitter, jitter)
+
+
+def valid(state):
+    """The part of a state buffer in use; slots past the pipe count are stale"""
+    return list(state[:core.STATE_HEADER + int(state[core.STATE_PIPE_COUNT]) * core.PIPE_FIELDS])
+
+
+def record(seed):
+    """A replay of a bot that misses sooner or later"""
+    sim = core.Simulation(seed=seed)
+    rng = random.Random(seed)
+    sim.flap()
+    while not sim.game_over and sim.frame_count < MAX_FRAMES:
+        if bot_flap(sim, rng, 60):
+            sim.flap()
+        sim.update()
+        sim.roll_ahead()
+    return Replay.from_simulation(sim)
+
+
+@pytest.mark.parametrize('difficulty', ['flat', 'ramp'])
+@pytest.mark.parametrize('seed', SEEDS)
+def test_stepper_matches_simulation(difficulty, seed):
+    sim = core.Simulation(seed=seed, difficulty=difficulty)
+    stepper = sim.stepper()
+    state = sim.snapshot()
+    rng = random.Random(seed)
+    flap = True
+    while not sim.game_over and sim.frame_count < MAX_FRAMES:
+        if rng.random() < 0.005:
+            sim.toggle_pause()
+            state[core.STATE_PAUSED] = float(sim.paused)
+        if flap:
+            sim.flap()
+        over = stepper.step(state, flap)
+        sim.update()
+        sim.roll_ahead()
+        stepper.roll_ahead(state)
+        assert over == sim.game_over
+        assert valid(state) == valid(sim.snapshot()), f'frame {sim.frame_count}'
+        flap = bot_flap(sim, rng)
+
+
+def test_batch_matches_simulation():
+    seed = 40
+    batch = BatchSimulator(len(SEEDS), seed=seed)
+    sims = [core.Simulation(seed=seed + i) for i in SEEDS]
+    rngs = [random.Random(i) for i in SEEDS]
+    flaps = [True] * len(sims)
+    while not all(sim.game_over for sim in sims) and sims[0].frame_count < MAX_FRAMES:
+        for sim, flap in zip(sims, flaps):
+            if flap:
+                sim.flap()
+            sim.update()
+        batch.step(flaps)
+        assert list(batch.done) == [sim.game_over for sim in sims]
+        assert list(batch.y) == [sim.bird.y for sim in sims]
+        assert list(batch.score) == [sim.score for sim in sims]
+        flaps = [bot_flap(sim, rng) for sim, rng in zip(sims, rngs)]
+    assert max(sim.score for sim in sims) > 10
+
+
+def test_restore_replays_the_same_frames():
+    sim = core.Simulation(seed=3)
+    rng = random.Random(3)
+    sim.flap()
+    for _ in range(300):
+        if bot_flap(sim, rng):
+            sim.flap()
+        sim.update()
+    state = sim.snapshot()
+    flap_log = bytes(sim.flap_log)
+
+    def play():
+        frames = []
+        for _ in range(300):
+            if sim.bird.y > 330:
+                sim.flap()
+            sim.update()
+            frames.append(array('d', sim.snapshot()))
+        return frames
+    first = play()
+    sim.restore(state)
+    assert bytes(sim.flap_log) == flap_log
+    assert [valid(s) for s in play()] == [valid(s) for s in first]
+
+
+def test_restore_keeps_a_pending_flap():
+    sim = core.Simulation(seed=5)
+    sim.flap()
+    for _ in range(40):
+        sim.update()
+    sim.flap()
+    state = sim.snapshot()
+    sim.update()
+    logged = bytes(sim.flap_log)
+    sim.restore(state)
+    sim.update()
+    assert bytes(sim.flap_log) == logged
+    stepper = sim.stepper()
+    stepper.step(state)
+    assert valid(state) == valid(sim.snapshot())
+
+
+def test_replays_verify():
+    replays = [record(seed) for seed in SEEDS]
+    assert all(replay.frames < MAX_FRAMES for replay in replays)
+    for replay in replays:
+        assert Replay.from_bytes(replay.to_bytes()).verify()
+    tampered = [Replay(r.seed, r.flaps, r.score + 1, *r.geometry) for r in replays[::2]] + \
+               [Replay(r.seed, r.flaps[:-1], r.score, *r.geometry) for r in replays[1::2]]
+    assert not any(replay.verify() for replay in tampered)
+    assert verify_replays(replays + tampered) == [True] * len(replays) + [False] * len(tampered)
+
+
+def test_replays_with_other_sizes_fail():
+    replay = record(0)
+    geometry = replay.geometry
+    # A tiny bird and a sliver of pipe would make any run easy
+    sim = Replay(replay.seed, b'', 0, geometry[0], 1, 1, 1).start()
+    sim.flap()
+    while not sim.game_over:
+        sim.update()
+    forged = Replay.from_simulation(sim)
+    assert forged.verify() and verify_replays([forged]) == [True]
+    assert not forged.verify(geometry)
+    assert verify_replays([replay, forged], expected_geometry=geometry) == [True, False]
+
+
+@pytest.mark.parametrize('data, frames', [
+    (b'\xff' * 10 + b'\x01', 5),  # run past 2**63
+    (b'\x80\x80\x80\x80\x08', 100),  # 2**31 frames of nothing
+    (encode_runs(b'\0\0\1\0'), 3),
+    (encode_runs(b'\0\0\1\0'), 5),
+])
+def test_decode_runs_rejects_forged_runs(data, frames):
+    with pytest.raises(ValueError):
+        decode_runs(data, frames)
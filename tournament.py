@@ -0,0 +1,231 @@
+"""Evaluate bot policies on many seeded games across a process pool.
+
+A policy is a callable that takes a headless flappy_core.Simulation and
+returns True to flap before the next frame. Every (policy, seed) pair is one
+game; games are sharded over worker processes and results are appended to a
+JSON-lines file as they finish, so an interrupted tournament resumes where
+it stopped. From the command line, games use the collision sizes of the
+game's sprites, so policies are ranked on the game people play. Run with
+importable policies:
+    python tournament.py --policy tournament:gap_follower --policy mybots:policy \\
+        --seeds 1000 --results results.jsonl
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+import flappy_core as core
+
+MAX_FRAMES = 100000  # games still alive after this many frames are stopped
+TASK_CHUNK = 8  # games handed to a worker at a time
+
+
+def gap_follower(sim):
+    """Flap when the bird sinks near the bottom of the next gap"""
+    bird = sim.bird
+    for pipe in sim.pipes:
+        if pipe.x + pipe.width >= bird.x:
+            return bird.y + bird.height > pipe.gap_y + pipe.gap - 50
+    return bird.y + bird.height > core.SCREEN_HEIGHT // 2
+
+
+def hover(sim):
+    """Baseline that ignores the pipes and holds the middle of the screen"""
+    return sim.bird.y > core.SCREEN_HEIGHT // 2
+
+
+def play(policy, seed, max_frames=MAX_FRAMES, difficulty='flat', geometry=None):
+    """Play one game and return its score, frames survived and whether it hit max_frames.
+
+    geometry is (base_y, bird width, bird height, pipe width), as in
+    Replay.geometry; without it the Simulation's fallback sizes are used.
+    """
+    if geometry:
+        base_y, bird_width, bird_height, pipe_width = geometry
+        sim = core.Simulation(base_y, seed, difficulty)
+        sim.pipe_width = pipe_width
+        sim.bird.width = bird_width
+        sim.bird.height = bird_height
+    else:
+        sim = core.Simulation(seed=seed, difficulty=difficulty)
+    sim.flap()
+    while not sim.game_over and sim.frame_count < max_frames:
+        if policy(sim):
+            sim.flap()
+        sim.update()
+        sim.roll_ahead()
+    return sim.score, sim.frame_count, not sim.game_over
+
+
+# Set in each worker by _init_worker
+_policies = None
+_settings = None
+
+
+def _init_worker(policies, settings):
+    global _policies, _settings
+    _policies = policies
+    _settings = settings
+
+
+def _run_game(task):
+    name, seed = task
+    start = time.perf_counter()
+    score, frames, capped = play(_policies[name], seed, _settings['max_frames'], _settings['difficulty'],
+                                 _settings['geometry'])
+    return {'policy': name, 'seed': seed, 'score': score, 'frames': frames,
+            'capped': capped, 'seconds': time.perf_counter() - start, **_settings}
+
+
+def tournament_settings(max_frames=MAX_FRAMES, difficulty='flat', geometry=None):
+    """The settings stored with each result; results only resume into matching settings"""
+    return {'max_frames': max_frames, 'difficulty': difficulty,
+            'geometry': list(geometry) if geometry else None}
+
+
+def matching_results(results, policies, seeds, settings):
+    """Results for these policies and seeds that were played with these settings"""
+    seeds = set(seeds)
+    return [r for r in results if r['policy'] in policies and r['seed'] in seeds
+            and all(r.get(key) == value for key, value in settings.items())]
+
+
+def load_results(path):
+    """Results already in a JSON-lines file; a line cut off by an interruption is skipped"""
+    results = []
+    if not path or not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return results
+
+
+def run_tournament(policies, seeds, results_path=None, workers=None,
+                   max_frames=MAX_FRAMES, on_result=None, difficulty='flat', geometry=None):
+    """Play every policy on every seed and return all results.
+
+    `policies` maps names to callables; they must be picklable (defined at
+    module level) when the pool starts workers with spawn. Pairs already in
+    results_path with the same max_frames, difficulty and geometry are
+    skipped, and new results are appended to it. on_result is called with
+    each result as it arrives. difficulty names one of core.DIFFICULTIES,
+    and geometry is passed to play().
+    """
+    settings = tournament_settings(max_frames, difficulty, geometry)
+    results = matching_results(load_results(results_path), policies, seeds, settings)
+    done = {(r['policy'], r['seed']) for r in results}
+    tasks = [(name, seed) for seed in seeds for name in policies if (name, seed) not in done]
+    if not tasks:
+        return results
+
+    out = None
+    if results_path:
+        out = open(results_path, 'a+')
+        # Finish a line cut off by an interruption so new results start on their own
+        if out.tell() > 0:
+            out.seek(out.tell() - 1)
+            if out.read(1) != '\n':
+                out.write('\n')
+    try:
+        with multiprocessing.Pool(workers, _init_worker, (policies, settings)) as pool:
+            for result in pool.imap_unordered(_run_game, tasks, chunksize=TASK_CHUNK):
+                results.append(result)
+                if out:
+                    out.write(json.dumps(result) + '\n')
+                    out.flush()
+                if on_result:
+                    on_result(result)
+    finally:
+        if out:
+            out.close()
+    return results
+
+
+def summarize(results):
+    """Per-policy score and survival statistics"""
+    by_policy = {}
+    for result in results:
+        by_policy.setdefault(result['policy'], []).append(result)
+    summary = {}
+    for name, runs in by_policy.items():
+        scores = [r['score'] for r in runs]
+        frames = [r['frames'] for r in runs]
+        seconds = sum(r['seconds'] for r in runs)
+        summary[name] = {
+            'games': len(runs),
+            'mean_score': statistics.fmean(scores),
+            'median_score': statistics.median(scores),
+            'max_score': max(scores),
+            'mean_frames': statistics.fmean(frames),
+            'capped': sum(r['capped'] for r in runs),
+            'steps_per_second': sum(frames) / seconds if seconds > 0 else 0.0,
+        }
+    return summary
+
+
+def load_policy(spec):
+    """Import a policy from a 'module:attribute' string"""
+    module, _, attr = spec.partition(':')
+    if not attr:
+        raise ValueError(f'policy {spec!r} should look like module:function')
+    return getattr(importlib.import_module(module), attr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--policy', action='append', metavar='MODULE:FUNCTION',
+                        help='policy to evaluate (repeatable); defaults to the built-in examples')
+    parser.add_argument('--seeds', type=int, default=100, help='number of seeds per policy')
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--max-frames', type=int, default=MAX_FRAMES)
+    parser.add_argument('--difficulty', choices=core.DIFFICULTIES, default='flat')
+    parser.add_argument('--results', metavar='PATH', help='JSON-lines results file to append to and resume from')
+    args = parser.parse_args()
+
+    # Policies given as tournament:... should resolve to this module's functions
+    sys.modules.setdefault('tournament', sys.modules[__name__])
+    specs = args.policy or ['tournament:gap_follower', 'tournament:hover']
+    try:
+        policies = {spec: load_policy(spec) for spec in specs}
+    except (ImportError, AttributeError, ValueError) as e:
+        sys.exit(f'Error loading policy: {e}')
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+
+    # Collide with the sizes of the game's own sprites
+    from flappy_bird import sprite_geometry
+    geometry = sprite_geometry()
+
+    total = len(policies) * len(seeds)
+    settings = tournament_settings(args.max_frames, args.difficulty, geometry)
+    finished = [len(matching_results(load_results(args.results), policies, seeds, settings))]
+    print(f'{len(policies)} policies x {len(seeds)} seeds, {finished[0]} games already done')
+
+    def progress(result):
+        finished[0] += 1
+        print(f"[{finished[0]}/{total}] {result['policy']} seed {result['seed']}: "
+              f"score {result['score']}, {result['frames']} frames")
+
+    start = time.perf_counter()
+    results = run_tournament(policies, seeds, args.results, args.workers, args.max_frames, progress,
+                             args.difficulty, geometry)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{'policy':<32} {'games':>6} {'mean':>8} {'median':>7} {'max':>6} {'frames':>9} {'capped':>7} {'steps/s':>9}")
+    for name, s in summarize(results).items():
+        print(f"{name:<32} {s['games']:>6} {s['mean_score']:>8.2f} {s['median_score']:>7.1f} {s['max_score']:>6} "
+              f"{s['mean_frames']:>9.0f} {s['capped']:>7} {s['steps_per_second']:>9.0f}")
+    print(f'{elapsed:.1f}s wall clock')
+
+
+if __name__ == '__main__':
+    main()